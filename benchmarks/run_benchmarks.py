@@ -0,0 +1,644 @@
+"""
+Benchmarks of every public function in `brew_maths.calc`, and of building recipe objects
+
+    python benchmarks/run_benchmarks.py                      # compare against benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --sizes small        # quicker run
+    python benchmarks/run_benchmarks.py --save-baseline      # record a new baseline
+
+Each benchmark is timed at a small, medium and large size (grists per recipe for scalar calcs, recipes per batch for
+batch calcs), and the best time per call is written as JSON. The run fails (exit code 1) if any benchmark is slower
+than `--tolerance` times its baseline, or if a public calc function has no benchmark.
+
+Timings depend on the machine and on how busy it is, so a fixed reference kernel (some Python and some numpy) is
+timed in every run, and the baseline is scaled by how much slower or faster it ran than when the baseline was
+recorded. A benchmark that still looks slower is timed again, with `--confirm-repeat` repeats of at least
+`--confirm-time` seconds, and only counts as a regression if it is slower both times.
+"""
+import argparse
+import importlib
+import inspect
+import json
+import math
+import pkgutil
+import platform
+import random
+import sys
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Set
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import brew_maths.calc  # noqa: E402
+from brew_maths.calc import abv, boil_gravity, ebc, final_gravity, formulas, hop_bitterness, hop_util, \
+    mash_liquor, monte_carlo, optimizer, original_gravity, recipe_evaluator, rescale, sensitivity, srm, summary, \
+    sweep, util  # noqa: E402
+from brew_maths.recipe_objects.batch import RecipeBatch  # noqa: E402
+from brew_maths.recipe_objects.catalogue import IngredientCatalogue  # noqa: E402
+from brew_maths.recipe_objects.equipment import EquipmentProfile  # noqa: E402
+from brew_maths.recipe_objects.grist import GristRecipe, GristMetadata  # noqa: E402
+from brew_maths.recipe_objects.hop import HopRecipe, HopMetadata  # noqa: E402
+from brew_maths.recipe_objects.recipe import Recipe  # noqa: E402
+
+BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+
+# Number of grists in a recipe (scalar benchmarks), and number of recipes in a batch (batch benchmarks)
+SIZES = {
+    'small': {'grists': 5, 'recipes': 10},
+    'medium': {'grists': 50, 'recipes': 1000},
+    'large': {'grists': 500, 'recipes': 20000},
+}
+
+
+def make_grist(rng: random.Random) -> GristRecipe:
+    return GristRecipe(ebc=rng.uniform(2, 1500),
+                       mashable=rng.random() < 0.8,
+                       extract=rng.uniform(200, 380),
+                       moisture=rng.uniform(0, 30),
+                       fermentability=rng.choice([None, None, 1]),
+                       metadata=GristMetadata(name='Grist'),
+                       mass=rng.uniform(10, 5000))
+
+
+def make_hop(rng: random.Random) -> HopRecipe:
+    return HopRecipe(alpha=rng.uniform(0.02, 0.17),
+                     metadata=HopMetadata(name='Hop'),
+                     mass=rng.uniform(5, 100),
+                     time=rng.choice([0, 5, 15, 30, 60, 90]))
+
+
+class Fixture(NamedTuple):
+    grists: List[GristRecipe]
+    hops: List[HopRecipe]
+    recipe: Recipe
+    recipes: List[Recipe]
+    batch: RecipeBatch
+    gravities: np.ndarray  # one per recipe of the batch, in full (i.e. 1.045)
+
+
+def make_fixture(size: str) -> Fixture:
+    rng = random.Random(0)
+    grists = [make_grist(rng) for _ in range(SIZES[size]['grists'])]
+    hops = [make_hop(rng) for _ in range(max(1, SIZES[size]['grists'] // 2))]
+    recipes = [Recipe([make_grist(rng) for _ in range(6)], [make_hop(rng) for _ in range(3)])
+               for _ in range(SIZES[size]['recipes'])]
+    return Fixture(
+        grists=grists,
+        hops=hops,
+        recipe=Recipe(grists, hops),
+        recipes=recipes,
+        batch=RecipeBatch.from_recipes(recipes),
+        gravities=np.linspace(1.030, 1.090, len(recipes)),
+    )
+
+
+# name -> function taking a fixture and returning the zero argument callable to time
+BENCHMARKS: Dict[str, Callable[[Fixture], Callable[[], object]]] = {}
+# Qualified names of the functions exercised by the benchmarks
+COVERED: Set[str] = set()
+
+
+def benchmark(name: str, *also_covers: str):
+    """Registers a benchmark of the function `name`, which may also exercise other functions (`also_covers`)"""
+
+    def register(function):
+        BENCHMARKS[name] = function
+        COVERED.update((name, *also_covers))
+        return function
+
+    return register
+
+
+@benchmark('abv.www_alcohol_by_volume')
+def _(f):
+    return lambda: [abv.www_alcohol_by_volume(g, 1.010) for g in f.gravities]
+
+
+@benchmark('abv.www_alcohol_by_volume_degrees')
+def _(f):
+    return lambda: [abv.www_alcohol_by_volume_degrees(g, 10) for g in f.gravities]
+
+
+@benchmark('abv.ritchie_abv')
+def _(f):
+    return lambda: [abv.ritchie_abv(g, 1.010) for g in f.gravities]
+
+
+@benchmark('abv.find_gov_uk_factor')
+def _(f):
+    diffs = np.round(np.linspace(0, 110, len(f.gravities)), 1).tolist()
+    return lambda: [abv.find_gov_uk_factor(diff) for diff in diffs]
+
+
+@benchmark('abv.find_gov_uk_factor_batch', 'abv.find_gov_uk_factor_index_batch')
+def _(f):
+    diffs = np.round(np.linspace(0, 110, len(f.gravities)), 1)
+    return lambda: abv.find_gov_uk_factor_batch(diffs)
+
+
+@benchmark('abv.gov_uk_abv')
+def _(f):
+    gravities = (f.gravities * 1000 - 1000).tolist()
+    return lambda: [abv.gov_uk_abv(g, 10) for g in gravities]
+
+
+@benchmark('abv.gov_uk_abv_batch')
+def _(f):
+    gravities = f.gravities * 1000 - 1000
+    return lambda: abv.gov_uk_abv_batch(gravities, np.full_like(gravities, 10))
+
+
+@benchmark('abv.gov_uk_abv_full')
+def _(f):
+    gravities = f.gravities.tolist()
+    return lambda: [abv.gov_uk_abv_full(g, 1.010) for g in gravities]
+
+
+@benchmark('abv.gov_uk_abv_full_batch')
+def _(f):
+    return lambda: abv.gov_uk_abv_full_batch(f.gravities, np.full_like(f.gravities, 1.010))
+
+
+@benchmark('abv.gov_uk_abv_sanity_check_batch')
+def _(f):
+    gravities = f.gravities * 1000 - 1000
+    return lambda: abv.gov_uk_abv_sanity_check_batch(gravities, np.full_like(gravities, 10))
+
+
+@benchmark('boil_gravity.boil_gravity')
+def _(f):
+    return lambda: boil_gravity.boil_gravity(f.grists, 27)
+
+
+@benchmark('boil_gravity.boil_gravity_batch')
+def _(f):
+    return lambda: boil_gravity.boil_gravity_batch(f.batch, 27)
+
+
+@benchmark('ebc.graham_grist_ebc_in_solution')
+def _(f):
+    return lambda: [ebc.graham_grist_ebc_in_solution(grist, 23) for grist in f.grists]
+
+
+@benchmark('ebc.graham_recipe_ebc')
+def _(f):
+    return lambda: ebc.graham_recipe_ebc(f.grists, 23)
+
+
+@benchmark('ebc.graham_recipe_ebc_batch', 'ebc.graham_grist_ebc_in_solution_batch')
+def _(f):
+    return lambda: ebc.graham_recipe_ebc_batch(f.batch, 23)
+
+
+@benchmark('final_gravity.apply_attenuation')
+def _(f):
+    return lambda: [final_gravity.apply_attenuation(grist.fermentability, 0.62) for grist in f.grists]
+
+
+@benchmark('final_gravity.final_gravity')
+def _(f):
+    return lambda: final_gravity.final_gravity(f.grists, 23)
+
+
+@benchmark('final_gravity.final_gravity_batch')
+def _(f):
+    return lambda: final_gravity.final_gravity_batch(f.batch, 23)
+
+
+@benchmark('formulas.FormulaRegistry', 'formulas.is_batch_input')
+def _(f):
+    original_gravities = f.gravities * 1000
+    final_gravities = np.full_like(original_gravities, 1010)
+    return lambda: formulas.FORMULAS.compare('abv', original_gravities, final_gravities)
+
+
+@benchmark('hop_bitterness.hop_ibu')
+def _(f):
+    return lambda: [hop_bitterness.hop_ibu(hop, 23, 1.055) for hop in f.hops]
+
+
+@benchmark('hop_bitterness.hop_ibu_batch')
+def _(f):
+    return lambda: hop_bitterness.hop_ibu_batch(f.batch, 23, f.gravities)
+
+
+@benchmark('hop_bitterness.hop_ibu_per_gram')
+def _(f):
+    return lambda: [hop_bitterness.hop_ibu_per_gram(hop, 23, 1.055) for hop in f.hops]
+
+
+@benchmark('hop_bitterness.hop_masses_for_ibu')
+def _(f):
+    fractions = [1 if hop.time else None for hop in f.hops]
+    return lambda: hop_bitterness.hop_masses_for_ibu(f.hops, fractions, 5000, 23, 1.055)
+
+
+@benchmark('hop_bitterness.hop_masses_for_ibu_batch')
+def _(f):
+    fractions = np.ones_like(f.batch.hop_mass)
+    return lambda: hop_bitterness.hop_masses_for_ibu_batch(f.batch, fractions, 35, 23, f.gravities)
+
+
+@benchmark('hop_bitterness.recipe_ibu_batch')
+def _(f):
+    return lambda: hop_bitterness.recipe_ibu_batch(f.batch, 23, f.gravities)
+
+
+@benchmark('hop_bitterness.schedule_ibu')
+def _(f):
+    return lambda: hop_bitterness.schedule_ibu(f.hops, 23, f.gravities)
+
+
+@benchmark('hop_util.utilization')
+def _(f):
+    return lambda: [hop_util.utilization(hop, 1.055) for hop in f.hops]
+
+
+@benchmark('hop_util.gravity_factor')
+def _(f):
+    gravities = f.gravities.tolist()
+    return lambda: [hop_util.gravity_factor(g) for g in gravities]
+
+
+@benchmark('hop_util.time_factor')
+def _(f):
+    return lambda: [hop_util.time_factor(hop.time) for hop in f.hops]
+
+
+@benchmark('hop_util.UtilizationTable')
+def _(f):
+    table = hop_util.UtilizationTable()
+    return lambda: table.gravity_factor(f.gravities)
+
+
+@benchmark('hop_util.utilization_batch')
+def _(f):
+    return lambda: hop_util.utilization_batch(f.batch, f.gravities)
+
+
+@benchmark('mash_liquor.mash_liquor')
+def _(f):
+    return lambda: mash_liquor.mash_liquor(f.grists)
+
+
+@benchmark('monte_carlo.monte_carlo')
+def _(f):
+    uncertainty = monte_carlo.Uncertainty(efficiency=0.03, attenuation=0.03, extract=0.02, moisture=1, alpha=0.1)
+    return lambda: monte_carlo.monte_carlo(f.recipes[0], 23, 27, uncertainty, samples=len(f.recipes), seed=0)
+
+
+OPTIMIZER_TARGETS = optimizer.RecipeTargets(original_gravity=(40, 60), ebc=(10, 1000), ibu=(20, 60))
+
+
+def optimizer_spec(recipe: Recipe) -> optimizer.RecipeSpec:
+    return optimizer.RecipeSpec([optimizer.GristStock(grist, cost=1 + grist.ebc / 500) for grist in recipe.grists],
+                                [optimizer.HopStock(hop, hop.time, cost=20 + 100 * hop.alpha) for hop in recipe.hops],
+                                OPTIMIZER_TARGETS, 23, 27)
+
+
+@benchmark('optimizer.optimize_recipe', 'optimizer.linear_program')
+def _(f):
+    spec = optimizer_spec(f.recipe)
+    return lambda: optimizer.optimize_recipe(*spec)
+
+
+@benchmark('optimizer.optimize_recipes')
+def _(f):
+    # Each recipe is solved on its own, so a thousand is enough to see the cost per recipe
+    specs = [optimizer_spec(recipe) for recipe in f.recipes[:1000]]
+    return lambda: optimizer.optimize_recipes(specs)
+
+
+@benchmark('original_gravity.original_gravity_points')
+def _(f):
+    return lambda: [original_gravity.original_gravity_points(grist) for grist in f.grists]
+
+
+@benchmark('original_gravity.original_gravity')
+def _(f):
+    return lambda: original_gravity.original_gravity(f.grists, 23)
+
+
+@benchmark('original_gravity.individual_gravity')
+def _(f):
+    return lambda: [original_gravity.individual_gravity(grist, 23) for grist in f.grists]
+
+
+@benchmark('original_gravity.original_gravity_batch', 'original_gravity.original_gravity_points_batch')
+def _(f):
+    return lambda: original_gravity.original_gravity_batch(f.batch, 23)
+
+
+@benchmark('original_gravity.masses_for_original_gravity')
+def _(f):
+    percentages = [1] * len(f.grists)
+    return lambda: original_gravity.masses_for_original_gravity(f.grists, percentages, 45, 23)
+
+
+@benchmark('original_gravity.masses_for_original_gravity_batch')
+def _(f):
+    percentages = np.ones_like(f.batch.grist_mass)
+    return lambda: original_gravity.masses_for_original_gravity_batch(f.batch, percentages, 45, 23)
+
+
+@benchmark('recipe_evaluator.RecipeEvaluator')
+def _(f):
+    evaluator = recipe_evaluator.RecipeEvaluator(Recipe(list(f.grists), list(f.hops)), 23, 27)
+
+    def edit():
+        evaluator.update_grist(0, mass=evaluator.recipe.grists[0].mass + 1)
+        return evaluator.original_gravity, evaluator.final_gravity, evaluator.ebc, evaluator.ibu
+
+    return edit
+
+
+SOURCE_KIT = EquipmentProfile(volume=23, efficiency=0.75, boil_off=4)
+TARGET_KIT = EquipmentProfile(volume=50, efficiency=0.85, boil_off=12)
+
+
+@benchmark('rescale.rescale')
+def _(f):
+    return lambda: rescale.rescale(f.recipe, SOURCE_KIT, TARGET_KIT)
+
+
+@benchmark('rescale.rescale_recipes')
+def _(f):
+    return lambda: rescale.rescale_recipes(f.recipes, SOURCE_KIT, TARGET_KIT)
+
+
+@benchmark('rescale.rescale_batch', 'rescale.rescale_factors_batch')
+def _(f):
+    return lambda: rescale.rescale_batch(f.batch, SOURCE_KIT, TARGET_KIT)
+
+
+@benchmark('sensitivity.recipe_sensitivity')
+def _(f):
+    return lambda: sensitivity.recipe_sensitivity(f.recipe, 23, 27)
+
+
+@benchmark('sensitivity.recipe_sensitivity_batch')
+def _(f):
+    return lambda: sensitivity.recipe_sensitivity_batch(f.batch, 23, 27)
+
+
+@benchmark('srm.force_rgb_range')
+def _(f):
+    values = np.linspace(-50, 300, len(f.gravities)).tolist()
+    return lambda: [srm.force_rgb_range(value) for value in values]
+
+
+@benchmark('srm.philip_lee_srm_to_rgb')
+def _(f):
+    values = np.linspace(0, 40, len(f.gravities)).tolist()
+    return lambda: [srm.philip_lee_srm_to_rgb(value) for value in values]
+
+
+@benchmark('srm.force_rgb_range_batch')
+def _(f):
+    values = np.linspace(-50, 300, len(f.gravities))
+    return lambda: srm.force_rgb_range_batch(values)
+
+
+@benchmark('srm.philip_lee_srm_to_rgb_batch')
+def _(f):
+    values = np.linspace(0, 40, len(f.gravities))
+    return lambda: srm.philip_lee_srm_to_rgb_batch(values)
+
+
+@benchmark('srm.ebc_to_srm', 'srm.srm_to_ebc')
+def _(f):
+    values = np.linspace(0, 80, len(f.gravities))
+    return lambda: srm.srm_to_ebc(srm.ebc_to_srm(values))
+
+
+@benchmark('srm.rgb_to_hex', 'srm.pack_rgb')
+def _(f):
+    rgb = srm.philip_lee_srm_to_rgb_batch(np.linspace(0, 40, len(f.gravities)))
+    return lambda: srm.rgb_to_hex(srm.pack_rgb(*rgb))
+
+
+@benchmark('srm.ColourPalette')
+def _(f):
+    palette = srm.ColourPalette()
+    values = np.linspace(0, 80, len(f.gravities))
+    return lambda: palette.from_ebc(values)
+
+
+@benchmark('summary.recipe_summary')
+def _(f):
+    return lambda: summary.recipe_summary(f.recipe, 23, 27)
+
+
+@benchmark('summary.recipe_summary_batch')
+def _(f):
+    return lambda: summary.recipe_summary_batch(f.batch, 23, 27)
+
+
+@benchmark('sweep.sweep')
+def _(f):
+    axis = SIZES_AXIS[len(f.recipes)]
+    return lambda: sweep.sweep(f.grists, np.linspace(10, 30, axis), np.linspace(0.6, 0.85, axis),
+                               np.linspace(0.55, 0.8, axis))
+
+
+SIZES_AXIS = {sizes['recipes']: round(sizes['recipes'] ** (1 / 3)) + 1 for sizes in SIZES.values()}
+
+
+@benchmark('util.total_mass')
+def _(f):
+    return lambda: util.total_mass(f.grists)
+
+
+@benchmark('util.total_mass_of_mashables')
+def _(f):
+    return lambda: util.total_mass_of_mashables(f.grists)
+
+
+@benchmark('util.percentage_by_mass')
+def _(f):
+    return lambda: [util.percentage_by_mass(grist, f.grists) for grist in f.grists]
+
+
+@benchmark('util.percentages_by_mass')
+def _(f):
+    return lambda: util.percentages_by_mass(f.grists)
+
+
+@benchmark('util.exact_power')
+def _(f):
+    return lambda: util.exact_power(0.000125, f.gravities - 1)
+
+
+@benchmark('recipe_objects.GristRecipe')
+def _(f):
+    rng = random.Random(0)
+    return lambda: [make_grist(rng) for _ in f.grists]
+
+
+@benchmark('recipe_objects.RecipeBatch.from_recipes')
+def _(f):
+    return lambda: RecipeBatch.from_recipes(f.recipes)
+
+
+@benchmark('recipe_objects.IngredientCatalogue.recipe')
+def _(f):
+    catalogue = IngredientCatalogue()
+    return lambda: [catalogue.recipe(recipe) for recipe in f.recipes]
+
+
+def public_calc_names() -> List[str]:
+    """The qualified names of every public function and class in `brew_maths.calc`"""
+    names = []
+    for module_info in pkgutil.iter_modules(brew_maths.calc.__path__):
+        module = importlib.import_module(f'brew_maths.calc.{module_info.name}')
+        for name, value in vars(module).items():
+            if not name.startswith('_') and (inspect.isfunction(value) or inspect.isclass(value)) \
+                    and value.__module__ == module.__name__ and not issubclass_namedtuple(value):
+                names.append(f'{module_info.name}.{name}')
+    return sorted(names)
+
+
+def issubclass_namedtuple(value) -> bool:
+    """Result types (NamedTuples) hold no code worth timing"""
+    return inspect.isclass(value) and issubclass(value, tuple)
+
+
+def time_call(function: Callable[[], object], min_time: float, repeat: int = 5) -> float:
+    """The best time per call in seconds, each repeat calling the function for at least `min_time` seconds"""
+    timer = timeit.Timer(function)
+    # The first call warms up any caches, the second calibrates the number of calls per repeat
+    timer.timeit(1)
+    number = max(1, math.ceil(min_time / max(timer.timeit(1), 1e-9)))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+_REFERENCE_VALUES = np.linspace(1, 2, 20000)
+
+
+def reference_kernel() -> None:
+    """A fixed mix of pure Python and numpy work, whose time measures the speed of the machine in this run"""
+    total = 0.0
+    for value in range(5000):
+        total += value * 0.5
+    np.exp(_REFERENCE_VALUES).sum()
+
+
+def time_reference(min_time: float) -> float:
+    return time_call(reference_kernel, min_time, repeat=7)
+
+
+def run(sizes: List[str], only: List[str], min_time: float) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    for size in sizes:
+        fixture = make_fixture(size)
+        for name, make_benchmark in BENCHMARKS.items():
+            if only and not any(pattern in name for pattern in only):
+                continue
+            results.setdefault(name, {})[size] = time_call(make_benchmark(fixture), min_time)
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float, scale: float = 1.0) -> List[str]:
+    """Describes every benchmark slower than `tolerance` times its baseline
+
+    :param scale: How many times slower the machine is than when the baseline was recorded (see `reference_kernel`)
+    """
+    regressions = []
+    for name, sizes in results.items():
+        for size, seconds in sizes.items():
+            expected = baseline.get(name, {}).get(size)
+            if expected is not None and seconds > expected * scale * tolerance:
+                regressions.append(f'{name} [{size}]: {seconds:.3g}s per call, baseline {expected:.3g}s x {scale:.2f} '
+                                   f'for this machine ({seconds / (expected * scale):.2f}x)')
+    return regressions
+
+
+def confirm(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float,
+            scale: float, reference: float, min_time: float, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Times every apparent regression again, more carefully, keeping the best of both times
+
+    The reference is timed again beside each one, and the new time scaled by how much faster the reference ran then
+    than in the run as a whole (`reference`), so a machine that was only busy for a while does not look like a
+    regression
+    """
+    confirmed = {name: dict(sizes) for name, sizes in results.items()}
+    suspects = [(name, size) for name, sizes in results.items() for size, seconds in sizes.items()
+                if baseline.get(name, {}).get(size) is not None and seconds > baseline[name][size] * scale * tolerance]
+    for size in sorted({size for _, size in suspects}):
+        fixture = make_fixture(size)
+        for name, suspect_size in suspects:
+            if suspect_size == size:
+                before = time_reference(min_time)
+                seconds = time_call(BENCHMARKS[name](fixture), min_time, repeat)
+                local_reference = min(before, time_reference(min_time))
+                confirmed[name][size] = min(confirmed[name][size], seconds * reference / local_reference)
+    return confirmed
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=list(SIZES))
+    parser.add_argument('--only', nargs='+', default=[], help='Only run benchmarks containing one of these')
+    parser.add_argument('--baseline', type=Path, default=BASELINE)
+    parser.add_argument('--tolerance', type=float, default=2.0, help='Allowed slowdown vs the baseline')
+    parser.add_argument('--min-time', type=float, default=0.02, help='Seconds to spend on each repeat')
+    parser.add_argument('--confirm-time', type=float, default=0.1,
+                        help='Seconds to spend on each repeat when timing an apparent regression again')
+    parser.add_argument('--confirm-repeat', type=int, default=9,
+                        help='Repeats when timing an apparent regression again (at least 3)')
+    parser.add_argument('--output', type=Path, help='Write the results as JSON to this file')
+    parser.add_argument('--save-baseline', action='store_true', help='Record the results as the new baseline')
+    args = parser.parse_args(argv)
+
+    failed = False
+    missing = [name for name in public_calc_names() if name not in COVERED]
+    if missing:
+        print(f'No benchmark for: {", ".join(missing)}', file=sys.stderr)
+        failed = True
+
+    if args.confirm_repeat < 3:
+        parser.error('--confirm-repeat must be at least 3')
+
+    # The reference is timed either side of the run, the faster of the two being the least disturbed
+    reference = time_reference(args.min_time)
+    results = run(args.sizes, args.only, args.min_time)
+    reference = min(reference, time_reference(args.min_time))
+    report = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'reference': reference,
+        'results': results,
+    }
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        args.output.write_text(output + '\n')
+    else:
+        print(output)
+
+    if args.save_baseline:
+        if args.baseline.exists():
+            # Keep the baseline of sizes and benchmarks that were not run, scaled to this run's reference
+            previous = json.loads(args.baseline.read_text())
+            scale = reference / previous['reference'] if previous.get('reference') else 1.0
+            for name, sizes in previous['results'].items():
+                results[name] = {**{size: seconds * scale for size, seconds in sizes.items()}, **results.get(name, {})}
+        args.baseline.write_text(json.dumps({**report, 'results': results}, indent=2, sort_keys=True) + '\n')
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        scale = reference / baseline['reference'] if baseline.get('reference') else 1.0
+        results = confirm(results, baseline['results'], args.tolerance, scale, reference,
+                          max(args.confirm_time, args.min_time), args.confirm_repeat)
+        regressions = compare(results, baseline['results'], args.tolerance, scale)
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        failed = failed or bool(regressions)
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,4 @@
+from brew_maths.cli import main
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+"""
+Content addressed caching of calc results
+
+    cache = CalcCache(max_bytes=64 * 1024 * 1024, path='calc_cache.sqlite3')
+    summary = cache.wrap(recipe_summary)
+    summary(recipe, 23, 27)  # computed
+    summary(copy.deepcopy(recipe), 23, 27)  # looked up, the contents are the same
+
+Keys are a hash of the function, and the contents of its arguments: recipes, grists and hops are hashed by their
+values (not their identity or metadata), so clones and shared templates hit the same entry, and an edited recipe
+misses. Cached results are shared between callers, so should not be mutated.
+
+A function is hashed by its name, its compiled code and the contents of the values it closes over (following any
+functions among them), so editing it, or two lambdas of the same name, give new keys. A bound method also includes
+the contents of its instance, and a `functools.partial` its arguments. Changes to the functions it calls are not
+seen, so pass a `version` (to the cache, or to `wrap`) and bump it whenever results would change, to keep a
+persistent cache from serving stale ones.
+"""
+import dataclasses
+import functools
+import hashlib
+import inspect
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, FrozenSet, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from brew_maths.recipe_objects.grist import Grist, GristLine, GristDefinition
+from brew_maths.recipe_objects.hop import Hop, HopLine, HopDefinition
+from brew_maths.recipe_objects.recipe import Recipe
+
+
+def _number(value: float) -> Tuple[str, str]:
+    # 100 and 100.0 give the same results, so should give the same key (but not the same as the string '100.0')
+    return 'number', repr(float(value))
+
+
+def _code_constant(value: Any) -> str:
+    if inspect.iscode(value):
+        return _code_hash(value)
+    if isinstance(value, (tuple, frozenset)):
+        # Sorted, as the order of a frozenset of strings changes between processes
+        items = [_code_constant(item) for item in value]
+        return repr((type(value).__name__, items if isinstance(value, tuple) else sorted(items)))
+    return repr(value)
+
+
+def _code_hash(code) -> str:
+    """A hash of compiled code, including the constants and names it uses and any nested functions"""
+    digest = hashlib.blake2b(code.co_code, digest_size=16)
+    digest.update(repr(code.co_names).encode())
+    for constant in code.co_consts:
+        digest.update(_code_constant(constant).encode())
+    return digest.hexdigest()
+
+
+def _function_key(function: Callable, visited: FrozenSet[int] = frozenset()) -> Any:
+    """The name, code and closed over values of a function, with those of every function it closes over
+
+    `visited` only stops a function that closes over itself from being followed forever, it is not part of the key
+    """
+    if isinstance(function, functools.partial):
+        return ('partial', _function_key(function.func, visited), canonical(function.args),
+                canonical(function.keywords))
+    instance = getattr(function, '__self__', None)
+    if instance is not None and not inspect.ismodule(instance):
+        # A bound method, of Python or builtin code
+        try:
+            instance = canonical(instance)
+        except TypeError:
+            raise TypeError(f"Cannot make a cache key from the method {function.__qualname__}, as its "
+                            f"{type(instance).__name__} cannot be hashed by its contents") from None
+        method = getattr(function, '__func__', None)
+        method = f'{type(function.__self__).__module__}.{function.__qualname__}' if method is None else \
+            _function_key(method, visited)
+        return 'method', method, instance
+    function = inspect.unwrap(function)
+    name = getattr(function, '__qualname__', None) or getattr(function, '__name__', None) or \
+        type(function).__qualname__
+    name = f"{getattr(function, '__module__', None) or type(function).__module__}.{name}"
+    code = getattr(function, '__code__', None)
+    if code is None:
+        return name
+    if id(function) in visited:
+        return name, 'recursive'
+    visited = visited | {id(function)}
+    cells = tuple(_cell_key(cell.cell_contents, visited) for cell in function.__closure__ or ())
+    return name, _code_hash(code), cells
+
+
+def _cell_key(value: Any, visited: FrozenSet[int]) -> Any:
+    if callable(value) and not dataclasses.is_dataclass(value):
+        return _function_key(value, visited)
+    if isinstance(value, tuple):
+        return tuple(_cell_key(item, visited) for item in value)
+    try:
+        return canonical(value)
+    except TypeError:
+        raise TypeError(f"Cannot make a cache key from a function closing over {type(value).__name__}") from None
+
+
+def canonical(value: Any) -> Any:
+    """A hashable, deterministic representation of the contents of a calc argument"""
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return _number(value)
+    if isinstance(value, Recipe):
+        return 'recipe', canonical(value.grists), canonical(value.hops)
+    if isinstance(value, (Grist, GristLine, GristDefinition)):
+        return ('grist', _number(value.ebc), bool(value.mashable), _number(value.extract), _number(value.moisture),
+                canonical(value.fermentability), canonical(getattr(value, 'mass', None)))
+    if isinstance(value, (Hop, HopLine, HopDefinition)):
+        return ('hop', _number(value.alpha), canonical(getattr(value, 'mass', None)),
+                canonical(getattr(value, 'time', None)))
+    if isinstance(value, np.ndarray):
+        return 'array', value.dtype.str, value.shape, hashlib.blake2b(np.ascontiguousarray(value).tobytes()).hexdigest()
+    if isinstance(value, (list, tuple)):
+        return tuple(canonical(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted(((canonical(key), canonical(item)) for key, item in value.items()), key=repr))
+    if dataclasses.is_dataclass(value):
+        return type(value).__qualname__, canonical(dataclasses.asdict(value))
+    if callable(value):
+        return _function_key(value)
+    raise TypeError(f"Cannot make a cache key from {type(value).__name__}")
+
+
+def content_key(*args, **kwargs) -> str:
+    """Hashes the contents of the arguments into a key"""
+    return hashlib.blake2b(repr((canonical(args), canonical(kwargs))).encode(), digest_size=20).hexdigest()
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    disk_hits: int
+    evictions: int
+    entries: int
+    bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class CalcCache:
+    """An LRU cache of calc results bounded by memory, with an optional persistent sqlite tier
+
+    :param max_bytes: Memory budget, measured as the pickled size of the cached results
+    :param path: If given, results are also written to (and read back from) this sqlite database, so they survive
+                 between processes
+    :param version: Part of every key, bump it when the results of the cached functions change
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, path: Optional[str] = None, version: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.version = version
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._hits = self._misses = self._disk_hits = self._evictions = 0
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB)')
+            self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: str, value: Any, size: int):
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (value, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self._evictions += 1
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return self._entries[key][0]
+            if self._db is not None:
+                row = self._db.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    value = pickle.loads(row[0])
+                    self._remember(key, value, len(row[0]))
+                    self._hits += 1
+                    self._disk_hits += 1
+                    return value
+            self._misses += 1
+            return default
+
+    def put(self, key: str, value: Any):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._remember(key, value, len(data))
+            if self._db is not None:
+                self._db.execute('INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)', (key, data))
+                self._db.commit()
+
+    def get_or_compute(self, function: Callable, *args, **kwargs) -> Any:
+        """Returns the cached result of `function(*args, **kwargs)`, calling it on a miss"""
+        return self._get_or_compute(function, None, args, kwargs)
+
+    def _get_or_compute(self, function: Callable, version: Optional[str], args: tuple, kwargs: dict) -> Any:
+        key = self._key(function, version, args, kwargs)
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = function(*args, **kwargs)
+            self.put(key, value)
+        return value
+
+    def key(self, function: Callable, *args, **kwargs) -> str:
+        """The key of a call, defaults are filled in so that `f(r, 23)` and `f(r, volume=23)` share a key"""
+        return self._key(function, None, args, kwargs)
+
+    def _key(self, function: Callable, version: Optional[str], args: tuple, kwargs: dict) -> str:
+        try:
+            bound = inspect.signature(function).bind(*args, **kwargs)
+            bound.apply_defaults()
+            args, kwargs = (), dict(bound.arguments)
+        except (TypeError, ValueError):
+            pass
+        return content_key(function, (self.version, version), *args, **kwargs)
+
+    def wrap(self, function: Callable, version: Optional[str] = None) -> Callable:
+        """Returns a cached version of a calc function
+
+        :param version: Part of the keys of this function, bump it when its results change
+        """
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            return self._get_or_compute(function, version, args, kwargs)
+
+        return wrapper
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._disk_hits, self._evictions, len(self._entries),
+                              self._bytes)
+
+    def clear(self, disk: bool = False):
+        """Empties the memory tier (and the disk tier, if `disk`)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if disk and self._db is not None:
+                self._db.execute('DELETE FROM results')
+                self._db.commit()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -1,4 +1,7 @@
-from typing import NamedTuple, List, Optional
+from bisect import bisect_right
+from typing import NamedTuple, List, Optional, Tuple
+
+import numpy as np
 
 
 def www_alcohol_by_volume(original_gravity: float, final_gravity: float) -> float:
@@ -64,14 +67,58 @@ GOV_UK_ABV_FACTOR: List[ABVFactor] = [
 ]
 
 
+# The bands are sorted and do not overlap, so a band can be found by bisecting its lower bounds
+_GOV_UK_ABV_FACTOR_MINS: List[float] = [factor.excess_gravity_diff_min for factor in GOV_UK_ABV_FACTOR]
+_GOV_UK_ABV_FACTOR_COLUMNS = np.array(GOV_UK_ABV_FACTOR, dtype=float).T
+
+
 def find_gov_uk_factor(excess_gravity_diff: float) -> Optional[ABVFactor]:
     """
 
     :param excess_gravity_diff: Should be rounded to one decimal place
     :return: ABVFactor, if not in range, returns None
     """
-    return next((factor for factor in GOV_UK_ABV_FACTOR
-                 if factor.excess_gravity_diff_min <= excess_gravity_diff <= factor.excess_gravity_diff_max), None)
+    index = bisect_right(_GOV_UK_ABV_FACTOR_MINS, excess_gravity_diff) - 1
+    if index < 0 or excess_gravity_diff > GOV_UK_ABV_FACTOR[index].excess_gravity_diff_max:
+        return None
+    return GOV_UK_ABV_FACTOR[index]
+
+
+def find_gov_uk_factor_index_batch(excess_gravity_diff: np.ndarray) -> np.ndarray:
+    """Vectorized `find_gov_uk_factor`
+
+    :param excess_gravity_diff: Should be rounded to one decimal place
+    :return: The index into GOV_UK_ABV_FACTOR of each value, -1 where it is not in range
+    """
+    diff_min, diff_max = _GOV_UK_ABV_FACTOR_COLUMNS[0], _GOV_UK_ABV_FACTOR_COLUMNS[1]
+    index = np.searchsorted(diff_min, excess_gravity_diff, side='right') - 1
+    in_range = (index >= 0) & (excess_gravity_diff <= diff_max[index])
+    return np.where(in_range, index, -1)
+
+
+def find_gov_uk_factor_batch(excess_gravity_diff: np.ndarray) -> np.ndarray:
+    """
+    :param excess_gravity_diff: Should be rounded to one decimal place
+    :return: The factor of each value, NaN where it is not in range
+    """
+    index = find_gov_uk_factor_index_batch(excess_gravity_diff)
+    return np.where(index >= 0, _GOV_UK_ABV_FACTOR_COLUMNS[4][index], np.nan)
+
+
+def _round_batch(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """Rounds like python's `round`
+
+    `np.round` scales by 10 ** ndigits first, so values sitting right on a half (i.e. 0.15, which is really
+    0.1499...) can round the other way. Those few values are rounded by python instead.
+    """
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, ndigits)
+    scaled = values * 10 ** ndigits
+    near_half = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    if near_half.any():
+        rounded = rounded.copy()
+        rounded[near_half] = [round(value, ndigits) for value in values[near_half].tolist()]
+    return rounded
 
 
 def gov_uk_abv(original_gravity: float, final_gravity: float, sanity_check: bool = False):
@@ -79,8 +126,9 @@ def gov_uk_abv(original_gravity: float, final_gravity: float, sanity_check: bool
 
     SOURCE: https://www.gov.uk/government/publications/excise-notice-226-beer-duty/excise-notice-226-beer-duty--2#calculation-strength
 
-    :param original_gravity: The original gravity (in full, i.e. 1.045)
-    :param final_gravity: The final gravity (in full, i.e. 1.031)
+    :param original_gravity: The original gravity, as written in the notice (i.e. 1045.0). For gravities in full
+                             (i.e. 1.045) use `gov_uk_abv_full`
+    :param final_gravity: The final gravity, as written in the notice (i.e. 1031.0)
     :param sanity_check: If true, raises value error if abv not in expected range
     :return: ABV (i.e. 4.5 = 4.5% ABV)
     """
@@ -97,3 +145,88 @@ def gov_uk_abv(original_gravity: float, final_gravity: float, sanity_check: bool
         raise ValueError(f"{abv} not in range [{factor.abv_min}, {factor.abv_max}]")
 
     return abv
+
+
+def _gov_uk_abv_batch(original_gravity: np.ndarray, final_gravity: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    original_gravity = np.asarray(original_gravity, dtype=float)
+    final_gravity = np.asarray(final_gravity, dtype=float)
+    excess_gravity_diff = _round_batch(original_gravity - final_gravity, 1)
+    index = find_gov_uk_factor_index_batch(excess_gravity_diff)
+    factor = _GOV_UK_ABV_FACTOR_COLUMNS[4][index]
+
+    # fallback, use ritchie formula
+    with np.errstate(divide='ignore', invalid='ignore'):
+        abv = np.where(index >= 0, excess_gravity_diff * factor, ritchie_abv(original_gravity, final_gravity))
+    return abv, index
+
+
+def _in_range(abv: np.ndarray, index: np.ndarray) -> np.ndarray:
+    abv_min, abv_max = _GOV_UK_ABV_FACTOR_COLUMNS[2][index], _GOV_UK_ABV_FACTOR_COLUMNS[3][index]
+    return (index < 0) | ((abv_min <= abv) & (abv <= abv_max))
+
+
+def gov_uk_abv_batch(original_gravity: np.ndarray, final_gravity: np.ndarray,
+                     sanity_check: bool = False) -> np.ndarray:
+    """Vectorized `gov_uk_abv`, values outside of the table fall back to the ritchie formula element by element
+
+    :param original_gravity: The original gravities, as written in the notice (i.e. 1045.0). For gravities in full
+                             (i.e. 1.045) use `gov_uk_abv_full_batch`
+    :param final_gravity: The final gravities, as written in the notice (i.e. 1031.0)
+    :param sanity_check: If true, raises value error if any abv is not in its expected range
+    :return: ABVs (i.e. 4.5 = 4.5% ABV)
+    """
+    abv, index = _gov_uk_abv_batch(original_gravity, final_gravity)
+    if sanity_check:
+        _sanity_check_batch(abv, index)
+    return abv
+
+
+def _sanity_check_batch(abv: np.ndarray, index: np.ndarray):
+    failed = np.flatnonzero(~_in_range(abv, index))
+    if len(failed):
+        factor = GOV_UK_ABV_FACTOR[index.flat[failed[0]]]
+        raise ValueError(f"{abv.flat[failed[0]]} not in range [{factor.abv_min}, {factor.abv_max}]")
+
+
+def gov_uk_abv_sanity_check_batch(original_gravity: np.ndarray, final_gravity: np.ndarray) -> np.ndarray:
+    """The result of `gov_uk_abv`'s sanity check for each OG/FG pair, without raising
+
+    :return: False where the abv is not within the expected range of its factor. Values that fall back to the
+             ritchie formula are never checked, so are always True
+    """
+    return _in_range(*_gov_uk_abv_batch(original_gravity, final_gravity))
+
+
+def gov_uk_abv_full(original_gravity: float, final_gravity: float, sanity_check: bool = False) -> float:
+    """`gov_uk_abv` of gravities in full (i.e. 1.045), the unit of `www_alcohol_by_volume` and `ritchie_abv`
+
+    The factor table is looked up with the gravities as written in the notice (i.e. 1045.0), outside of it the
+    ritchie formula is used.
+
+    :param original_gravity: The original gravity (in full, i.e. 1.045)
+    :param final_gravity: The final gravity (in full, i.e. 1.010)
+    :param sanity_check: If true, raises value error if abv not in expected range
+    :return: ABV (i.e. 4.5 = 4.5% ABV)
+    """
+    if find_gov_uk_factor(round(original_gravity * 1000 - final_gravity * 1000, 1)) is None:
+        return ritchie_abv(original_gravity, final_gravity)
+    return gov_uk_abv(original_gravity * 1000, final_gravity * 1000, sanity_check)
+
+
+def gov_uk_abv_full_batch(original_gravity: np.ndarray, final_gravity: np.ndarray,
+                          sanity_check: bool = False) -> np.ndarray:
+    """Vectorized `gov_uk_abv_full`
+
+    :param original_gravity: The original gravities (in full, i.e. 1.045)
+    :param final_gravity: The final gravities (in full, i.e. 1.010)
+    :param sanity_check: If true, raises value error if any abv is not in its expected range
+    :return: ABVs (i.e. 4.5 = 4.5% ABV)
+    """
+    original_gravity = np.asarray(original_gravity, dtype=float)
+    final_gravity = np.asarray(final_gravity, dtype=float)
+    abv, index = _gov_uk_abv_batch(original_gravity * 1000, final_gravity * 1000)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        abv = np.where(index >= 0, abv, ritchie_abv(original_gravity, final_gravity))
+    if sanity_check:
+        _sanity_check_batch(abv, index)
+    return abv
@@ -1,9 +1,17 @@
 from typing import List
 
-from brew_maths.calc.original_gravity import original_gravity
-from brew_maths.recipe_objects.grist import Grist, GristRecipe
+import numpy as np
 
+from brew_maths.calc.original_gravity import original_gravity, original_gravity_batch
+from brew_maths.recipe_objects.batch import RecipeBatch, ArrayLike
+from brew_maths.recipe_objects.grist import AnyGristRecipe
 
-def boil_gravity(grists: List[GristRecipe], boil_volume: float, efficiency: float = 0.75):
+
+def boil_gravity(grists: List[AnyGristRecipe], boil_volume: float, efficiency: float = 0.75):
     """Alias for boil gravity, it's the same as original gravity, but simply uses boil volume instead"""
     return original_gravity(grists, boil_volume, efficiency)
+
+
+def boil_gravity_batch(batch: RecipeBatch, boil_volume: ArrayLike, efficiency: ArrayLike = 0.75) -> np.ndarray:
+    """Vectorized `boil_gravity`"""
+    return original_gravity_batch(batch, boil_volume, efficiency)
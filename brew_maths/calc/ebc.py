@@ -1,9 +1,12 @@
 from typing import List
 
-from brew_maths.recipe_objects.grist import GristRecipe
+import numpy as np
 
+from brew_maths.recipe_objects.batch import RecipeBatch, ArrayLike
+from brew_maths.recipe_objects.grist import AnyGristRecipe
 
-def graham_grist_ebc_in_solution(grist: GristRecipe, volume: float, efficiency: float = 0.75) -> float:
+
+def graham_grist_ebc_in_solution(grist: AnyGristRecipe, volume: float, efficiency: float = 0.75) -> float:
     """https://www.lovibond.com/en/PC/Colour-Measurement/Colour-Scales-Standards/EBC-European-Brewing-Convention"""
     mass_kg = grist.mass / 1000
     eff = efficiency if grist.mashable else 1
@@ -11,8 +14,21 @@ def graham_grist_ebc_in_solution(grist: GristRecipe, volume: float, efficiency:
     return (grist.ebc * mass_kg * eff * 10) / volume
 
 
-def graham_recipe_ebc(grists: List[GristRecipe], volume: float, efficiency: float = 0.75) -> float:
+def graham_recipe_ebc(grists: List[AnyGristRecipe], volume: float, efficiency: float = 0.75) -> float:
     """Graham's Formula used in Beer Engine: https://www.jimsbeerkit.co.uk/forum/viewtopic.php?t=26000"""
     return sum(
         graham_grist_ebc_in_solution(grist, volume, efficiency) for grist in grists
     )
+
+
+def graham_grist_ebc_in_solution_batch(batch: RecipeBatch, volume: ArrayLike,
+                                       efficiency: ArrayLike = 0.75) -> np.ndarray:
+    """Vectorized `graham_grist_ebc_in_solution`, returns the EBC contribution of every grist in the batch"""
+    mass_kg = batch.grist_mass / 1000
+    eff = np.where(batch.grist_mashable, batch.per_grist(efficiency), 1)
+    return (batch.grist_ebc * mass_kg * eff * 10) / batch.per_grist(volume)
+
+
+def graham_recipe_ebc_batch(batch: RecipeBatch, volume: ArrayLike, efficiency: ArrayLike = 0.75) -> np.ndarray:
+    """Vectorized `graham_recipe_ebc`, returns the EBC of each recipe"""
+    return batch.sum_grists(graham_grist_ebc_in_solution_batch(batch, volume, efficiency))
@@ -1,7 +1,10 @@
 from typing import Optional, List
 
+import numpy as np
+
 from brew_maths.calc.original_gravity import original_gravity_points
-from brew_maths.recipe_objects.grist import GristRecipe
+from brew_maths.recipe_objects.batch import RecipeBatch, ArrayLike
+from brew_maths.recipe_objects.grist import AnyGristRecipe
 
 
 def apply_attenuation(fermentability: Optional[float], attenuation: float) -> float:
@@ -14,7 +17,7 @@ def apply_attenuation(fermentability: Optional[float], attenuation: float) -> fl
     return fermentability if fermentability is not None else attenuation
 
 
-def final_gravity(grists: List[GristRecipe], volume: float, efficiency: float = 0.75, attenuation: float = 0.62):
+def final_gravity(grists: List[AnyGristRecipe], volume: float, efficiency: float = 0.75, attenuation: float = 0.62):
     """Returns final gravity in brewer's degrees"""
     a = sum(
         apply_attenuation(grist.fermentability, attenuation)
@@ -31,3 +34,15 @@ def final_gravity(grists: List[GristRecipe], volume: float, efficiency: float =
         for grist in grists
     )
     return (b - (a * 0.225)) / volume
+
+
+def final_gravity_batch(batch: RecipeBatch, volume: ArrayLike, efficiency: ArrayLike = 0.75,
+                        attenuation: ArrayLike = 0.62) -> np.ndarray:
+    """Vectorized `final_gravity`, returns the final gravity of each recipe in brewer's degrees"""
+    fermentability = np.where(np.isnan(batch.grist_fermentability), batch.per_grist(attenuation),
+                              batch.grist_fermentability)
+    mass_kg = batch.grist_mass / 1000
+    eff = np.where(batch.grist_mashable, batch.per_grist(efficiency), 1)
+    a = batch.sum_grists(fermentability * mass_kg * batch.grist_extract * eff)
+    b = batch.sum_grists((1 - fermentability) * mass_kg * batch.grist_extract * eff)
+    return (b - (a * 0.225)) / volume
@@ -0,0 +1,153 @@
+"""
+A registry of the models available for each quantity, so that a model can be chosen (or swapped) by name
+
+    FORMULAS.evaluate('abv', 1.050, 1.010, model='ritchie')   # scalar implementation
+    FORMULAS.evaluate('abv', og_array, fg_array)              # batch kernel of the default model (www)
+    abv = FORMULAS.function('abv')                            # follows FORMULAS.set_default('abv', ...)
+    FORMULAS.compare('abv', og_array, fg_array)               # {'www': ..., 'ritchie': ..., 'gov_uk': ...}
+
+New models are added with `FORMULAS.register('ibu', 'rager', rager_ibu, rager_ibu_batch)`. A model without a batch
+kernel still accepts arrays, its scalar implementation is called element by element.
+"""
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from brew_maths.calc.abv import www_alcohol_by_volume, ritchie_abv, gov_uk_abv_full, gov_uk_abv_full_batch
+from brew_maths.calc.ebc import graham_recipe_ebc, graham_recipe_ebc_batch
+from brew_maths.calc.final_gravity import final_gravity, final_gravity_batch
+from brew_maths.calc.hop_bitterness import hop_ibu, hop_ibu_batch
+from brew_maths.calc.hop_util import utilization, utilization_batch
+from brew_maths.calc.original_gravity import original_gravity, original_gravity_batch
+from brew_maths.calc.srm import philip_lee_srm_to_rgb, philip_lee_srm_to_rgb_batch
+from brew_maths.recipe_objects.batch import RecipeBatch
+
+
+class Formula(NamedTuple):
+    quantity: str
+    model: str
+    scalar: Callable
+    batch: Optional[Callable] = None  # takes arrays (or a RecipeBatch) in place of the scalar's arguments
+    description: Optional[str] = None
+
+
+def is_batch_input(value: Any) -> bool:
+    """Whether an argument should be handled by a batch kernel"""
+    return isinstance(value, RecipeBatch) or (isinstance(value, np.ndarray) and value.ndim > 0)
+
+
+class FormulaRegistry:
+    """Formulas by quantity (i.e. 'abv') and model name (i.e. 'ritchie')
+
+    The first model registered for a quantity is its default, until `set_default` is called
+    """
+
+    def __init__(self):
+        self._formulas: Dict[str, Dict[str, Formula]] = {}
+        self._defaults: Dict[str, str] = {}
+
+    def register(self, quantity: str, model: str, scalar: Callable, batch: Optional[Callable] = None,
+                 description: Optional[str] = None, replace: bool = False) -> Formula:
+        """
+        :param scalar: The implementation for single values
+        :param batch: An optional vectorized kernel with the same arguments, as arrays (or a RecipeBatch)
+        :param replace: Allow replacing a model already registered, otherwise a ValueError is raised
+        """
+        models = self._formulas.setdefault(quantity, {})
+        if model in models and not replace:
+            raise ValueError(f"{quantity} already has a model called {model!r}")
+        formula = Formula(quantity, model, scalar, batch, description)
+        models[model] = formula
+        self._defaults.setdefault(quantity, model)
+        return formula
+
+    def unregister(self, quantity: str, model: str):
+        del self._models(quantity)[model]
+        if self._defaults[quantity] == model:
+            remaining = self._formulas[quantity]
+            if remaining:
+                self._defaults[quantity] = next(iter(remaining))
+            else:
+                del self._defaults[quantity], self._formulas[quantity]
+
+    def _models(self, quantity: str) -> Dict[str, Formula]:
+        if quantity not in self._formulas:
+            raise KeyError(f"No formulas for {quantity!r}, expected one of {', '.join(sorted(self._formulas))}")
+        return self._formulas[quantity]
+
+    def quantities(self) -> List[str]:
+        return list(self._formulas)
+
+    def models(self, quantity: str) -> Dict[str, Formula]:
+        """The formulas of a quantity by model name, in the order registered"""
+        return dict(self._models(quantity))
+
+    def default(self, quantity: str) -> str:
+        self._models(quantity)
+        return self._defaults[quantity]
+
+    def set_default(self, quantity: str, model: str):
+        self.formula(quantity, model)
+        self._defaults[quantity] = model
+
+    def formula(self, quantity: str, model: Optional[str] = None) -> Formula:
+        models = self._models(quantity)
+        model = self._defaults[quantity] if model is None else model
+        if model not in models:
+            raise KeyError(f"No {quantity} model {model!r}, expected one of {', '.join(models)}")
+        return models[model]
+
+    def evaluate(self, quantity: str, *args, model: Optional[str] = None, **kwargs) -> Any:
+        """Calls a model (the default if not given), using its batch kernel if any argument is an array or batch"""
+        formula = self.formula(quantity, model)
+        if not any(is_batch_input(value) for value in (*args, *kwargs.values())):
+            return formula.scalar(*args, **kwargs)
+        if formula.batch is not None:
+            return formula.batch(*args, **kwargs)
+        if any(isinstance(value, RecipeBatch) for value in (*args, *kwargs.values())):
+            raise TypeError(f"The {quantity} model {formula.model!r} has no batch kernel to take a RecipeBatch")
+        return np.vectorize(formula.scalar)(*args, **kwargs)
+
+    def function(self, quantity: str, model: Optional[str] = None) -> Callable:
+        """A callable for a quantity. Without a model it follows the default, so `set_default` swaps it everywhere"""
+
+        def evaluate(*args, **kwargs):
+            return self.evaluate(quantity, *args, model=model, **kwargs)
+
+        evaluate.__name__ = f'{quantity}_{model or "default"}'
+        return evaluate
+
+    def compare(self, quantity: str, *args, models: Optional[List[str]] = None, **kwargs) -> Dict[str, Any]:
+        """Evaluates every model of a quantity (or those given) over the same inputs, by model name
+
+        Each model is called once, with the whole dataset, so array inputs go through the batch kernels
+        """
+        models = list(self._models(quantity)) if models is None else models
+        return {model: self.evaluate(quantity, *args, model=model, **kwargs) for model in models}
+
+
+FORMULAS = FormulaRegistry()
+
+# Every ABV model takes the original and final gravity in full (i.e. 1.045), so they can be swapped and compared
+FORMULAS.register('abv', 'www', www_alcohol_by_volume, www_alcohol_by_volume,
+                  "Wheeler's Wort Works, takes the original and final gravity in full (i.e. 1.045)")
+FORMULAS.register('abv', 'ritchie', ritchie_abv, ritchie_abv,
+                  "Ritchie Products Ltd, takes the original and final gravity in full (i.e. 1.045)")
+FORMULAS.register('abv', 'gov_uk', gov_uk_abv_full, gov_uk_abv_full_batch,
+                  "HMRC excise notice 226, takes the original and final gravity in full (i.e. 1.045), falls back to "
+                  "ritchie outside of its table")
+FORMULAS.register('original_gravity', 'wheeler', original_gravity, original_gravity_batch,
+                  "Graham Wheeler's extract method, in brewer's degrees")
+FORMULAS.register('final_gravity', 'wheeler', final_gravity, final_gravity_batch,
+                  "Graham Wheeler's attenuation method, in brewer's degrees")
+FORMULAS.register('ebc', 'graham', graham_recipe_ebc, graham_recipe_ebc_batch,
+                  "Graham Wheeler's colour in solution")
+FORMULAS.register('hop_utilization', 'tinseth', utilization, utilization_batch,
+                  "f(G) x f(T), see `brew_maths.calc.hop_util`")
+FORMULAS.register('ibu', 'tinseth', hop_ibu, hop_ibu_batch,
+                  "IBUs of a hop (or of every hop of a batch) from the tinseth utilization")
+FORMULAS.register('srm_rgb', 'philip_lee', philip_lee_srm_to_rgb, philip_lee_srm_to_rgb_batch,
+                  "The (r, g, b) colour of an SRM")
+
+# The batch kernel of every ABV model, by name, each takes arrays of the original and final gravity in full
+ABV_FORMULAS = {model: formula.batch for model, formula in FORMULAS.models('abv').items() if formula.batch is not None}
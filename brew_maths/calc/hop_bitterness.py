@@ -1,8 +1,14 @@
-from brew_maths.calc.hop_util import utilization
-from brew_maths.recipe_objects.hop import HopRecipe
+from typing import List, Optional
 
+import numpy as np
 
-def hop_ibu(hop: HopRecipe, volume: float, boil_gravity: float) -> float:
+from brew_maths.calc.hop_util import utilization, utilization_batch, time_factor, UtilizationTable
+from brew_maths.calc.util import exact_power
+from brew_maths.recipe_objects.batch import RecipeBatch, ArrayLike
+from brew_maths.recipe_objects.hop import AnyHopRecipe
+
+
+def hop_ibu(hop: AnyHopRecipe, volume: float, boil_gravity: float) -> float:
     """
 
     Source: http://www.backtoschoolbrewing.com/blog/2016/9/5/how-to-calculate-ibus
@@ -15,3 +21,121 @@ def hop_ibu(hop: HopRecipe, volume: float, boil_gravity: float) -> float:
     correction = 1 + (boil_gravity - 1.05) / 2 if boil_gravity > 1.050 else 1
 
     return (hop.mass * hop.alpha * utilization(hop, boil_gravity) * 1000) / (volume * correction)
+
+
+def hop_ibu_per_gram(hop: AnyHopRecipe, volume: float, boil_gravity: float) -> float:
+    """The IBUs each gram of a hop adds, `hop_ibu` is linear in mass so hop_ibu = mass * hop_ibu_per_gram"""
+    correction = 1 + (boil_gravity - 1.05) / 2 if boil_gravity > 1.050 else 1
+
+    return (hop.alpha * utilization(hop, boil_gravity) * 1000) / (volume * correction)
+
+
+def hop_masses_for_ibu(hops: List[AnyHopRecipe], fractions: List[Optional[float]], target_ibu: float,
+                       volume: float, boil_gravity: float) -> List[float]:
+    """Calculates the mass of each hop addition needed to hit a target bitterness, the inverse of `hop_ibu`
+
+    Hops with a fraction of None keep their current mass, the rest of the bitterness is then shared between the other
+    hops by their fractions.
+
+    :param hops: The hop schedule (alpha and time are used)
+    :param fractions: The fraction of the bitterness each hop should contribute (normalised so they sum to 1), or
+                      None to keep the hop's mass fixed
+    :param target_ibu: The IBUs of the whole schedule
+    :param volume: The target volume of the beer
+    :param boil_gravity: The original gravity, calculated using the boil_volume (i.e. 1.050)
+    :return: The mass of each hop in grams
+    """
+    if len(hops) != len(fractions):
+        raise ValueError(f"{len(hops)} hops but {len(fractions)} fractions")
+    ibu_per_gram = [hop_ibu_per_gram(hop, volume, boil_gravity) for hop in hops]
+    fixed_ibu = sum(hop.mass * per_gram for hop, fraction, per_gram in zip(hops, fractions, ibu_per_gram)
+                    if fraction is None)
+    remaining_ibu = target_ibu - fixed_ibu
+    if remaining_ibu < 0:
+        raise ValueError(f"the fixed hops already give {fixed_ibu} IBUs, more than the target of {target_ibu}")
+    total = sum(fraction for fraction in fractions if fraction is not None)
+    if remaining_ibu > 0 and total <= 0:
+        raise ValueError(f"{remaining_ibu} IBUs are still needed, but no hop has a fraction")
+
+    masses = []
+    for hop, fraction, per_gram in zip(hops, fractions, ibu_per_gram):
+        if fraction is None:
+            masses.append(hop.mass)
+        elif not fraction:
+            masses.append(0.0)
+        elif per_gram <= 0:
+            raise ValueError(f"{hop} adds no bitterness (is its time 0?), so cannot contribute a fraction")
+        else:
+            masses.append(fraction / total * remaining_ibu / per_gram)
+    return masses
+
+
+def hop_ibu_batch(batch: RecipeBatch, volume: ArrayLike, boil_gravity: ArrayLike) -> np.ndarray:
+    """Vectorized `hop_ibu`, returns the IBUs of every hop in the batch
+
+    :param volume: Either one for all recipes or one per recipe
+    :param boil_gravity: Either one for all recipes or one per recipe
+    """
+    hop_boil_gravity = batch.per_hop(boil_gravity)
+    correction = np.where(hop_boil_gravity > 1.050, 1 + (hop_boil_gravity - 1.05) / 2, 1)
+
+    return (batch.hop_mass * batch.hop_alpha * utilization_batch(batch, boil_gravity) * 1000) / (
+            batch.per_hop(volume) * correction)
+
+
+def hop_masses_for_ibu_batch(batch: RecipeBatch, fractions: np.ndarray, target_ibu: ArrayLike, volume: ArrayLike,
+                             boil_gravity: ArrayLike) -> np.ndarray:
+    """Vectorized `hop_masses_for_ibu`, solving every recipe of the batch at once
+
+    Recipes that cannot be solved get negative, NaN or infinite masses rather than raising.
+
+    :param fractions: The fraction of its recipe's bitterness each hop of the batch should contribute, NaN keeps the
+                      hop's mass fixed
+    :param target_ibu: Either one for all recipes or one per recipe
+    :return: The mass of every hop in the batch in grams
+    """
+    fractions = np.asarray(fractions, dtype=float)
+    fixed = np.isnan(fractions)
+    hop_boil_gravity = batch.per_hop(boil_gravity)
+    correction = np.where(hop_boil_gravity > 1.050, 1 + (hop_boil_gravity - 1.05) / 2, 1)
+    ibu_per_gram = (batch.hop_alpha * utilization_batch(batch, boil_gravity) * 1000) / (batch.per_hop(volume) *
+                                                                                        correction)
+
+    remaining_ibu = target_ibu - batch.sum_hops(np.where(fixed, batch.hop_mass * ibu_per_gram, 0))
+    fractions = np.where(fixed, 0, fractions)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = fractions / batch.sum_hops(fractions)[batch.hop_recipe]
+        masses = np.where(shares == 0, 0.0, shares * remaining_ibu[batch.hop_recipe] / ibu_per_gram)
+    return np.where(fixed, batch.hop_mass, masses)
+
+
+def recipe_ibu_batch(batch: RecipeBatch, volume: ArrayLike, boil_gravity: ArrayLike) -> np.ndarray:
+    """Returns the total IBUs of each recipe (the sum of `hop_ibu` over its hops)"""
+    return batch.sum_hops(hop_ibu_batch(batch, volume, boil_gravity))
+
+
+def schedule_ibu(hops: List[AnyHopRecipe], volume: float, boil_gravities: ArrayLike,
+                 table: Optional[UtilizationTable] = None) -> np.ndarray:
+    """The total IBUs of a hop schedule at many boil gravities
+
+    f(G) is calculated once per boil gravity, and f(T) once per distinct boil time. Without a table the results are
+    identical to summing `hop_ibu` over the hops.
+
+    :param hops: The hop schedule
+    :param volume: The target volume of the beer
+    :param boil_gravities: The boil gravities (i.e. 1.050) to calculate the IBUs at
+    :param table: If given, f(G) is interpolated from the table rather than calculated exactly
+    :return: The IBUs of the whole schedule at each boil gravity
+    """
+    boil_gravities = np.asarray(boil_gravities, dtype=float)
+    if table is not None:
+        fG = table.gravity_factor(boil_gravities)
+    else:
+        fG = 1.65 * exact_power(0.000125, boil_gravities - 1)
+    correction = np.where(boil_gravities > 1.050, 1 + (boil_gravities - 1.05) / 2, 1)
+    divisor = volume * correction
+
+    ibu = np.zeros_like(boil_gravities)
+    for hop in hops:
+        ibu = ibu + (hop.mass * hop.alpha * (fG * time_factor(hop.time)) * 1000) / divisor
+    return ibu
@@ -1,9 +1,14 @@
 import math
+from functools import lru_cache
 
-from brew_maths.recipe_objects.hop import HopRecipe
+import numpy as np
 
+from brew_maths.calc.util import exact_power
+from brew_maths.recipe_objects.batch import RecipeBatch, ArrayLike
+from brew_maths.recipe_objects.hop import AnyHopRecipe
 
-def utilization(hop: HopRecipe, boil_gravity: float):
+
+def utilization(hop: AnyHopRecipe, boil_gravity: float):
     """
     Utilization = f(G) x f(T)
     f(G) = 1.65 x 0.000125^(Gb - 1)
@@ -14,6 +19,73 @@ def utilization(hop: HopRecipe, boil_gravity: float):
     :param boil_gravity: Boil gravity, i.e. 1.045
     :return: The utilization rate, i.e. 0.69 = 69%
     """
-    fG = 1.65 * (0.000125 ** (boil_gravity - 1))
-    fT = (1 - math.e ** (-0.04 * hop.time)) / 4.15
+    return gravity_factor(boil_gravity) * time_factor(hop.time)
+
+
+def gravity_factor(boil_gravity: float) -> float:
+    """f(G) = 1.65 x 0.000125^(Gb - 1)"""
+    return 1.65 * (0.000125 ** (boil_gravity - 1))
+
+
+@lru_cache(maxsize=None)
+def _cached_time_factor(time: int) -> float:
+    return (1 - math.e ** (-0.04 * time)) / 4.15
+
+
+def time_factor(time: float) -> float:
+    """f(T) = [1 - e^(-0.04 x T)] / 4.15
+
+    Whole minute boil times (nearly every hop addition) are memoized, so are only ever calculated once
+    """
+    if float(time).is_integer():
+        return _cached_time_factor(int(time))
+    return (1 - math.e ** (-0.04 * time)) / 4.15
+
+
+class UtilizationTable:
+    """Linearly interpolated f(G) over an evenly spaced grid of boil gravities
+
+    f(G) is exponential in Gb, so with k = ln(0.000125), linear interpolation over steps of h has a relative error of
+    at most h^2 x k^2 x e^(|k| x h) / 8, that is about 1e-5 (0.001%) with the default step of 0.001.
+    Gravities outside of the grid are calculated exactly.
+
+    :param gravity_min: Lowest boil gravity of the grid, i.e. 1.000
+    :param gravity_max: Highest boil gravity of the grid, i.e. 1.150
+    :param step: Gap between gravities of the grid
+    """
+
+    def __init__(self, gravity_min: float = 1.000, gravity_max: float = 1.150, step: float = 0.001):
+        self.gravity_min = gravity_min
+        self.step = step
+        self.gravities = gravity_min + step * np.arange(round((gravity_max - gravity_min) / step) + 1)
+        self.gravity_max = float(self.gravities[-1])
+        self.gravity_factors = np.array([gravity_factor(gravity) for gravity in self.gravities.tolist()])
+
+    @property
+    def error_bound(self) -> float:
+        """The maximum relative error of `gravity_factor`"""
+        k = math.log(0.000125)
+        return self.step ** 2 * k ** 2 * math.exp(abs(k) * self.step) / 8
+
+    def gravity_factor(self, boil_gravity: ArrayLike) -> ArrayLike:
+        """Interpolated f(G), accepts either a single boil gravity or an array of them"""
+        boil_gravity = np.asarray(boil_gravity, dtype=float)
+        in_grid = (self.gravity_min <= boil_gravity) & (boil_gravity <= self.gravity_max)
+        fG = np.interp(boil_gravity, self.gravities, self.gravity_factors)
+        if not in_grid.all():
+            fG = np.where(in_grid, fG, 1.65 * exact_power(0.000125, boil_gravity - 1))
+        return fG if fG.ndim else float(fG)
+
+    def utilization(self, hop: AnyHopRecipe, boil_gravity: float) -> float:
+        """Interpolated `utilization`"""
+        return self.gravity_factor(boil_gravity) * time_factor(hop.time)
+
+
+def utilization_batch(batch: RecipeBatch, boil_gravity: ArrayLike) -> np.ndarray:
+    """Vectorized `utilization`, returns the utilization of every hop in the batch
+
+    :param boil_gravity: Either one for all recipes or one per recipe
+    """
+    fG = 1.65 * exact_power(0.000125, batch.per_hop(boil_gravity) - 1)
+    fT = (1 - exact_power(math.e, -0.04 * batch.hop_time)) / 4.15
     return fG * fT
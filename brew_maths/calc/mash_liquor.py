@@ -1,10 +1,10 @@
 from typing import List
 
 from brew_maths.calc.util import total_mass_of_mashables
-from brew_maths.recipe_objects.grist import GristRecipe
+from brew_maths.recipe_objects.grist import AnyGristRecipe
 
 
-def mash_liquor(grists: List[GristRecipe], lgr: float = 2.5) -> float:
+def mash_liquor(grists: List[AnyGristRecipe], lgr: float = 2.5) -> float:
     """Source: https://byo.com/article/managing-mash-thickness/
 
     :param grists: The grists to calculate from
@@ -0,0 +1,206 @@
+"""
+Monte Carlo propagation of ingredient and process variation to the OG, FG, ABV, EBC and IBU of a recipe
+
+    result = monte_carlo(recipe, 23, 27, Uncertainty(efficiency=0.03, moisture=1.5, alpha=0.1), seed=42)
+    result.original_gravity.percentiles[97.5]
+
+Each sample is a copy of the recipe with its own efficiency, attenuation, and extract, moisture and alpha for every
+ingredient, drawn from normal distributions centred on the recipe's values (clipped to what is physically possible).
+Samples are evaluated a chunk at a time as one `RecipeBatch`, and only running moments and a histogram are kept
+between chunks, so memory depends on the chunk size rather than the number of samples. The range of each histogram
+is set by the first 1000 samples together, whatever the chunk size.
+
+Moisture is taken to be already accounted for in a grist's extract, so a sample with a moisture `m` (percent)
+scales the extract by (100 - m) / (100 - moisture).
+"""
+from typing import Callable, Dict, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from brew_maths.calc.abv import www_alcohol_by_volume
+from brew_maths.calc.summary import recipe_summary_batch
+from brew_maths.recipe_objects.batch import RecipeBatch, ArrayLike
+from brew_maths.recipe_objects.recipe import Recipe
+
+
+class Uncertainty(NamedTuple):
+    """Standard deviations of the inputs, a value of 0 holds that input fixed"""
+    efficiency: float = 0.0  # absolute, i.e. 0.03 for +/- 3 percentage points
+    attenuation: float = 0.0  # absolute
+    extract: ArrayLike = 0.0  # relative to the extract (i.e. 0.02), one for every grist or one per grist
+    moisture: ArrayLike = 0.0  # percentage points, one for every grist or one per grist
+    alpha: ArrayLike = 0.0  # relative to the alpha acid (i.e. 0.1), one for every hop or one per hop
+
+
+class StatDistribution(NamedTuple):
+    mean: float
+    std: float
+    percentiles: Dict[float, float]  # percent (i.e. 97.5) -> value
+    histogram: np.ndarray  # counts per bin
+    bin_edges: np.ndarray
+    out_of_range: int  # samples beyond the edges, counted in the first or last bin
+
+
+class MonteCarloResult(NamedTuple):
+    samples: int
+    original_gravity: StatDistribution  # brewer's degrees
+    final_gravity: StatDistribution  # brewer's degrees
+    abv: StatDistribution
+    ebc: StatDistribution
+    ibu: StatDistribution
+
+
+STATS = ('original_gravity', 'final_gravity', 'abv', 'ebc', 'ibu')
+
+# Histogram bins kept per bin returned, percentiles are interpolated from these finer bins
+_RESOLUTION = 100
+# Samples that set the histogram ranges
+_PILOT_SAMPLES = 1000
+
+
+class _StreamingStat:
+    """Running mean, variance (merged per chunk, Chan et al.) and a fixed range histogram of one stat"""
+
+    def __init__(self, bins: int):
+        self.bins = bins
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.counts: Optional[np.ndarray] = None
+        self.edges: Optional[np.ndarray] = None
+        self.out_of_range = 0
+
+    def _set_range(self, values: np.ndarray):
+        # The first values added fix the range, with half their span again either side for the tails
+        low, high = (float(values.min()), float(values.max())) if len(values) else (0.0, 0.0)
+        span = max(high - low, abs(high) * 1e-9, 1e-12)
+        self.edges = np.linspace(low - span / 2, high + span / 2, self.bins * _RESOLUTION + 1)
+        self.counts = np.zeros(self.bins * _RESOLUTION, dtype=np.int64)
+
+    def add(self, values: np.ndarray):
+        values = values[np.isfinite(values)]
+        if self.edges is None:
+            self._set_range(values)
+        if not len(values):
+            return
+        count = len(values)
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+        outside = (values < self.edges[0]) | (values > self.edges[-1])
+        self.out_of_range += int(outside.sum())
+        index = np.searchsorted(self.edges, np.clip(values, self.edges[0], self.edges[-1]), side='right') - 1
+        self.counts += np.bincount(np.clip(index, 0, len(self.counts) - 1), minlength=len(self.counts))
+
+    def percentile(self, percent: float) -> float:
+        if not self.count:
+            return float('nan')
+        cumulative = np.cumsum(self.counts)
+        rank = percent / 100 * self.count
+        index = min(int(np.searchsorted(cumulative, rank, side='left')), len(self.counts) - 1)
+        before = cumulative[index - 1] if index else 0
+        inside = (rank - before) / self.counts[index] if self.counts[index] else 0
+        return float(self.edges[index] + inside * (self.edges[index + 1] - self.edges[index]))
+
+    def result(self, percentiles: Sequence[float]) -> StatDistribution:
+        return StatDistribution(
+            mean=self.mean if self.count else float('nan'),
+            std=float(np.sqrt(self.m2 / self.count)) if self.count else float('nan'),
+            percentiles={percent: self.percentile(percent) for percent in percentiles},
+            histogram=self.counts.reshape(self.bins, _RESOLUTION).sum(axis=1),
+            bin_edges=self.edges[::_RESOLUTION],
+            out_of_range=self.out_of_range,
+        )
+
+
+def _sample_batch(base: RecipeBatch, count: int, uncertainty: Uncertainty,
+                  rng: np.random.Generator) -> RecipeBatch:
+    """`count` copies of a one recipe batch, with their extracts and alphas drawn"""
+    grists, hops = len(base.grist_mass), len(base.hop_mass)
+    extract = np.tile(base.grist_extract, count)
+    extract_sd = np.tile(np.broadcast_to(np.asarray(uncertainty.extract, dtype=float), (grists,)), count)
+    extract = np.clip(extract * (1 + extract_sd * rng.standard_normal(grists * count)), 0, None)
+
+    moisture = np.tile(base.grist_moisture, count)
+    moisture_sd = np.tile(np.broadcast_to(np.asarray(uncertainty.moisture, dtype=float), (grists,)), count)
+    sampled_moisture = np.clip(moisture + moisture_sd * rng.standard_normal(grists * count), 0, 100)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        extract = np.where(moisture < 100, extract * (100 - sampled_moisture) / (100 - moisture), extract)
+
+    alpha_sd = np.tile(np.broadcast_to(np.asarray(uncertainty.alpha, dtype=float), (hops,)), count)
+    alpha = np.clip(np.tile(base.hop_alpha, count) * (1 + alpha_sd * rng.standard_normal(hops * count)), 0, None)
+
+    return RecipeBatch(
+        grist_ebc=np.tile(base.grist_ebc, count),
+        grist_mashable=np.tile(base.grist_mashable, count),
+        grist_extract=extract,
+        grist_moisture=sampled_moisture,
+        grist_fermentability=np.tile(base.grist_fermentability, count),
+        grist_mass=np.tile(base.grist_mass, count),
+        grist_offsets=np.arange(count + 1) * grists,
+        hop_alpha=alpha,
+        hop_mass=np.tile(base.hop_mass, count),
+        hop_time=np.tile(base.hop_time, count),
+        hop_offsets=np.arange(count + 1) * hops,
+    )
+
+
+def monte_carlo(recipe: Recipe, volume: float, boil_volume: float, uncertainty: Uncertainty,
+                efficiency: float = 0.75, attenuation: float = 0.62, samples: int = 100000, chunk_size: int = 10000,
+                seed: Union[None, int, np.random.Generator] = None, percentiles: Sequence[float] = (2.5, 50, 97.5),
+                bins: int = 50,
+                abv_formula: Callable[[np.ndarray, np.ndarray], np.ndarray] = www_alcohol_by_volume
+                ) -> MonteCarloResult:
+    """Samples the distribution of a recipe's stats
+
+    The same seed and chunk size give the same results.
+
+    :param volume: The target volume in litres
+    :param boil_volume: The boil volume in litres, used for the boil gravity of the hops
+    :param uncertainty: The standard deviation of each input
+    :param efficiency: Mean efficiency
+    :param attenuation: Mean default attenuation, used for grists without a fermentability
+    :param samples: Number of samples to draw
+    :param chunk_size: Samples evaluated at a time
+    :param seed: Seeds the random number generator (or is the generator)
+    :param percentiles: Percentiles to report, interpolated within histogram bins of 1/(100 x bins) of the range
+    :param bins: Bins of the returned histograms
+    :param abv_formula: Takes arrays of original and final gravity in full (i.e. 1.045), for example `ritchie_abv`
+                        or `gov_uk_abv_full_batch`
+    """
+    if samples < 1 or chunk_size < 1:
+        raise ValueError("samples and chunk_size must be at least 1")
+    for field, value in zip(Uncertainty._fields, uncertainty):
+        if np.any(np.asarray(value) < 0):
+            raise ValueError(f"The {field} standard deviation cannot be negative")
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+    base = RecipeBatch.from_recipes([recipe])
+    stats: Tuple[_StreamingStat, ...] = tuple(_StreamingStat(bins) for _ in STATS)
+
+    def sample(count: int) -> Tuple[np.ndarray, ...]:
+        sampled_efficiency = np.clip(rng.normal(efficiency, uncertainty.efficiency, count), 0, 1)
+        sampled_attenuation = np.clip(rng.normal(attenuation, uncertainty.attenuation, count), 0, 1)
+        batch = _sample_batch(base, count, uncertainty, rng)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            summary = recipe_summary_batch(batch, volume, boil_volume, sampled_efficiency, sampled_attenuation,
+                                           abv_formula)
+        return tuple(np.asarray(values, dtype=float) for values in
+                     (summary.original_gravity, summary.final_gravity, summary.abv, summary.ebc, summary.ibu))
+
+    # The first samples are kept until there are enough to fix the histogram ranges, so that the ranges (and so the
+    # percentiles) do not depend on the chunk size
+    pilot = min(_PILOT_SAMPLES, samples)
+    pilot_chunks = [sample(min(chunk_size, pilot - start)) for start in range(0, pilot, chunk_size)]
+    for stat, values in zip(stats, zip(*pilot_chunks)):
+        stat.add(np.concatenate(values))
+
+    for start in range(pilot, samples, chunk_size):
+        for stat, values in zip(stats, sample(min(chunk_size, samples - start))):
+            stat.add(values)
+
+    return MonteCarloResult(samples, *(stat.result(percentiles) for stat in stats))
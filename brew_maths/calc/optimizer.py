@@ -0,0 +1,284 @@
+"""
+Least cost recipes from the ingredients in stock, hitting ranges of OG, FG, EBC and IBU
+
+    grists = [GristStock(pale_malt, cost=1.6), GristStock(crystal, cost=2.4, stock=800, max_percentage=0.1)]
+    hops = [HopStock(challenger, time=90, cost=30), HopStock(goldings, time=15, cost=36, min_percentage=0.3)]
+    targets = RecipeTargets(original_gravity=(44, 46), ebc=(20, 26), ibu=(30, 34))
+    optimized = optimize_recipe(grists, hops, targets, volume=23, boil_volume=27)
+
+The original gravity, final gravity and colour are linear in the grist masses (see `original_gravity_points`,
+`final_gravity` and `graham_grist_ebc_in_solution`), and for a fixed hop schedule and boil gravity the bitterness is
+linear in the hop masses (see `hop_ibu_per_gram`). Each recipe is therefore two small linear programs, solved with
+`linear_program`: the grist bill first, then the hops at the boil gravity of that grist bill.
+
+Stock limits apply to each recipe on its own, `optimize_recipes` re-optimizes many recipes against the stock held.
+"""
+import math
+from typing import Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from brew_maths.calc.final_gravity import apply_attenuation
+from brew_maths.calc.hop_bitterness import hop_ibu_per_gram
+from brew_maths.recipe_objects.grist import Grist, GristDefinition, GristRecipe
+from brew_maths.recipe_objects.hop import Hop, HopDefinition, HopRecipe
+from brew_maths.recipe_objects.recipe import Recipe
+
+Range = Tuple[float, float]
+
+
+class LinearProgramResult(NamedTuple):
+    status: str  # 'optimal', 'infeasible', 'unbounded' or 'iteration_limit'
+    x: Optional[np.ndarray]
+    objective: Optional[float]
+
+
+def _pivot(tableau: np.ndarray, row: int, column: int):
+    pivot_row = tableau[row] / tableau[row, column]
+    tableau -= np.outer(tableau[:, column], pivot_row)
+    tableau[row] = pivot_row
+
+
+def _simplex(tableau: np.ndarray, basis: np.ndarray, columns: int, tolerance: float, max_iterations: int) -> str:
+    """Pivots a tableau (reduced costs in the last row, right hand sides in the last column) to its optimum
+
+    Bland's rule is used for both the entering and leaving variable, so degenerate problems cannot cycle
+    """
+    for _ in range(max_iterations):
+        entering = np.flatnonzero(tableau[-1, :columns] < -tolerance)
+        if not len(entering):
+            return 'optimal'
+        column = entering[0]
+        entries = tableau[:-1, column]
+        positive = entries > tolerance
+        if not positive.any():
+            return 'unbounded'
+        ratios = np.full(len(entries), np.inf)
+        ratios[positive] = tableau[:-1, -1][positive] / entries[positive]
+        ties = np.flatnonzero(ratios <= ratios.min() + tolerance)
+        row = ties[np.argmin(basis[ties])]
+        _pivot(tableau, row, column)
+        basis[row] = column
+    return 'iteration_limit'
+
+
+def linear_program(cost: np.ndarray, a_ub: np.ndarray, b_ub: np.ndarray, tolerance: float = 1e-9,
+                   max_iterations: int = 10000) -> LinearProgramResult:
+    """Minimizes cost @ x, subject to a_ub @ x <= b_ub and x >= 0, with a dense two phase simplex
+
+    Intended for the small problems of `optimize_recipe` (tens of variables and constraints), where building and
+    pivoting a dense tableau in NumPy is fastest.
+
+    :param cost: The cost of each variable
+    :param a_ub: One row of coefficients per constraint
+    :param b_ub: The upper bound of each constraint, negative bounds (i.e. of >= constraints) are allowed
+    """
+    cost = np.asarray(cost, dtype=float)
+    a_ub = np.asarray(a_ub, dtype=float).reshape(-1, len(cost))
+    b_ub = np.asarray(b_ub, dtype=float)
+    rows, variables = a_ub.shape
+    slacks = variables + rows
+
+    # Rows with a negative bound are negated, and start from an artificial variable rather than their slack
+    sign = np.where(b_ub < 0, -1.0, 1.0)
+    artificial_rows = np.flatnonzero(b_ub < 0)
+    tableau = np.zeros((rows + 1, slacks + len(artificial_rows) + 1))
+    tableau[:rows, :variables] = a_ub * sign[:, None]
+    tableau[:rows, variables:slacks] = np.diag(sign)
+    tableau[artificial_rows, slacks + np.arange(len(artificial_rows))] = 1
+    tableau[:rows, -1] = b_ub * sign
+    basis = variables + np.arange(rows)
+    basis[artificial_rows] = slacks + np.arange(len(artificial_rows))
+
+    if len(artificial_rows):
+        # Phase one, minimize the sum of the artificial variables to find a feasible basis
+        tableau[-1] = -tableau[artificial_rows].sum(axis=0)
+        tableau[-1, slacks:-1] = 0
+        status = _simplex(tableau, basis, slacks, tolerance, max_iterations)
+        if status == 'iteration_limit':
+            return LinearProgramResult(status, None, None)
+        if -tableau[-1, -1] > tolerance * max(1.0, np.abs(b_ub).max()):
+            return LinearProgramResult('infeasible', None, None)
+        # Artificial variables left in the basis (at 0) are swapped out, or their rows are redundant
+        keep = np.ones(rows + 1, dtype=bool)
+        for row in np.flatnonzero(basis >= slacks):
+            candidates = np.flatnonzero(np.abs(tableau[row, :slacks]) > tolerance)
+            if len(candidates):
+                _pivot(tableau, row, candidates[0])
+                basis[row] = candidates[0]
+            else:
+                keep[row] = False
+        tableau = np.delete(tableau[keep], np.s_[slacks:-1], axis=1)
+        basis = basis[keep[:-1]]
+
+    # Phase two, the reduced costs of the real objective
+    tableau[-1] = 0
+    tableau[-1, :variables] = cost
+    for row, column in enumerate(basis):
+        if column < variables:
+            tableau[-1] -= cost[column] * tableau[row]
+    status = _simplex(tableau, basis, slacks, tolerance, max_iterations)
+    if status != 'optimal':
+        return LinearProgramResult(status, None, None)
+
+    x = np.zeros(variables)
+    in_basis = basis < variables
+    x[basis[in_basis]] = tableau[:-1, -1][in_basis]
+    x = np.maximum(x, 0)
+    return LinearProgramResult(status, x, float(cost @ x))
+
+
+class GristStock(NamedTuple):
+    grist: Union[Grist, GristDefinition]
+    cost: float  # per kg
+    stock: float = math.inf  # grams held
+    min_percentage: float = 0.0  # fractional, of the grist bill by mass
+    max_percentage: float = 1.0
+
+
+class HopStock(NamedTuple):
+    hop: Union[Hop, HopDefinition]
+    time: float  # minutes, the addition of the schedule this hop is used for
+    cost: float  # per kg
+    stock: float = math.inf  # grams held
+    min_percentage: float = 0.0  # fractional, of the hop schedule by mass
+    max_percentage: float = 1.0
+
+
+class RecipeTargets(NamedTuple):
+    """Inclusive (min, max) ranges, None leaves a stat free"""
+    original_gravity: Optional[Range] = None  # brewer's degrees
+    final_gravity: Optional[Range] = None  # brewer's degrees
+    ebc: Optional[Range] = None
+    ibu: Optional[Range] = None
+
+
+class OptimizedRecipe(NamedTuple):
+    recipe: Recipe  # only the ingredients used
+    cost: float
+    grist_masses: np.ndarray  # grams, one per GristStock (including those not used)
+    hop_masses: np.ndarray  # grams, one per HopStock
+
+
+class RecipeSpec(NamedTuple):
+    """The arguments of `optimize_recipe`, for `optimize_recipes`"""
+    grists: Sequence[GristStock]
+    hops: Sequence[HopStock]
+    targets: RecipeTargets
+    volume: float
+    boil_volume: float
+    efficiency: float = 0.75
+    attenuation: float = 0.62
+
+
+def _constraints(coefficients: np.ndarray, target: Optional[Range]) -> List[Tuple[np.ndarray, float]]:
+    """The <= rows keeping coefficients @ x within a target range"""
+    if target is None:
+        return []
+    low, high = target
+    return [(-coefficients, -low), (coefficients, high)]
+
+
+def _percentage_constraints(minimum: np.ndarray, maximum: np.ndarray) -> List[Tuple[np.ndarray, float]]:
+    """The <= rows keeping each variable between a fraction of their total"""
+    constraints = []
+    for index, (low, high) in enumerate(zip(minimum.tolist(), maximum.tolist())):
+        unit = np.zeros(len(minimum))
+        unit[index] = 1
+        if low > 0:
+            constraints.append((low - unit, 0.0))
+        if high < 1:
+            constraints.append((unit - high, 0.0))
+    return constraints
+
+
+def _solve(cost: np.ndarray, constraints: List[Tuple[np.ndarray, float]], stock: np.ndarray, stage: str) -> np.ndarray:
+    finite = np.isfinite(stock)
+    constraints = constraints + [(row, limit) for row, limit in zip(np.eye(len(cost))[finite], stock[finite])]
+    if not constraints:
+        return np.zeros(len(cost))
+    a_ub, b_ub = zip(*constraints)
+    result = linear_program(cost, np.array(a_ub), np.array(b_ub))
+    if result.status != 'optimal':
+        raise ValueError(f"The {stage} is {result.status}, no amount of the ingredients in stock meets the targets")
+    return result.x
+
+
+def optimize_recipe(grists: Sequence[GristStock], hops: Sequence[HopStock], targets: RecipeTargets, volume: float,
+                    boil_volume: float, efficiency: float = 0.75, attenuation: float = 0.62) -> OptimizedRecipe:
+    """The cheapest recipe of the grists and hops given that meets the targets
+
+    The grist bill is the cheapest meeting the OG, FG and EBC targets, the hops are then the cheapest meeting the IBU
+    target at its boil gravity.
+
+    :param volume: The target volume in litres
+    :param boil_volume: The boil volume in litres, used for the boil gravity of the hops
+    :param efficiency: Percentage efficiency (true extract vs experimental extract multiplier)
+    :param attenuation: The default attenuation, used for grists without a fermentability
+    :raises ValueError: If the targets cannot be met, i.e. a grist or hop is out of stock
+    """
+    # Grist masses are solved in kg, so the coefficients are all of a similar size
+    eff = np.array([efficiency if stock.grist.mashable else 1 for stock in grists], dtype=float)
+    points = np.array([stock.grist.extract for stock in grists], dtype=float) * eff
+    fermentability = np.array([apply_attenuation(stock.grist.fermentability, attenuation) for stock in grists],
+                              dtype=float)
+    ebc = np.array([stock.grist.ebc for stock in grists], dtype=float) * eff * 10
+    grist_mass = _solve(
+        np.array([stock.cost for stock in grists], dtype=float),
+        _constraints(points / volume, targets.original_gravity)
+        + _constraints(points * (1 - 1.225 * fermentability) / volume, targets.final_gravity)
+        + _constraints(ebc / volume, targets.ebc)
+        + _percentage_constraints(np.array([stock.min_percentage for stock in grists], dtype=float),
+                                  np.array([stock.max_percentage for stock in grists], dtype=float)),
+        np.array([stock.stock for stock in grists], dtype=float) / 1000,
+        'grist bill',
+    ) * 1000
+
+    boil_gravity = (1000 + float(points @ grist_mass) / 1000 / boil_volume) / 1000
+    hop_recipes = [HopRecipe(stock.hop.alpha, stock.hop.metadata, 0, stock.time) for stock in hops]
+    hop_mass = _solve(
+        np.array([stock.cost for stock in hops], dtype=float) / 1000,
+        _constraints(np.array([hop_ibu_per_gram(hop, volume, boil_gravity) for hop in hop_recipes], dtype=float),
+                     targets.ibu)
+        + _percentage_constraints(np.array([stock.min_percentage for stock in hops], dtype=float),
+                                  np.array([stock.max_percentage for stock in hops], dtype=float)),
+        np.array([stock.stock for stock in hops], dtype=float),
+        'hop schedule',
+    )
+
+    recipe_grists = [
+        GristRecipe(stock.grist.ebc, stock.grist.mashable, stock.grist.extract, stock.grist.moisture,
+                    stock.grist.fermentability, stock.grist.metadata, mass)
+        for stock, mass in zip(grists, grist_mass.tolist()) if mass > 0
+    ]
+    for hop, mass in zip(hop_recipes, hop_mass.tolist()):
+        hop.mass = mass
+    cost = sum(stock.cost * mass / 1000 for stock, mass in zip((*grists, *hops), (*grist_mass, *hop_mass)))
+    return OptimizedRecipe(Recipe(recipe_grists, [hop for hop in hop_recipes if hop.mass > 0]), float(cost),
+                           grist_mass, hop_mass)
+
+
+def _name(ingredient: Union[Grist, GristDefinition, Hop, HopDefinition]) -> Optional[str]:
+    metadata = ingredient.metadata
+    return metadata.name if metadata is not None else None
+
+
+def optimize_recipes(specs: Iterable[RecipeSpec],
+                     stock: Optional[Mapping[str, float]] = None) -> List[Optional[OptimizedRecipe]]:
+    """Re-optimizes many recipes, i.e. after the stock has changed
+
+    :param stock: Grams held by ingredient name, replacing the stock of every GristStock and HopStock of that name
+    :return: The optimized recipe of each spec, or None where the targets cannot be met
+    """
+    optimized = []
+    for spec in specs:
+        if stock:
+            spec = spec._replace(
+                grists=[item._replace(stock=stock.get(_name(item.grist), item.stock)) for item in spec.grists],
+                hops=[item._replace(stock=stock.get(_name(item.hop), item.stock)) for item in spec.hops],
+            )
+        try:
+            optimized.append(optimize_recipe(*spec))
+        except ValueError:
+            optimized.append(None)
+    return optimized
@@ -1,9 +1,12 @@
 from typing import List
 
-from brew_maths.recipe_objects.grist import GristRecipe
+import numpy as np
 
+from brew_maths.recipe_objects.batch import RecipeBatch, ArrayLike
+from brew_maths.recipe_objects.grist import AnyGristRecipe
 
-def original_gravity_points(grist: GristRecipe, efficiency: float = 0.75):
+
+def original_gravity_points(grist: AnyGristRecipe, efficiency: float = 0.75):
     """Calculates the `points` for the original_gravity calc (alongside efficiency)
 
     In Graham Wheeler's Home Brewing, this value is referred to as the `brewer's degrees`
@@ -12,7 +15,7 @@ def original_gravity_points(grist: GristRecipe, efficiency: float = 0.75):
     return (grist.extract * mass_kg) * (efficiency if grist.mashable else 1)
 
 
-def original_gravity(grists: List[GristRecipe], volume: float, efficiency: float = 0.75) -> float:
+def original_gravity(grists: List[AnyGristRecipe], volume: float, efficiency: float = 0.75) -> float:
     """Calculates the original gravity of a recipe
 
     :param grists: The grains used
@@ -24,11 +27,92 @@ def original_gravity(grists: List[GristRecipe], volume: float, efficiency: float
     return points / volume
 
 
-def individual_gravity(grist: GristRecipe, volume: float, efficiency: float = 0.75) -> float:
+def individual_gravity(grist: AnyGristRecipe, volume: float, efficiency: float = 0.75) -> float:
     """
     :return: The gravity of a grist in non 1000 form (i.e. 2.7 instead of 1002.7)
     """
     return original_gravity_points(grist, efficiency) / volume
 
-# TODO: Add a system for calculating percentage + orig_grav -> mass
-# https://github.com/jimbob88/wheelers-wort-works/blob/master/beer_engine.py#L1066
+
+def original_gravity_points_batch(batch: RecipeBatch, efficiency: ArrayLike = 0.75) -> np.ndarray:
+    """Vectorized `original_gravity_points`, returns the points of every grist in the batch"""
+    mass_kg = batch.grist_mass / 1000
+    return (batch.grist_extract * mass_kg) * np.where(batch.grist_mashable, batch.per_grist(efficiency), 1)
+
+
+def original_gravity_batch(batch: RecipeBatch, volume: ArrayLike, efficiency: ArrayLike = 0.75) -> np.ndarray:
+    """Vectorized `original_gravity`
+
+    :param volume: The target volume in litres, either one for all recipes or one per recipe
+    :param efficiency: Either one for all recipes or one per recipe
+    :return: The original gravity of each recipe in brewer's degrees
+    """
+    return batch.sum_grists(original_gravity_points_batch(batch, efficiency)) / volume
+
+
+PERCENTAGE_BASES = {'mass', 'extract'}
+
+
+def masses_for_original_gravity(grists: List[AnyGristRecipe], percentages: List[float], target_gravity: float,
+                                volume: float, efficiency: float = 0.75, by: str = 'mass') -> List[float]:
+    """Calculates the mass of each grist needed to hit an original gravity, the inverse of `original_gravity`
+
+    Based on WWW's percentage + orig_grav -> mass system
+    https://github.com/jimbob88/wheelers-wort-works/blob/master/beer_engine.py#L1066
+
+    :param grists: The grains used (their masses are ignored)
+    :param percentages: The fractional percentage of each grist (normalised so they sum to 1)
+    :param target_gravity: The original gravity in brewer's degrees
+    :param volume: The target volume in litres
+    :param efficiency: Percentage efficiency (true extract vs experimental extract multiplier)
+    :param by: 'mass' if the percentages are of the total mass, or 'extract' if they are of the total gravity
+    :return: The mass of each grist in grams
+    """
+    if by not in PERCENTAGE_BASES:
+        raise ValueError(f"by must be one of {sorted(PERCENTAGE_BASES)}, not {by!r}")
+    if len(grists) != len(percentages):
+        raise ValueError(f"{len(grists)} grists but {len(percentages)} percentages")
+    total = sum(percentages)
+    if total <= 0:
+        raise ValueError("percentages must sum to more than 0")
+
+    points = target_gravity * volume
+    # points per gram of each grist
+    yields = [grist.extract / 1000 * (efficiency if grist.mashable else 1) for grist in grists]
+    if by == 'extract':
+        if any(percentage and not grist_yield for percentage, grist_yield in zip(percentages, yields)):
+            raise ValueError("a grist without any extract cannot make up a percentage of the extract")
+        return [percentage / total * points / grist_yield if percentage else 0.0
+                for percentage, grist_yield in zip(percentages, yields)]
+
+    points_per_gram = sum(percentage / total * grist_yield for percentage, grist_yield in zip(percentages, yields))
+    if points_per_gram <= 0:
+        raise ValueError("the grists have no extract")
+    total_mass = points / points_per_gram
+    return [percentage / total * total_mass for percentage in percentages]
+
+
+def masses_for_original_gravity_batch(batch: RecipeBatch, percentages: np.ndarray, target_gravity: ArrayLike,
+                                      volume: ArrayLike, efficiency: ArrayLike = 0.75,
+                                      by: str = 'mass') -> np.ndarray:
+    """Vectorized `masses_for_original_gravity`, solving every recipe of the batch at once
+
+    Recipes that cannot be solved (no extract) get NaN or infinite masses rather than raising.
+
+    :param percentages: The fractional percentage of every grist in the batch (normalised per recipe)
+    :param target_gravity: Either one for all recipes or one per recipe, in brewer's degrees
+    :param volume: Either one for all recipes or one per recipe
+    :param efficiency: Either one for all recipes or one per recipe
+    :return: The mass of every grist in the batch, in grams
+    """
+    if by not in PERCENTAGE_BASES:
+        raise ValueError(f"by must be one of {sorted(PERCENTAGE_BASES)}, not {by!r}")
+    percentages = np.asarray(percentages, dtype=float)
+    points = batch.per_grist(np.multiply(target_gravity, volume))
+    yields = batch.grist_extract / 1000 * np.where(batch.grist_mashable, batch.per_grist(efficiency), 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fractions = percentages / batch.sum_grists(percentages)[batch.grist_recipe]
+        if by == 'extract':
+            return np.where(fractions == 0, 0.0, fractions * points / yields)
+        points_per_gram = batch.sum_grists(fractions * yields)[batch.grist_recipe]
+        return fractions * points / points_per_gram
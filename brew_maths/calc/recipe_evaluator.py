@@ -0,0 +1,196 @@
+from typing import List
+
+from brew_maths.calc.hop_util import time_factor
+from brew_maths.recipe_objects.grist import AnyGristRecipe
+from brew_maths.recipe_objects.hop import AnyHopRecipe
+from brew_maths.recipe_objects.recipe import Recipe
+
+
+class RecipeEvaluator:
+    """Keeps the stats of a recipe up to date as its ingredients are edited
+
+    Rather than re-summing every grist and hop whenever one changes, running totals are kept, and each edit removes
+    the old contribution of an ingredient and adds its new one. Every total is independent of volume, efficiency
+    and attenuation, so those can also be changed freely.
+
+    Ingredients must be edited through the evaluator (`add_grist`, `update_grist`, ...), changes made directly to the
+    recipe will not be seen until `refresh` is called. Running totals pick up floating point error over many edits,
+    `refresh` also re-sums them from scratch.
+
+    :param volume: The target volume in litres
+    :param boil_volume: The boil volume in litres (used for the boil gravity, and so hop utilization)
+    :param efficiency: Percentage efficiency (true extract vs experimental extract multiplier)
+    :param attenuation: The default attenuation, used for grists without a fermentability
+    :param lgr: The Liquor to Grist Ratio
+    """
+
+    def __init__(self, recipe: Recipe, volume: float, boil_volume: float, efficiency: float = 0.75,
+                 attenuation: float = 0.62, lgr: float = 2.5):
+        self.recipe = recipe
+        self.volume = volume
+        self.boil_volume = boil_volume
+        self.efficiency = efficiency
+        self.attenuation = attenuation
+        self.lgr = lgr
+        self.refresh()
+
+    def refresh(self):
+        """Re-sums every running total from the recipe"""
+        # Each total is split by mashability, as only mashable grists have efficiency applied
+        self._extract_attenuated = [0.0, 0.0]  # extract * kg of grists using the default attenuation
+        self._extract_fixed = [0.0, 0.0]  # extract * kg of grists with their own fermentability
+        self._extract_fermentable = [0.0, 0.0]  # fermentability * extract * kg of grists with their own fermentability
+        self._ebc_mass = [0.0, 0.0]  # ebc * kg
+        self._mass = [0.0, 0.0]  # grams
+        self._hop_potential = 0.0  # mass * alpha * f(T), summed over every hop
+        for grist in self.recipe.grists:
+            self._apply_grist(grist, 1)
+        for hop in self.recipe.hops:
+            self._hop_potential += self._potential(hop)
+
+    def _apply_grist(self, grist: AnyGristRecipe, sign: int):
+        mashable = int(bool(grist.mashable))
+        mass_kg = grist.mass / 1000
+        extract = grist.extract * mass_kg
+        if grist.fermentability is None:
+            self._extract_attenuated[mashable] += sign * extract
+        else:
+            self._extract_fixed[mashable] += sign * extract
+            self._extract_fermentable[mashable] += sign * grist.fermentability * extract
+        self._ebc_mass[mashable] += sign * grist.ebc * mass_kg
+        self._mass[mashable] += sign * grist.mass
+
+    @staticmethod
+    def _potential(hop: AnyHopRecipe) -> float:
+        """The part of `hop_ibu` that does not depend on the rest of the recipe"""
+        return hop.mass * hop.alpha * time_factor(hop.time)
+
+    def add_grist(self, grist: AnyGristRecipe):
+        self.recipe.grists.append(grist)
+        self._apply_grist(grist, 1)
+
+    def remove_grist(self, index: int) -> AnyGristRecipe:
+        grist = self.recipe.grists.pop(index)
+        self._apply_grist(grist, -1)
+        return grist
+
+    @staticmethod
+    def _check_fields(ingredient, changes):
+        for field in changes:
+            if not hasattr(ingredient, field):
+                raise AttributeError(f"{type(ingredient).__name__} has no field {field!r}")
+
+    def update_grist(self, index: int, **changes):
+        """Sets the given fields of a grist, i.e. `update_grist(0, mass=4500)`"""
+        grist = self.recipe.grists[index]
+        self._check_fields(grist, changes)
+        self._apply_grist(grist, -1)
+        try:
+            for field, value in changes.items():
+                setattr(grist, field, value)
+        finally:
+            # The totals stay right even if a field could not be set
+            self._apply_grist(grist, 1)
+
+    def add_hop(self, hop: AnyHopRecipe):
+        self.recipe.hops.append(hop)
+        self._hop_potential += self._potential(hop)
+
+    def remove_hop(self, index: int) -> AnyHopRecipe:
+        hop = self.recipe.hops.pop(index)
+        self._hop_potential -= self._potential(hop)
+        return hop
+
+    def update_hop(self, index: int, **changes):
+        """Sets the given fields of a hop, i.e. `update_hop(0, time=60)`"""
+        hop = self.recipe.hops[index]
+        self._check_fields(hop, changes)
+        self._hop_potential -= self._potential(hop)
+        try:
+            for field, value in changes.items():
+                setattr(hop, field, value)
+        finally:
+            self._hop_potential += self._potential(hop)
+
+    def _efficiencies(self) -> List[float]:
+        """The efficiency applied to [non mashable, mashable] grists"""
+        return [1, self.efficiency]
+
+    @property
+    def points(self) -> float:
+        """The total extract points (see `original_gravity_points`)"""
+        return sum(
+            (attenuated + fixed) * eff
+            for attenuated, fixed, eff in zip(self._extract_attenuated, self._extract_fixed, self._efficiencies())
+        )
+
+    @property
+    def fermentable_points(self) -> float:
+        return sum(
+            (self.attenuation * attenuated + fermentable) * eff
+            for attenuated, fermentable, eff in zip(self._extract_attenuated, self._extract_fermentable,
+                                                    self._efficiencies())
+        )
+
+    @property
+    def unfermentable_points(self) -> float:
+        return sum(
+            ((1 - self.attenuation) * attenuated + fixed - fermentable) * eff
+            for attenuated, fixed, fermentable, eff in zip(self._extract_attenuated, self._extract_fixed,
+                                                           self._extract_fermentable, self._efficiencies())
+        )
+
+    @property
+    def original_gravity(self) -> float:
+        """The original gravity in brewer's degrees"""
+        return self.points / self.volume
+
+    @property
+    def boil_gravity(self) -> float:
+        """The boil gravity in brewer's degrees"""
+        return self.points / self.boil_volume
+
+    @property
+    def final_gravity(self) -> float:
+        """The final gravity in brewer's degrees"""
+        return (self.unfermentable_points - (self.fermentable_points * 0.225)) / self.volume
+
+    @property
+    def ebc(self) -> float:
+        """The colour of the recipe, see `graham_recipe_ebc`"""
+        ebc_mass = self._ebc_mass[0] + self._ebc_mass[1] * self.efficiency
+        return (ebc_mass * 10) / self.volume
+
+    @property
+    def total_mass(self) -> float:
+        """The total mass of the grists in grams"""
+        return self._mass[0] + self._mass[1]
+
+    @property
+    def mashable_mass(self) -> float:
+        """The total mass of the mashable grists in grams"""
+        return self._mass[1]
+
+    @property
+    def mash_liquor(self) -> float:
+        return self._mass[1] / 1000 * self.lgr
+
+    def percentage_by_mass(self, index: int) -> float:
+        """The fractional percentage by mass of a grist (see `percentage_by_mass`)"""
+        return self.recipe.grists[index].mass / self.total_mass
+
+    def _ibu_per_potential(self) -> float:
+        """Everything in `hop_ibu` that depends on the boil gravity and volume"""
+        boil_gravity = 1 + self.boil_gravity / 1000
+        correction = 1 + (boil_gravity - 1.05) / 2 if boil_gravity > 1.050 else 1
+        fG = 1.65 * (0.000125 ** (boil_gravity - 1))
+        return (fG * 1000) / (self.volume * correction)
+
+    def hop_ibu(self, index: int) -> float:
+        """The IBUs of an individual hop"""
+        return self._potential(self.recipe.hops[index]) * self._ibu_per_potential()
+
+    @property
+    def ibu(self) -> float:
+        """The IBUs of every hop combined"""
+        return self._hop_potential * self._ibu_per_potential()
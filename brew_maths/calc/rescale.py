@@ -0,0 +1,110 @@
+"""
+Scales recipes from one kit to another, keeping the original gravity, colour and bitterness the same
+
+Mashable grists are scaled by the change in volume and efficiency. Non mashable grists (the `NON_MASHABLES`, malt
+extracts and copper sugars, which have `mashable=False`) skip the mash, so are scaled by the change in volume only.
+This keeps every grist's share of the gravity (and colour), so the final gravity also stays the same.
+
+Hops are scaled by the change in volume, and by the change in utilization and gravity correction caused by the new
+boil gravity (the same gravity in a different boil volume), which keeps the IBU of every hop the same.
+"""
+import dataclasses
+from typing import List, Sequence, Tuple, Union
+
+import numpy as np
+
+from brew_maths.calc.hop_util import gravity_factor
+from brew_maths.calc.original_gravity import original_gravity_points_batch
+from brew_maths.recipe_objects.batch import RecipeBatch, ArrayLike
+from brew_maths.recipe_objects.equipment import EquipmentProfile
+from brew_maths.recipe_objects.grist import GristLine
+from brew_maths.recipe_objects.hop import HopLine
+from brew_maths.recipe_objects.recipe import Recipe
+
+Profiles = Union[EquipmentProfile, Sequence[EquipmentProfile]]
+
+
+def _stack(profiles: Profiles) -> EquipmentProfile:
+    """One profile of per recipe arrays from a list of profiles, a single profile is used as is"""
+    if isinstance(profiles, EquipmentProfile):
+        return profiles
+    volume, efficiency, boil_off, _ = zip(*profiles)
+    return EquipmentProfile(np.array(volume, dtype=float), np.array(efficiency, dtype=float),
+                            np.array(boil_off, dtype=float))
+
+
+def _bitterness_per_gram(boil_gravity: ArrayLike, volume: ArrayLike) -> ArrayLike:
+    """The part of `hop_ibu` that depends on the kit, f(G) / (volume * correction)"""
+    correction = np.where(boil_gravity > 1.050, 1 + (boil_gravity - 1.05) / 2, 1)
+    return gravity_factor(boil_gravity) / (volume * correction)
+
+
+def rescale_factors_batch(batch: RecipeBatch, source: Profiles, target: Profiles) -> Tuple[np.ndarray, np.ndarray]:
+    """The factor each grist and hop mass is multiplied by to move the recipes of a batch between kits
+
+    :param source: The kit the recipes were written for, either one for all recipes or one per recipe
+    :param target: The kit to scale to, either one for all recipes or one per recipe
+    :return: The factor of every grist, and of every hop
+    """
+    source, target = _stack(source), _stack(target)
+    volume_ratio = np.asarray(target.volume / np.asarray(source.volume, dtype=float), dtype=float)
+    efficiency_ratio = np.asarray(source.efficiency / np.asarray(target.efficiency, dtype=float), dtype=float)
+    grist_factor = batch.per_grist(volume_ratio) * np.where(batch.grist_mashable, batch.per_grist(efficiency_ratio), 1)
+
+    # Same original gravity, so the boil gravity only changes with the ratio of target to boil volume
+    with np.errstate(divide='ignore', invalid='ignore'):
+        original_gravity = batch.sum_grists(original_gravity_points_batch(batch, source.efficiency)) / source.volume
+    source_boil_gravity = (1000 + original_gravity * source.volume / source.boil_volume) / 1000
+    target_boil_gravity = (1000 + original_gravity * target.volume / target.boil_volume) / 1000
+    hop_ratio = _bitterness_per_gram(source_boil_gravity, source.volume) / \
+        _bitterness_per_gram(target_boil_gravity, target.volume)
+    return grist_factor, batch.per_hop(hop_ratio)
+
+
+def rescale_batch(batch: RecipeBatch, source: Profiles, target: Profiles) -> RecipeBatch:
+    """Vectorized `rescale`, returns a copy of the batch with the grist and hop masses scaled
+
+    :param source: The kit the recipes were written for, either one for all recipes or one per recipe
+    :param target: The kit to scale to, either one for all recipes or one per recipe
+    """
+    grist_factor, hop_factor = rescale_factors_batch(batch, source, target)
+    return dataclasses.replace(batch, grist_mass=batch.grist_mass * grist_factor, hop_mass=batch.hop_mass * hop_factor)
+
+
+def _with_mass(item, mass: float):
+    if isinstance(item, GristLine):
+        return GristLine(item.grist, mass)
+    if isinstance(item, HopLine):
+        return HopLine(item.hop, mass, item.time)
+    return dataclasses.replace(item, mass=mass)
+
+
+def rescale_recipes(recipes: Sequence[Recipe], source: Profiles, target: Profiles) -> List[Recipe]:
+    """Rescales many recipes in one vectorized pass, keeping their ingredients (and metadata)
+
+    To scale one recipe onto several kits, repeat it: `rescale_recipes([recipe] * len(kits), kit, kits)`
+
+    :param source: The kit the recipes were written for, either one for all recipes or one per recipe
+    :param target: The kit to scale to, either one for all recipes or one per recipe
+    """
+    batch = RecipeBatch.from_recipes(recipes)
+    grist_factor, hop_factor = rescale_factors_batch(batch, source, target)
+    grist_masses = (batch.grist_mass * grist_factor).tolist()
+    hop_masses = (batch.hop_mass * hop_factor).tolist()
+    grist_masses.reverse()
+    hop_masses.reverse()
+    return [
+        Recipe(grists=[_with_mass(grist, grist_masses.pop()) for grist in recipe.grists],
+               hops=[_with_mass(hop, hop_masses.pop()) for hop in recipe.hops])
+        for recipe in recipes
+    ]
+
+
+def rescale(recipe: Recipe, source: EquipmentProfile, target: EquipmentProfile) -> Recipe:
+    """Scales a recipe written for one kit to another, keeping its OG, EBC and IBU
+
+    :param source: The kit the recipe was written for
+    :param target: The kit to scale to
+    :return: A new recipe, with the same ingredients in different masses
+    """
+    return rescale_recipes([recipe], source, target)[0]
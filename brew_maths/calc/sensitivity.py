@@ -0,0 +1,169 @@
+"""
+Exact gradients of the OG, FG, ABV, EBC and IBU of a recipe, with respect to every grist mass, hop mass and hop time,
+the efficiency and the attenuation
+
+    sensitivity = recipe_sensitivity(recipe, 23, 27)
+    sensitivity.ebc.grist_mass[1] * 100   # EBC added by 100g more of the second grist (exact, EBC is linear in mass)
+    sensitivity.ibu.efficiency * 0.05     # IBU change from 5 more points of efficiency (first order)
+
+The gravities and colour are linear in the grist masses, and the bitterness is a closed form of the boil gravity, so
+the values and every derivative are found in one pass, rather than by finite differences of each input. The IBU
+depends on the grists through the boil gravity (f(G) and the gravity correction), which is included. At a boil
+gravity of exactly 1.050 the correction has a kink, the derivative below it is used.
+
+The ABV is the `www_alcohol_by_volume` of the original and final gravity, as in `recipe_summary`.
+"""
+import math
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from brew_maths.calc.abv import www_alcohol_by_volume
+from brew_maths.calc.hop_bitterness import hop_ibu_batch
+from brew_maths.calc import hop_util
+from brew_maths.calc.util import exact_power
+from brew_maths.recipe_objects.batch import RecipeBatch, ArrayLike
+from brew_maths.recipe_objects.recipe import Recipe
+
+
+class StatSensitivity(NamedTuple):
+    """A stat and its partial derivatives, either of one recipe or of every recipe in a batch"""
+    value: ArrayLike  # per recipe
+    grist_mass: np.ndarray  # per gram, for every grist
+    hop_mass: np.ndarray  # per gram, for every hop
+    hop_time: np.ndarray  # per minute, for every hop
+    efficiency: ArrayLike  # per recipe, per unit of efficiency (i.e. 1.0 = 100%)
+    attenuation: ArrayLike  # per recipe, per unit of attenuation
+
+
+class RecipeSensitivity(NamedTuple):
+    original_gravity: StatSensitivity  # brewer's degrees
+    final_gravity: StatSensitivity  # brewer's degrees
+    abv: StatSensitivity
+    ebc: StatSensitivity
+    ibu: StatSensitivity
+
+
+def _stat(batch: RecipeBatch, value: np.ndarray, grist_mass: Optional[np.ndarray] = None,
+          hop_mass: Optional[np.ndarray] = None, hop_time: Optional[np.ndarray] = None,
+          efficiency: Optional[np.ndarray] = None, attenuation: Optional[np.ndarray] = None) -> StatSensitivity:
+    """A StatSensitivity with zeros for the inputs the stat does not depend on"""
+    def zeros(values: Optional[np.ndarray], shape) -> np.ndarray:
+        return np.zeros(shape) if values is None else np.broadcast_to(values, shape).astype(float)
+
+    return StatSensitivity(
+        value=value,
+        grist_mass=zeros(grist_mass, batch.grist_mass.shape),
+        hop_mass=zeros(hop_mass, batch.hop_mass.shape),
+        hop_time=zeros(hop_time, batch.hop_time.shape),
+        efficiency=zeros(efficiency, value.shape),
+        attenuation=zeros(attenuation, value.shape),
+    )
+
+
+def _combine(batch: RecipeBatch, first: StatSensitivity, first_scale: np.ndarray, second: StatSensitivity,
+             second_scale: np.ndarray, value: np.ndarray) -> StatSensitivity:
+    """The chain rule for a stat of two others, scaled by its per recipe partial derivative of each"""
+    grist_first, grist_second = batch.per_grist(first_scale), batch.per_grist(second_scale)
+    hop_first, hop_second = batch.per_hop(first_scale), batch.per_hop(second_scale)
+    return StatSensitivity(
+        value=value,
+        grist_mass=grist_first * first.grist_mass + grist_second * second.grist_mass,
+        hop_mass=hop_first * first.hop_mass + hop_second * second.hop_mass,
+        hop_time=hop_first * first.hop_time + hop_second * second.hop_time,
+        efficiency=first_scale * first.efficiency + second_scale * second.efficiency,
+        attenuation=first_scale * first.attenuation + second_scale * second.attenuation,
+    )
+
+
+def recipe_sensitivity_batch(batch: RecipeBatch, volume: ArrayLike, boil_volume: Optional[ArrayLike] = None,
+                             efficiency: ArrayLike = 0.75, attenuation: ArrayLike = 0.62) -> RecipeSensitivity:
+    """Vectorized `recipe_sensitivity`, the stats and gradients of every recipe in a batch
+
+    Derivatives by grist or hop are flat columns in the order of the batch (like `batch.grist_mass`), the values and
+    the derivatives by efficiency and attenuation have one entry per recipe.
+
+    :param volume: Either one for all recipes or one per recipe
+    :param boil_volume: Either one for all recipes or one per recipe, defaults to the volume
+    :param efficiency: Either one for all recipes or one per recipe
+    :param attenuation: Either one for all recipes or one per recipe
+    """
+    boil_volume = volume if boil_volume is None else boil_volume
+    volume_per_recipe = np.broadcast_to(np.asarray(volume, dtype=float), (len(batch),))
+    grist_volume = batch.per_grist(volume)
+    mashable = batch.grist_mashable
+    eff = np.where(mashable, batch.per_grist(efficiency), 1)
+    fermentability = np.where(np.isnan(batch.grist_fermentability), batch.per_grist(attenuation),
+                              batch.grist_fermentability)
+
+    # Points per gram, and per unit of efficiency (mashables only)
+    points_per_gram = batch.grist_extract * eff / 1000
+    points_per_efficiency = np.where(mashable, batch.grist_extract * batch.grist_mass / 1000, 0)
+    points = batch.sum_grists(points_per_gram * batch.grist_mass)
+    og = _stat(batch, points / volume_per_recipe,
+               grist_mass=points_per_gram / grist_volume,
+               efficiency=batch.sum_grists(points_per_efficiency) / volume)
+
+    # FG = sum of points x (1 - 1.225 x fermentability) / volume
+    unfermented = 1 - 1.225 * fermentability
+    fg = _stat(batch, batch.sum_grists(points_per_gram * batch.grist_mass * unfermented) / volume_per_recipe,
+               grist_mass=points_per_gram * unfermented / grist_volume,
+               efficiency=batch.sum_grists(points_per_efficiency * unfermented) / volume,
+               attenuation=batch.sum_grists(np.where(np.isnan(batch.grist_fermentability),
+                                                     -1.225 * points_per_gram * batch.grist_mass, 0)) / volume)
+
+    # ABV = 1.05 x (og - fg) / fg / 0.79 x 100, with og and fg in full
+    og_full, fg_full = (1000 + og.value) / 1000, (1000 + fg.value) / 1000
+    scale = 1.05 / 0.79 * 100 / 1000
+    abv = _combine(batch, og, scale / fg_full, fg, -scale * og_full / fg_full ** 2,
+                   www_alcohol_by_volume(og_full, fg_full))
+
+    ebc_per_gram = batch.grist_ebc * eff * 10 / 1000 / grist_volume
+    ebc = _stat(batch, batch.sum_grists(ebc_per_gram * batch.grist_mass),
+                grist_mass=ebc_per_gram,
+                efficiency=batch.sum_grists(np.where(mashable, batch.grist_ebc * batch.grist_mass * 10 / 1000, 0)) /
+                volume)
+
+    # IBU = sum of mass x alpha x f(G) x f(T) x 1000 / (volume x correction), boil gravity = 1 + points / boil volume
+    boil_gravity = (1000 + points / boil_volume) / 1000
+    hop_ibu = hop_ibu_batch(batch, volume, boil_gravity)
+    ibu_value = batch.sum_hops(hop_ibu)
+    correction = np.where(boil_gravity > 1.050, 1 + (boil_gravity - 1.05) / 2, 1)
+    # d ln(f(G) / correction) / d boil gravity
+    log_slope = math.log(0.000125) - np.where(boil_gravity > 1.050, 0.5 / correction, 0)
+    ibu_per_point = ibu_value * log_slope / (1000 * np.asarray(boil_volume, dtype=float))
+    hop_correction = batch.per_hop(correction)
+    ibu_per_hop_gram = (batch.hop_alpha * hop_util.utilization_batch(batch, boil_gravity) * 1000 /
+                        (batch.per_hop(volume) * hop_correction))
+    # d f(T) / d T = 0.04 x e^(-0.04 x T) / 4.15
+    time_slope = 0.04 * exact_power(math.e, -0.04 * batch.hop_time) / 4.15
+    gravity_factor = hop_util.gravity_factor(batch.per_hop(boil_gravity))
+    ibu = _stat(batch, ibu_value,
+                grist_mass=batch.per_grist(ibu_per_point) * points_per_gram,
+                hop_mass=ibu_per_hop_gram,
+                hop_time=batch.hop_mass * batch.hop_alpha * gravity_factor * time_slope * 1000 /
+                (batch.per_hop(volume) * hop_correction),
+                efficiency=ibu_per_point * batch.sum_grists(points_per_efficiency))
+
+    return RecipeSensitivity(og, fg, abv, ebc, ibu)
+
+
+def recipe_sensitivity(recipe: Recipe, volume: float, boil_volume: float, efficiency: float = 0.75,
+                       attenuation: float = 0.62) -> RecipeSensitivity:
+    """The OG, FG, ABV, EBC and IBU of a recipe, each with its exact gradient
+
+    The values are those of `recipe_summary` (to within rounding). The derivatives by grist are in the order of
+    `recipe.grists`, and those by hop in the order of `recipe.hops`.
+
+    :param volume: The target volume in litres
+    :param boil_volume: The boil volume in litres, used for the boil gravity of the hops
+    :param efficiency: Percentage efficiency (true extract vs experimental extract multiplier)
+    :param attenuation: The default attenuation, used for grists without a fermentability
+    """
+    sensitivity = recipe_sensitivity_batch(RecipeBatch.from_recipes([recipe]), volume, boil_volume, efficiency,
+                                           attenuation)
+    return RecipeSensitivity(*(
+        stat._replace(value=float(stat.value[0]), efficiency=float(stat.efficiency[0]),
+                      attenuation=float(stat.attenuation[0]))
+        for stat in sensitivity
+    ))
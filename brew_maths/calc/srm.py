@@ -1,4 +1,24 @@
-from typing import Tuple
+import math
+from typing import Callable, Tuple
+
+import numpy as np
+
+from brew_maths.recipe_objects.batch import ArrayLike
+
+# EBC = SRM x 1.97
+EBC_PER_SRM = 1.97
+# Green of `philip_lee_srm_to_rgb` drops from about 7 to 0 past this SRM
+_GREEN_CUTOFF_SRM = 35
+
+
+def ebc_to_srm(ebc: ArrayLike) -> ArrayLike:
+    """Converts a colour (or an array of colours) from EBC, i.e. of `graham_recipe_ebc`, to SRM"""
+    return np.asarray(ebc, dtype=float) / EBC_PER_SRM
+
+
+def srm_to_ebc(srm: ArrayLike) -> ArrayLike:
+    """Converts a colour (or an array of colours) from SRM to EBC"""
+    return np.asarray(srm, dtype=float) * EBC_PER_SRM
 
 
 def force_rgb_range(value: float, lower_bound: float = 0, upper_bound: float = 255):
@@ -6,6 +26,11 @@ def force_rgb_range(value: float, lower_bound: float = 0, upper_bound: float = 2
     return upper_bound if value > upper_bound else max(value, lower_bound)
 
 
+def force_rgb_range_batch(values: np.ndarray, lower_bound: float = 0, upper_bound: float = 255) -> np.ndarray:
+    """Vectorized `force_rgb_range`"""
+    return np.clip(values, lower_bound, upper_bound)
+
+
 def philip_lee_srm_to_rgb(srm: float) -> Tuple[float, float, float]:
     """
     Source: https://github.com/Brewtarget/brewtarget/blob/develop/src/Algorithms.cpp#L272 (22/12/2022)
@@ -15,7 +40,7 @@ def philip_lee_srm_to_rgb(srm: float) -> Tuple[float, float, float]:
     red = 0.5 + (272.098 - 5.80255 * srm)
     red = min(red, 253)
 
-    green = 0 if srm > 35 else 0.5 + (2.41975e2 - 1.3314e1 * srm + 1.881895e-1 * srm * srm)
+    green = 0 if srm > _GREEN_CUTOFF_SRM else 0.5 + (2.41975e2 - 1.3314e1 * srm + 1.881895e-1 * srm * srm)
 
     blue = 0.5 + (179.3 - 28.7 * srm)
 
@@ -24,3 +49,84 @@ def philip_lee_srm_to_rgb(srm: float) -> Tuple[float, float, float]:
         force_rgb_range(green),
         force_rgb_range(blue)
     )
+
+
+def philip_lee_srm_to_rgb_batch(srm: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Vectorized `philip_lee_srm_to_rgb`, returns arrays of (red, green, blue) the same shape as the SRMs"""
+    srm = np.asarray(srm, dtype=float)
+    red = np.minimum(0.5 + (272.098 - 5.80255 * srm), 253)
+    green = np.where(srm > _GREEN_CUTOFF_SRM, 0, 0.5 + (2.41975e2 - 1.3314e1 * srm + 1.881895e-1 * srm * srm))
+    blue = 0.5 + (179.3 - 28.7 * srm)
+    return force_rgb_range_batch(red), force_rgb_range_batch(green), force_rgb_range_batch(blue)
+
+
+def pack_rgb(red: ArrayLike, green: ArrayLike, blue: ArrayLike) -> np.ndarray:
+    """Packs rgb values into 0xRRGGBB integers
+
+    The +0.5 of `philip_lee_srm_to_rgb` is for rounding, so the values are truncated
+    """
+    channels = [force_rgb_range_batch(np.asarray(value, dtype=float)).astype(np.uint32)
+                for value in (red, green, blue)]
+    return (channels[0] << 16) | (channels[1] << 8) | channels[2]
+
+
+_HEX_DIGITS = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+
+
+def rgb_to_hex(packed: np.ndarray) -> np.ndarray:
+    """Formats packed 0xRRGGBB integers (see `pack_rgb`) as '#rrggbb' strings"""
+    packed = np.asarray(packed, dtype=np.uint32)
+    characters = np.empty((packed.size, 7), dtype=np.uint8)
+    characters[:, 0] = ord('#')
+    for digit in range(6):
+        characters[:, digit + 1] = _HEX_DIGITS[(packed.ravel() >> (20 - 4 * digit)) & 0xF]
+    return characters.view('S7').reshape(packed.shape).astype('U7')
+
+
+class ColourPalette:
+    """`philip_lee_srm_to_rgb` precomputed over an evenly spaced grid of SRMs, for constant time lookups
+
+    Colours are taken from the nearest point of the grid, so with a step of h the channels are at most 28.7 x h / 2
+    from those calculated exactly (blue changes the fastest, 28.7 per SRM). Green jumps to 0 past SRM 35, so a colour
+    is instead taken from the nearest point on its own side of 35, at most h away (where only red changes, by 5.8 per
+    SRM). Colours past the end of the grid are calculated exactly, and negative colours are taken as 0. NaN has no
+    colour, so raises a ValueError.
+
+    :param srm_max: Largest SRM of the grid, lower colours start from 0. Every channel is constant from about SRM 47,
+                    so with the default grid every colour is looked up
+    :param step: Gap between SRMs of the grid
+    """
+
+    def __init__(self, srm_max: float = 50.0, step: float = 0.1):
+        self.step = step
+        self.srms = step * np.arange(math.ceil(round(srm_max / step, 9)) + 1)
+        self.srm_max = float(self.srms[-1])
+        self.packed_colours = pack_rgb(*philip_lee_srm_to_rgb_batch(self.srms))
+        self.hex_colours = rgb_to_hex(self.packed_colours)
+
+    def _lookup(self, colours: np.ndarray, srm: ArrayLike, exact: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+        srm = np.asarray(srm, dtype=float)
+        if np.isnan(srm).any():
+            raise ValueError("An SRM of NaN has no colour")
+        index = np.clip(np.rint(srm / self.step), 0, len(self.srms) - 1).astype(np.intp)
+        # Never across the jump in green
+        above, grid_above = srm > _GREEN_CUTOFF_SRM, self.srms[index] > _GREEN_CUTOFF_SRM
+        index = np.clip(index + (above & ~grid_above) - (~above & grid_above), 0, len(self.srms) - 1)
+        found = np.array(colours[index])
+        beyond = srm > self.srm_max
+        if beyond.any():
+            found[beyond] = exact(srm[beyond])
+        return found
+
+    def packed(self, srm: ArrayLike) -> np.ndarray:
+        """The 0xRRGGBB colour of each SRM"""
+        return self._lookup(self.packed_colours, srm, lambda srms: pack_rgb(*philip_lee_srm_to_rgb_batch(srms)))
+
+    def hex(self, srm: ArrayLike) -> np.ndarray:
+        """The '#rrggbb' colour of each SRM"""
+        return self._lookup(self.hex_colours, srm,
+                            lambda srms: rgb_to_hex(pack_rgb(*philip_lee_srm_to_rgb_batch(srms))))
+
+    def from_ebc(self, ebc: ArrayLike) -> np.ndarray:
+        """The '#rrggbb' colour of each EBC, i.e. of `graham_recipe_ebc_batch`"""
+        return self.hex(ebc_to_srm(ebc))
@@ -0,0 +1,108 @@
+from typing import Callable, NamedTuple, Tuple, Optional
+
+import numpy as np
+
+from brew_maths.calc.abv import www_alcohol_by_volume
+from brew_maths.calc.ebc import graham_recipe_ebc_batch
+from brew_maths.calc.final_gravity import apply_attenuation, final_gravity_batch
+from brew_maths.calc.hop_bitterness import hop_ibu, recipe_ibu_batch
+from brew_maths.calc.original_gravity import original_gravity_points_batch
+from brew_maths.recipe_objects.batch import RecipeBatch, ArrayLike
+from brew_maths.recipe_objects.recipe import Recipe
+
+
+class RecipeSummary(NamedTuple):
+    original_gravity: float  # brewer's degrees
+    boil_gravity: float  # brewer's degrees
+    final_gravity: float  # brewer's degrees
+    abv: float
+    ebc: float
+    ibu: float
+    mash_liquor: float  # litres
+    total_mass: float  # grams
+    percentages_by_mass: Tuple[float, ...]  # fractional, in the same order as the grists
+
+
+def recipe_summary(recipe: Recipe, volume: float, boil_volume: float, efficiency: float = 0.75,
+                   attenuation: float = 0.62, lgr: float = 2.5,
+                   abv_formula: Callable[[float, float], float] = www_alcohol_by_volume) -> RecipeSummary:
+    """Calculates every stat of a recipe, walking the grists and hops once
+
+    The results are the same as calling `original_gravity`, `boil_gravity`, `final_gravity`, `graham_recipe_ebc`,
+    `hop_ibu`, `mash_liquor`, `total_mass` and `percentage_by_mass` separately.
+
+    :param volume: The target volume in litres
+    :param boil_volume: The boil volume in litres, used for the boil gravity of the hops
+    :param efficiency: Percentage efficiency (true extract vs experimental extract multiplier)
+    :param attenuation: The default attenuation, used for grists without a fermentability
+    :param lgr: The Liquor to Grist Ratio
+    :param abv_formula: Takes the original and final gravity in full (i.e. 1.045), for example `ritchie_abv` or
+                        `gov_uk_abv_full`
+    """
+    points = fermentable = unfermentable = ebc = mass = mashable_mass = 0
+    for grist in recipe.grists:
+        mass_kg = grist.mass / 1000
+        eff = efficiency if grist.mashable else 1
+        grist_points = (grist.extract * mass_kg) * eff
+        grist_attenuation = apply_attenuation(grist.fermentability, attenuation)
+
+        points += grist_points
+        fermentable += grist_attenuation * mass_kg * grist.extract * eff
+        unfermentable += (1 - grist_attenuation) * mass_kg * grist.extract * eff
+        ebc += (grist.ebc * mass_kg * eff * 10) / volume
+        mass += grist.mass
+        if grist.mashable:
+            mashable_mass += grist.mass
+
+    og = points / volume
+    bg = points / boil_volume
+    fg = (unfermentable - (fermentable * 0.225)) / volume
+    boil_gravity_full = (1000 + bg) / 1000
+
+    return RecipeSummary(
+        original_gravity=og,
+        boil_gravity=bg,
+        final_gravity=fg,
+        abv=abv_formula((1000 + og) / 1000, (1000 + fg) / 1000),
+        ebc=ebc,
+        ibu=sum(hop_ibu(hop, volume, boil_gravity_full) for hop in recipe.hops),
+        mash_liquor=mashable_mass / 1000 * lgr,
+        total_mass=mass,
+        percentages_by_mass=tuple(grist.mass / mass for grist in recipe.grists),
+    )
+
+
+class RecipeSummaryBatch(NamedTuple):
+    """Per recipe arrays of the stats in `RecipeSummary`"""
+    original_gravity: np.ndarray  # brewer's degrees
+    boil_gravity: np.ndarray  # brewer's degrees
+    final_gravity: np.ndarray  # brewer's degrees
+    abv: np.ndarray
+    ebc: np.ndarray
+    ibu: np.ndarray
+
+
+def recipe_summary_batch(batch: RecipeBatch, volume: ArrayLike, boil_volume: Optional[ArrayLike] = None,
+                         efficiency: ArrayLike = 0.75, attenuation: ArrayLike = 0.62,
+                         abv_formula: Callable[[np.ndarray, np.ndarray], np.ndarray] = www_alcohol_by_volume
+                         ) -> RecipeSummaryBatch:
+    """Vectorized `recipe_summary` of the gravities, ABV, colour and bitterness of every recipe in a batch
+
+    :param volume: Either one for all recipes or one per recipe
+    :param boil_volume: Either one for all recipes or one per recipe, defaults to the volume
+    :param abv_formula: Takes arrays of original and final gravity in full (i.e. 1.045), for example `ritchie_abv`
+                        or `gov_uk_abv_full_batch`
+    """
+    boil_volume = volume if boil_volume is None else boil_volume
+    points = batch.sum_grists(original_gravity_points_batch(batch, efficiency))
+    og = points / volume
+    bg = points / boil_volume
+    fg = final_gravity_batch(batch, volume, efficiency, attenuation)
+    return RecipeSummaryBatch(
+        original_gravity=og,
+        boil_gravity=bg,
+        final_gravity=fg,
+        abv=abv_formula((1000 + og) / 1000, (1000 + fg) / 1000),
+        ebc=graham_recipe_ebc_batch(batch, volume, efficiency),
+        ibu=recipe_ibu_batch(batch, volume, (1000 + bg) / 1000),
+    )
@@ -0,0 +1,67 @@
+from typing import Callable, Dict, List, NamedTuple, Tuple, Union
+
+import numpy as np
+
+from brew_maths.calc.abv import www_alcohol_by_volume
+from brew_maths.calc.recipe_evaluator import RecipeEvaluator
+from brew_maths.recipe_objects.batch import ArrayLike
+from brew_maths.recipe_objects.grist import AnyGristRecipe
+from brew_maths.recipe_objects.recipe import Recipe
+
+
+class SweepResult(NamedTuple):
+    """Labelled results of a `sweep`, each array has one axis per swept parameter, in the order of `dims`"""
+    dims: Tuple[str, ...]
+    coords: Dict[str, np.ndarray]
+    original_gravity: np.ndarray  # brewer's degrees
+    final_gravity: np.ndarray  # brewer's degrees
+    abv: np.ndarray
+    ebc: np.ndarray
+
+    def index(self, **coords: float) -> Tuple[Union[int, slice], ...]:
+        """The index into the results of the grid point nearest to the given coords, i.e. `index(efficiency=0.7)`"""
+        return tuple(
+            int(np.abs(self.coords[dim] - coords[dim]).argmin()) if dim in coords else slice(None)
+            for dim in self.dims
+        )
+
+
+def sweep(grists: List[AnyGristRecipe], volume: ArrayLike, efficiency: ArrayLike = 0.75,
+          attenuation: ArrayLike = 0.62,
+          abv_formula: Callable[[np.ndarray, np.ndarray], np.ndarray] = www_alcohol_by_volume) -> SweepResult:
+    """Evaluates a grist over a grid of volumes, efficiencies and attenuations
+
+    Each parameter may be a single value, or a 1D array of values to sweep over. The grist is only walked once, the
+    rest is broadcast over the grid. Results agree with `original_gravity`, `final_gravity` and `graham_recipe_ebc`
+    up to floating point rounding.
+
+    :param volume: The target volume(s) in litres
+    :param efficiency: The efficiency (or efficiencies) to sweep
+    :param attenuation: The default attenuation(s) to sweep
+    :param abv_formula: Takes arrays of original and final gravity in full (i.e. 1.045), for example
+                        `ritchie_abv` or `gov_uk_abv_full_batch`
+    """
+    params = {'volume': volume, 'efficiency': efficiency, 'attenuation': attenuation}
+    dims = tuple(name for name, value in params.items() if np.ndim(value))
+    coords = {name: np.asarray(params[name], dtype=float) for name in dims}
+
+    # Give each swept parameter its own axis, so they broadcast against each other
+    for axis, name in enumerate(dims):
+        shape = [1] * len(dims)
+        shape[axis] = -1
+        params[name] = coords[name].reshape(shape)
+
+    evaluator = RecipeEvaluator(Recipe(list(grists), []), volume=params['volume'], boil_volume=params['volume'],
+                                efficiency=params['efficiency'], attenuation=params['attenuation'])
+    shape = tuple(len(coords[name]) for name in dims)
+    og = np.broadcast_to(evaluator.original_gravity, shape)
+    fg = np.broadcast_to(evaluator.final_gravity, shape)
+
+    return SweepResult(
+        dims=dims,
+        coords=coords,
+        original_gravity=og,
+        final_gravity=fg,
+        abv=np.broadcast_to(abv_formula((1000 + og) / 1000, (1000 + fg) / 1000), shape),
+        ebc=np.broadcast_to(evaluator.ebc, shape),
+    )
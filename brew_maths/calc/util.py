@@ -1,24 +1,44 @@
 from typing import List
 
-from brew_maths.recipe_objects.grist import GristRecipe
+import numpy as np
 
+from brew_maths.recipe_objects.grist import AnyGristRecipe
 
-def total_mass(grists: List[GristRecipe]) -> float:
+
+def total_mass(grists: List[AnyGristRecipe]) -> float:
     """Calculates the total mass of a set of grists in grams"""
     return sum(
         grist.mass for grist in grists
     )
 
 
-def total_mass_of_mashables(grists: List[GristRecipe]):
+def total_mass_of_mashables(grists: List[AnyGristRecipe]):
     return sum(
         grist.mass for grist in grists if grist.mashable
     )
 
 
-def percentage_by_mass(grist: GristRecipe, grists: List[GristRecipe]) -> float:
+def percentage_by_mass(grist: AnyGristRecipe, grists: List[AnyGristRecipe]) -> float:
     """Gets the percentage by mass of a grist
 
     This is different from the way WWW calculates percentage (this returns the fractional value)
     """
     return grist.mass / total_mass(grists)
+
+
+def percentages_by_mass(grists: List[AnyGristRecipe]) -> List[float]:
+    """The `percentage_by_mass` of every grist, only summing the total mass once"""
+    mass = total_mass(grists)
+    return [grist.mass / mass for grist in grists]
+
+
+def exact_power(base: float, exponents: np.ndarray) -> np.ndarray:
+    """`base ** exponents` using the same libm `pow` as python floats
+
+    NumPy's SIMD `power` can differ from `float.__pow__` in the last bit, so the batch results would no longer be
+    identical to the scalar ones. Each distinct exponent is evaluated once, and there are usually few of them
+    (boil times, one gravity per recipe).
+    """
+    unique, inverse = np.unique(exponents, return_inverse=True)
+    return np.array([base ** exponent for exponent in unique.tolist()], dtype=float)[inverse].reshape(
+        np.shape(exponents))
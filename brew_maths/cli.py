@@ -0,0 +1,178 @@
+"""
+Batch evaluation of recipes from the command line
+
+    python -m brew_maths recipes.jsonl --workers 8 --output-format csv > results.csv
+
+Each JSONL line is a recipe (see `brew_maths.recipe_objects.serialization`), optionally with an "id", "volume",
+"boil_volume", "efficiency" and "attenuation". In CSV input each row is a grist or hop (the "kind" column), and
+consecutive rows with the same "id" make up one recipe.
+
+Recipes are read lazily and sent to the worker processes a chunk at a time, so only the chunks in flight are ever
+held in memory, and results are written in input order.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+import numpy as np
+
+from brew_maths.calc.formulas import ABV_FORMULAS
+from brew_maths.calc.summary import recipe_summary_batch
+from brew_maths.recipe_objects.batch import RecipeBatch
+from brew_maths.recipe_objects.serialization import recipe_from_dict
+
+RESULT_FIELDS = ['id', 'original_gravity', 'final_gravity', 'abv', 'ebc', 'ibu']
+
+GRIST_FIELDS = ['ebc', 'extract', 'moisture', 'fermentability', 'mass']
+HOP_FIELDS = ['alpha', 'mass', 'time']
+RECIPE_FIELDS = ['volume', 'boil_volume', 'efficiency', 'attenuation']
+
+
+def _csv_value(value: str) -> Optional[float]:
+    return None if value is None or value == '' else float(value)
+
+
+def _csv_bool(value: str) -> bool:
+    return value.strip().lower() in {'1', 'true', 'yes', 'y'}
+
+
+def read_csv_records(file: TextIO) -> Iterator[Dict[str, Any]]:
+    """Groups consecutive CSV rows with the same id into recipe records"""
+    for recipe_id, rows in itertools.groupby(csv.DictReader(file), key=lambda row: row.get('id')):
+        record: Dict[str, Any] = {'id': recipe_id, 'grists': [], 'hops': []}
+        for row in rows:
+            for field in RECIPE_FIELDS:
+                if _csv_value(row.get(field)) is not None:
+                    record[field] = float(row[field])
+            kind = (row.get('kind') or '').strip().lower()
+            if kind == 'grist':
+                grist = {field: _csv_value(row.get(field)) for field in GRIST_FIELDS}
+                grist['mashable'] = _csv_bool(row.get('mashable', ''))
+                grist['name'] = row.get('name') or None
+                record['grists'].append(grist)
+            elif kind == 'hop':
+                hop = {field: _csv_value(row.get(field)) for field in HOP_FIELDS}
+                hop['name'] = row.get('name') or None
+                record['hops'].append(hop)
+            elif kind:
+                raise ValueError(f"Unknown kind {kind!r} for recipe {recipe_id}, expected grist or hop")
+        yield record
+
+
+def read_jsonl_records(file: TextIO) -> Iterator[Dict[str, Any]]:
+    return (json.loads(line) for line in file if line.strip())
+
+
+def read_records(path: str, input_format: Optional[str]) -> Iterator[Dict[str, Any]]:
+    """Reads the records of a file, or stdin for '-'"""
+    if input_format is None:
+        input_format = 'csv' if Path(path).suffix.lower() == '.csv' else 'jsonl'
+    reader = read_csv_records if input_format == 'csv' else read_jsonl_records
+    if path == '-':
+        yield from reader(sys.stdin)
+        return
+    with open(path, newline='', encoding='utf-8') as file:
+        yield from reader(file)
+
+
+def evaluate_records(records: List[Dict[str, Any]], volume: float, efficiency: float, attenuation: float,
+                     abv: str) -> List[Dict[str, Any]]:
+    """Evaluates a chunk of recipe records as one batch, parameters missing from a record fall back to the defaults"""
+    batch = RecipeBatch.from_recipes(recipe_from_dict(record) for record in records)
+    volumes = np.array([record.get('volume', volume) for record in records], dtype=float)
+    summary = recipe_summary_batch(
+        batch,
+        volume=volumes,
+        boil_volume=np.array([record.get('boil_volume', record.get('volume', volume)) for record in records],
+                             dtype=float),
+        efficiency=np.array([record.get('efficiency', efficiency) for record in records], dtype=float),
+        attenuation=np.array([record.get('attenuation', attenuation) for record in records], dtype=float),
+        abv_formula=ABV_FORMULAS[abv],
+    )
+    return [
+        {'id': record.get('id', None), 'original_gravity': og, 'final_gravity': fg, 'abv': alcohol, 'ebc': ebc,
+         'ibu': ibu}
+        for record, og, fg, alcohol, ebc, ibu in zip(records, summary.original_gravity.tolist(),
+                                                     summary.final_gravity.tolist(), summary.abv.tolist(),
+                                                     summary.ebc.tolist(), summary.ibu.tolist())
+    ]
+
+
+def _chunks(records: Iterable[Dict[str, Any]], chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    records = iter(records)
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def evaluate(records: Iterable[Dict[str, Any]], volume: float = 23, efficiency: float = 0.75,
+             attenuation: float = 0.62, abv: str = 'www', chunk_size: int = 10000,
+             workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Evaluates records in chunks across a process pool, yielding results in input order
+
+    Only the chunks in flight (two per worker) are held at once. With a single worker the chunks are evaluated in
+    this process.
+    """
+    chunks = _chunks(records, chunk_size)
+    args = (volume, efficiency, attenuation, abv)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in chunks:
+            yield from evaluate_records(chunk, *args)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(evaluate_records, chunk, *args))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def write_results(results: Iterable[Dict[str, Any]], file: TextIO, output_format: str):
+    if output_format == 'csv':
+        writer = csv.DictWriter(file, fieldnames=RESULT_FIELDS, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(results)
+    else:
+        for result in results:
+            file.write(json.dumps(result) + '\n')
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='brew_maths', description='Evaluate OG, FG, ABV, EBC and IBU of recipes')
+    parser.add_argument('inputs', nargs='*', default=['-'], help='JSONL or CSV files, defaults to stdin')
+    parser.add_argument('--input-format', choices=['jsonl', 'csv'],
+                        help='Defaults to csv for .csv files, jsonl otherwise')
+    parser.add_argument('--output-format', choices=['jsonl', 'csv'], default='jsonl')
+    parser.add_argument('-o', '--output', default='-', help='Defaults to stdout')
+    parser.add_argument('--volume', type=float, default=23, help='Default volume in litres')
+    parser.add_argument('--efficiency', type=float, default=0.75, help='Default efficiency')
+    parser.add_argument('--attenuation', type=float, default=0.62, help='Default attenuation')
+    parser.add_argument('--abv', choices=sorted(ABV_FORMULAS), default='www', help='ABV formula')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='Recipes per chunk sent to a worker')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes, defaults to the CPU count')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    records = itertools.chain.from_iterable(read_records(path, args.input_format) for path in args.inputs)
+    results = evaluate(records, args.volume, args.efficiency, args.attenuation, args.abv, args.chunk_size,
+                       args.workers)
+    if args.output == '-':
+        write_results(results, sys.stdout, args.output_format)
+    else:
+        with open(args.output, 'w', newline='', encoding='utf-8') as file:
+            write_results(results, file, args.output_format)
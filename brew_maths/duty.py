@@ -0,0 +1,174 @@
+"""
+A single pass duty ledger of production records, with strengths from the GOV.UK factor table (Excise Notice 226)
+
+    ledger = DutyLedger(period='month')
+    ledger.extend(record_from_dict(row) for row in csv.DictReader(file))
+    for line in ledger.lines():
+        print(line.period, line.band, line.hectolitres, line.litres_of_alcohol)
+
+Gravities are as written in the notice (i.e. 1045.0). Strengths, volumes and litres of alcohol are rounded by the
+`DutyRules`, and summed as Decimals so totals are exact. Only one running total per (period, band) is held, so a
+brewery's whole history can be streamed through in one pass, i.e. again after a rule change.
+"""
+import datetime
+from decimal import Decimal, ROUND_DOWN
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from brew_maths.calc.abv import gov_uk_abv, find_gov_uk_factor
+
+
+class DutyBand(NamedTuple):
+    name: str
+    abv_min: float  # inclusive
+    abv_max: float  # exclusive
+
+
+# Strength bands from the 2023 alcohol duty reform, drinks at or below 1.2% ABV are not dutiable
+DUTY_BANDS: Tuple[DutyBand, ...] = (
+    DutyBand('not_dutiable', 0, 1.3),
+    DutyBand('below_3.5', 1.3, 3.5),
+    DutyBand('3.5_to_8.4', 3.5, 8.5),
+    DutyBand('8.5_to_22', 8.5, 22.0),
+    DutyBand('22_and_above', 22.0, float('inf')),
+)
+
+
+class DutyRules(NamedTuple):
+    """How strengths and quantities are rounded, and the bands they fall in"""
+    abv_places: int = 1
+    abv_rounding: str = ROUND_DOWN  # a `decimal` rounding mode
+    hectolitre_places: int = 2
+    hectolitre_rounding: str = ROUND_DOWN
+    alcohol_places: int = 2  # litres of alcohol
+    alcohol_rounding: str = ROUND_DOWN
+    bands: Tuple[DutyBand, ...] = DUTY_BANDS
+    sanity_check: bool = True  # see `gov_uk_abv`
+
+
+class ProductionRecord(NamedTuple):
+    date: datetime.date
+    product: str
+    volume: float  # litres
+    original_gravity: float  # as in the notice, i.e. 1045.0
+    present_gravity: float  # as in the notice, i.e. 1010.0
+
+
+class AssessedRecord(NamedTuple):
+    record: ProductionRecord
+    abv: Decimal
+    band: str
+    hectolitres: Decimal
+    litres_of_alcohol: Decimal
+
+
+class LedgerLine(NamedTuple):
+    period: str
+    band: str
+    batches: int
+    hectolitres: Decimal
+    litres_of_alcohol: Decimal
+
+
+def _round(value: Union[float, Decimal], places: int, rounding: str) -> Decimal:
+    # Rounded to 9 places first, so that float noise (i.e. 4.4999999999 for 4.5) does not round down a whole step
+    return Decimal(repr(round(float(value), 9))).quantize(Decimal(1).scaleb(-places), rounding=rounding)
+
+
+def record_from_dict(data: Dict[str, Any]) -> ProductionRecord:
+    """A record from a dict of strings (i.e. a csv.DictReader row) or values, dates are ISO format"""
+    date = data['date']
+    return ProductionRecord(
+        date=datetime.datetime.strptime(date, '%Y-%m-%d').date() if isinstance(date, str) else date,
+        product=data.get('product', ''),
+        volume=float(data['volume']),
+        original_gravity=float(data['original_gravity']),
+        present_gravity=float(data['present_gravity']),
+    )
+
+
+def band_of(abv: Union[float, Decimal], bands: Tuple[DutyBand, ...] = DUTY_BANDS) -> str:
+    for band in bands:
+        if band.abv_min <= abv < band.abv_max:
+            return band.name
+    raise ValueError(f"{abv}% ABV is not in any duty band")
+
+
+def assess(record: ProductionRecord, rules: DutyRules = DutyRules()) -> AssessedRecord:
+    """The strength, band, and rounded quantities of one production record
+
+    :raises ValueError: If the gravities are outside of the factor table (the strength must then be found another
+                        way, i.e. by distillation), or the strength fails the table's sanity check
+    """
+    excess_gravity_diff = round(record.original_gravity - record.present_gravity, 1)
+    if find_gov_uk_factor(excess_gravity_diff) is None:
+        raise ValueError(f"{record.product} on {record.date}: an excess gravity of {excess_gravity_diff} is outside "
+                         f"of the GOV.UK factor table")
+    abv = _round(gov_uk_abv(record.original_gravity, record.present_gravity, rules.sanity_check), rules.abv_places,
+                 rules.abv_rounding)
+    hectolitres = _round(record.volume / 100, rules.hectolitre_places, rules.hectolitre_rounding)
+    litres_of_alcohol = _round(hectolitres * abv, rules.alcohol_places, rules.alcohol_rounding)
+    return AssessedRecord(record, abv, band_of(abv, rules.bands), hectolitres, litres_of_alcohol)
+
+
+def assess_records(records: Iterable[ProductionRecord], rules: DutyRules = DutyRules()) -> Iterator[AssessedRecord]:
+    """Lazily assesses a stream of records"""
+    for record in records:
+        yield assess(record, rules)
+
+
+PERIODS: Dict[str, Callable[[datetime.date], str]] = {
+    'month': lambda date: f'{date.year}-{date.month:02d}',
+    'quarter': lambda date: f'{date.year}-Q{(date.month - 1) // 3 + 1}',
+    'year': lambda date: str(date.year),
+}
+
+
+class DutyLedger:
+    """Running totals of batches, hectolitres and litres of alcohol by period and duty band
+
+    :param rules: The rounding rules and bands
+    :param period: 'month', 'quarter', 'year', or a function from a date to a period name
+    """
+
+    def __init__(self, rules: DutyRules = DutyRules(), period: Union[str, Callable[[datetime.date], str]] = 'month'):
+        self.rules = rules
+        self.period = PERIODS[period] if isinstance(period, str) else period
+        self._totals: Dict[Tuple[str, str], List] = {}  # (period, band) -> [batches, hectolitres, litres of alcohol]
+
+    def add(self, record: ProductionRecord) -> AssessedRecord:
+        assessed = assess(record, self.rules)
+        totals = self._totals.setdefault((self.period(record.date), assessed.band), [0, Decimal(0), Decimal(0)])
+        totals[0] += 1
+        totals[1] += assessed.hectolitres
+        totals[2] += assessed.litres_of_alcohol
+        return assessed
+
+    def extend(self, records: Iterable[ProductionRecord]):
+        for record in records:
+            self.add(record)
+
+    def lines(self) -> List[LedgerLine]:
+        """The totals, by period then in the order of the bands"""
+        band_order = {band.name: index for index, band in enumerate(self.rules.bands)}
+        return [LedgerLine(period, band, *totals)
+                for (period, band), totals in sorted(self._totals.items(),
+                                                     key=lambda item: (item[0][0], band_order[item[0][1]]))]
+
+
+def duty_ledger(records: Iterable[ProductionRecord], rules: DutyRules = DutyRules(),
+                period: Union[str, Callable[[datetime.date], str]] = 'month',
+                on_error: Optional[Callable[[ProductionRecord, ValueError], None]] = None) -> List[LedgerLine]:
+    """Aggregates a stream of records in one pass
+
+    :param on_error: Called with records that cannot be assessed, which are then left out. By default the error is
+                     raised
+    """
+    ledger = DutyLedger(rules, period)
+    for record in records:
+        try:
+            ledger.add(record)
+        except ValueError as error:
+            if on_error is None:
+                raise
+            on_error(record, error)
+    return ledger.lines()
@@ -0,0 +1,234 @@
+"""
+Live metrics from streams of (timestamp, gravity) readings, for many fermenters at once
+
+    monitor = FermentationMonitor(abv_formula=ritchie_abv, window=12)
+    for metrics in monitor.process(readings):  # or `async for metrics in monitor.aprocess(readings)`
+        print(metrics.fermenter, metrics.abv, metrics.rate)
+
+Timestamps are in seconds (datetimes are converted), and gravities in full (i.e. 1.045). Each fermenter keeps only
+its original gravity and its last `window` readings, so memory does not grow with the length of the log. The
+original gravity is the first reading of a fermenter, unless given.
+
+`fermentation_metrics_batch` computes the same metrics for a whole log at once, for backfilling, and
+`FermentationMonitor.backfill` does the same then carries on streaming from where the log ends.
+"""
+import datetime
+from collections import deque
+from typing import AsyncIterable, AsyncIterator, Callable, Deque, Dict, Hashable, Iterable, Iterator, \
+    Mapping, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from brew_maths.calc.abv import www_alcohol_by_volume
+
+Timestamp = Union[float, datetime.datetime]
+
+SECONDS_PER_HOUR = 3600
+
+
+class Reading(NamedTuple):
+    fermenter: Hashable
+    timestamp: Timestamp
+    gravity: float  # in full, i.e. 1.045
+
+
+class FermentationMetrics(NamedTuple):
+    fermenter: Hashable
+    timestamp: float  # seconds
+    gravity: float  # in full, i.e. 1.012
+    original_gravity: float  # in full, i.e. 1.045
+    abv: float
+    apparent_attenuation: float  # fractional, i.e. 0.73
+    rate: float  # gravity points dropped per hour, over the window, NaN until there are two readings
+
+
+class FermentationMetricsBatch(NamedTuple):
+    """Per reading arrays of the metrics in `FermentationMetrics`"""
+    timestamp: np.ndarray
+    gravity: np.ndarray
+    original_gravity: np.ndarray
+    abv: np.ndarray
+    apparent_attenuation: np.ndarray
+    rate: np.ndarray
+
+
+def _seconds(timestamp: Timestamp) -> float:
+    return timestamp.timestamp() if isinstance(timestamp, datetime.datetime) else float(timestamp)
+
+
+def apparent_attenuation(original_gravity: float, gravity: float) -> float:
+    """
+    :param original_gravity: Original gravity (in full, for example 1.045)
+    :param gravity: Current gravity (in full, for example 1.012)
+    :return: Fractional apparent attenuation (i.e. 0.73)
+    """
+    return (original_gravity - gravity) / (original_gravity - 1)
+
+
+def _rate(timestamps: np.ndarray, gravities: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """The least squares drop in gravity points per hour of each row of readings, only the first `count` are used"""
+    used = np.arange(timestamps.shape[1]) < counts[:, None]
+    # Centre on the first reading of each window, so that years of epoch seconds do not swamp the differences
+    timestamps = np.where(used, timestamps - timestamps[:, :1], 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_time = timestamps.sum(axis=1) / counts
+        mean_gravity = np.where(used, gravities, 0).sum(axis=1) / counts
+        time_deviation = np.where(used, timestamps - mean_time[:, None], 0)
+        covariance = (time_deviation * np.where(used, gravities - mean_gravity[:, None], 0)).sum(axis=1)
+        variance = (time_deviation ** 2).sum(axis=1)
+        slope = covariance / variance
+    return np.where(variance > 0, -slope * 1000 * SECONDS_PER_HOUR, np.nan)
+
+
+class _Fermenter:
+    __slots__ = ('original_gravity', 'window')
+
+    def __init__(self, original_gravity: Optional[float], window: int):
+        self.original_gravity = original_gravity
+        self.window: Deque[Tuple[float, float]] = deque(maxlen=window)
+
+
+class FermentationMonitor:
+    """Per fermenter state for turning streams of readings into metrics
+
+    :param abv_formula: Takes the original and current gravity in full (i.e. 1.045), for example `ritchie_abv`. It
+                        must also take arrays to use `backfill`, i.e. `gov_uk_abv_full_batch` rather than `gov_uk_abv_full`
+    :param window: Readings used for the fermentation rate
+    :param original_gravities: Known original gravities (in full), by fermenter
+    """
+
+    def __init__(self, abv_formula: Callable[[float, float], float] = www_alcohol_by_volume, window: int = 12,
+                 original_gravities: Optional[Mapping[Hashable, float]] = None):
+        if window < 2:
+            raise ValueError("The window needs at least two readings to estimate a rate")
+        self.abv_formula = abv_formula
+        self.window = window
+        self._fermenters: Dict[Hashable, _Fermenter] = {}
+        for fermenter, original_gravity in (original_gravities or {}).items():
+            self.set_original_gravity(fermenter, original_gravity)
+
+    def _fermenter(self, fermenter: Hashable) -> _Fermenter:
+        if fermenter not in self._fermenters:
+            self._fermenters[fermenter] = _Fermenter(None, self.window)
+        return self._fermenters[fermenter]
+
+    def set_original_gravity(self, fermenter: Hashable, original_gravity: float):
+        self._fermenter(fermenter).original_gravity = original_gravity
+
+    def reset(self, fermenter: Hashable):
+        """Forgets a fermenter, i.e. when it is emptied and refilled"""
+        self._fermenters.pop(fermenter, None)
+
+    def update(self, fermenter: Hashable, timestamp: Timestamp, gravity: float) -> FermentationMetrics:
+        """Adds a reading (in time order for its fermenter), returning the fermenter's updated metrics"""
+        state = self._fermenter(fermenter)
+        timestamp = _seconds(timestamp)
+        if state.original_gravity is None:
+            state.original_gravity = gravity
+        state.window.append((timestamp, gravity))
+
+        rate = float('nan')
+        if len(state.window) > 1:
+            times, gravities = zip(*state.window)
+            rate = float(_rate(np.array([times]), np.array([gravities]), np.array([len(times)]))[0])
+        original_gravity = state.original_gravity
+        return FermentationMetrics(
+            fermenter=fermenter,
+            timestamp=timestamp,
+            gravity=gravity,
+            original_gravity=original_gravity,
+            abv=self.abv_formula(original_gravity, gravity),
+            apparent_attenuation=apparent_attenuation(original_gravity, gravity) if original_gravity != 1
+            else float('nan'),
+            rate=rate,
+        )
+
+    def process(self, readings: Iterable[Tuple[Hashable, Timestamp, float]]) -> Iterator[FermentationMetrics]:
+        """Yields the updated metrics after each (fermenter, timestamp, gravity) reading"""
+        for fermenter, timestamp, gravity in readings:
+            yield self.update(fermenter, timestamp, gravity)
+
+    async def aprocess(self, readings: AsyncIterable[Tuple[Hashable, Timestamp, float]]
+                       ) -> AsyncIterator[FermentationMetrics]:
+        """`process` for an async stream of readings"""
+        async for fermenter, timestamp, gravity in readings:
+            yield self.update(fermenter, timestamp, gravity)
+
+    def backfill(self, fermenters: Iterable[Hashable], timestamps: Iterable[Timestamp],
+                 gravities: Iterable[float]) -> FermentationMetricsBatch:
+        """Adds a whole log of readings at once (see `fermentation_metrics_batch`), leaving every fermenter ready to
+        carry on with `update`
+        """
+        fermenters = np.asarray(list(fermenters))
+        timestamps = np.array([_seconds(timestamp) for timestamp in timestamps], dtype=float)
+        gravities = np.asarray(list(gravities), dtype=float)
+        known = {fermenter: state.original_gravity for fermenter, state in self._fermenters.items()
+                 if state.original_gravity is not None}
+        metrics = fermentation_metrics_batch(fermenters, timestamps, gravities, self.abv_formula, self.window, known)
+
+        order = np.lexsort((timestamps, fermenters))
+        for position in order.tolist():
+            fermenter = fermenters[position].item()
+            state = self._fermenter(fermenter)
+            if state.original_gravity is None:
+                state.original_gravity = float(metrics.original_gravity[position])
+            state.window.append((float(timestamps[position]), float(gravities[position])))
+        return metrics
+
+
+def fermentation_metrics_batch(fermenters: np.ndarray, timestamps: np.ndarray, gravities: np.ndarray,
+                               abv_formula: Callable[[np.ndarray, np.ndarray], np.ndarray] = www_alcohol_by_volume,
+                               window: int = 12, original_gravities: Optional[Mapping[Hashable, float]] = None,
+                               chunk_size: int = 100000) -> FermentationMetricsBatch:
+    """Vectorized `FermentationMonitor` metrics of every reading in a log, in the order given
+
+    The readings of the fermenters may be interleaved and in any order, they are sorted by time per fermenter.
+
+    :param fermenters: The fermenter of each reading
+    :param timestamps: In seconds
+    :param gravities: In full (i.e. 1.045)
+    :param abv_formula: Takes arrays of original and current gravity in full, for example `ritchie_abv` or
+                        `gov_uk_abv_full_batch`
+    :param window: Readings used for the fermentation rate
+    :param original_gravities: Known original gravities (in full) by fermenter, the others use their first reading
+    :param chunk_size: Readings whose windows are gathered at a time, bounding the memory used to chunk_size * window
+    """
+    fermenters = np.asarray(fermenters)
+    timestamps = np.asarray(timestamps, dtype=float)
+    gravities = np.asarray(gravities, dtype=float)
+    count = len(timestamps)
+
+    order = np.lexsort((timestamps, fermenters))
+    sorted_fermenters, sorted_timestamps, sorted_gravities = fermenters[order], timestamps[order], gravities[order]
+    starts_group = np.ones(count, dtype=bool)
+    starts_group[1:] = sorted_fermenters[1:] != sorted_fermenters[:-1]
+    group_start = np.maximum.accumulate(np.where(starts_group, np.arange(count), 0)) if count else \
+        np.empty(0, dtype=np.intp)
+
+    original_gravity = sorted_gravities[group_start]
+    if original_gravities:
+        for fermenter, known in original_gravities.items():
+            original_gravity[sorted_fermenters == fermenter] = known
+
+    rate = np.empty(count)
+    for start in range(0, count, chunk_size):
+        positions = np.arange(start, min(start + chunk_size, count))
+        # Each row is the window ending at a reading, oldest first. Windows cut short by the start of their
+        # fermenter's readings are padded at the end, and the padding is ignored
+        counts = np.minimum(positions - group_start[positions] + 1, window)
+        rows = np.minimum((positions - counts + 1)[:, None] + np.arange(window)[None, :], positions[:, None])
+        rate[positions] = _rate(sorted_timestamps[rows], sorted_gravities[rows], counts)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        attenuation = np.where(original_gravity != 1, (original_gravity - sorted_gravities) / (original_gravity - 1),
+                               np.nan)
+    unsort = np.empty(count, dtype=np.intp)
+    unsort[order] = np.arange(count)
+    return FermentationMetricsBatch(
+        timestamp=timestamps,
+        gravity=gravities,
+        original_gravity=original_gravity[unsort],
+        abv=np.asarray(abv_formula(original_gravity, sorted_gravities), dtype=float)[unsort],
+        apparent_attenuation=attenuation[unsort],
+        rate=rate[unsort],
+    )
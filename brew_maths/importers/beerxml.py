@@ -0,0 +1,104 @@
+"""
+Streaming BeerXML 1.0 importer
+
+Source: http://www.beerxml.com/beerxml.htm
+
+Recipes are parsed one at a time with `iterparse`, and each recipe's elements are discarded once it has been
+converted, so memory use does not grow with the size of the file.
+"""
+import xml.etree.ElementTree as ElementTree
+from typing import BinaryIO, Iterator, NamedTuple, Optional, Union
+
+from brew_maths.calc.srm import EBC_PER_SRM
+from brew_maths.recipe_objects.grist import GristRecipe, GristMetadata, GristType
+from brew_maths.recipe_objects.hop import HopRecipe, HopMetadata
+from brew_maths.recipe_objects.recipe import Recipe
+
+# Litre degrees per kilogram of pure sucrose, a YIELD of 100% (Graham Wheeler, Home Brewing)
+SUCROSE_EXTRACT = 384
+
+FERMENTABLE_TYPES = {
+    'grain': GristType.PRIMARY_MALT,
+    'adjunct': GristType.MASH_TUN_ADJUNCT,
+    'extract': GristType.MALT_EXTRACT,
+    'dry extract': GristType.MALT_EXTRACT,
+    'sugar': GristType.COPPER_SUGAR,
+}
+
+
+class ImportedRecipe(NamedTuple):
+    name: Optional[str]
+    recipe: Recipe
+    volume: Optional[float]  # litres
+    boil_volume: Optional[float]  # litres
+    efficiency: Optional[float]  # i.e. 0.75
+
+
+def _text(element: ElementTree.Element, tag: str) -> Optional[str]:
+    child = element.find(tag)
+    if child is None or child.text is None or not child.text.strip():
+        return None
+    return child.text.strip()
+
+
+def _number(element: ElementTree.Element, tag: str, default: Optional[float] = None) -> Optional[float]:
+    text = _text(element, tag)
+    return default if text is None else float(text)
+
+
+def parse_fermentable(element: ElementTree.Element) -> GristRecipe:
+    """Converts a <FERMENTABLE> into a GristRecipe"""
+    grist_type = FERMENTABLE_TYPES.get((_text(element, 'TYPE') or 'grain').lower(), GristType.PRIMARY_MALT)
+    return GristRecipe(
+        ebc=_number(element, 'COLOR', 0) * EBC_PER_SRM,  # BeerXML colours are in SRM (degrees Lovibond)
+        mashable=grist_type not in {GristType.MALT_EXTRACT, GristType.COPPER_SUGAR},
+        extract=_number(element, 'YIELD', 0) / 100 * SUCROSE_EXTRACT,
+        moisture=_number(element, 'MOISTURE', 0),
+        fermentability=1 if grist_type is GristType.COPPER_SUGAR else None,
+        metadata=GristMetadata(name=_text(element, 'NAME'), description=_text(element, 'NOTES'), type=grist_type),
+        mass=_number(element, 'AMOUNT', 0) * 1000,
+    )
+
+
+def parse_hop(element: ElementTree.Element) -> HopRecipe:
+    """Converts a <HOP> into a HopRecipe
+
+    Dry hops are never boiled, so their time (in BeerXML, how long they sit in the fermenter) is set to 0
+    """
+    use = _text(element, 'USE')
+    return HopRecipe(
+        alpha=_number(element, 'ALPHA', 0) / 100,
+        metadata=HopMetadata(name=_text(element, 'NAME'), form=_text(element, 'FORM'),
+                             origin=_text(element, 'ORIGIN'), use=use),
+        mass=_number(element, 'AMOUNT', 0) * 1000,
+        time=0 if use is not None and use.lower() == 'dry hop' else _number(element, 'TIME', 0),
+    )
+
+
+def parse_recipe(element: ElementTree.Element) -> ImportedRecipe:
+    """Converts a <RECIPE> into an ImportedRecipe"""
+    efficiency = _number(element, 'EFFICIENCY')
+    return ImportedRecipe(
+        name=_text(element, 'NAME'),
+        recipe=Recipe(
+            grists=[parse_fermentable(fermentable) for fermentable in element.iterfind('FERMENTABLES/FERMENTABLE')],
+            hops=[parse_hop(hop) for hop in element.iterfind('HOPS/HOP')],
+        ),
+        volume=_number(element, 'BATCH_SIZE'),
+        boil_volume=_number(element, 'BOIL_SIZE'),
+        efficiency=None if efficiency is None else efficiency / 100,
+    )
+
+
+def iter_beerxml(source: Union[str, BinaryIO]) -> Iterator[ImportedRecipe]:
+    """Yields every recipe of a BeerXML file, one at a time
+
+    :param source: A path or binary file object
+    """
+    events = ElementTree.iterparse(source, events=('start', 'end'))
+    _, root = next(events)
+    for event, element in events:
+        if event == 'end' and element.tag == 'RECIPE':
+            yield parse_recipe(element)
+            # Drop the recipe (and anything else already parsed) from the tree
+            root.clear()
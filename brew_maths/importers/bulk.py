@@ -0,0 +1,56 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Union
+
+from brew_maths.importers.beerxml import ImportedRecipe, iter_beerxml
+
+# Parsers by (lower case) file suffix
+PARSERS: Dict[str, Callable[[str], Iterator[ImportedRecipe]]] = {
+    '.xml': iter_beerxml,
+    '.beerxml': iter_beerxml,
+}
+
+
+def iter_file(path: Union[str, os.PathLike]) -> Iterator[ImportedRecipe]:
+    """Yields every recipe of a file, choosing the parser from its suffix"""
+    suffix = Path(path).suffix.lower()
+    if suffix not in PARSERS:
+        raise ValueError(f"No parser for {suffix} files, expected one of {sorted(PARSERS)}")
+    return PARSERS[suffix](str(path))
+
+
+def _parse_file(path: str) -> List[ImportedRecipe]:
+    return list(iter_file(path))
+
+
+def import_directory(directory: Union[str, os.PathLike], pattern: str = '*.xml', max_workers: Optional[int] = None,
+                     recursive: bool = False) -> Iterator[ImportedRecipe]:
+    """Yields every recipe of every matching file in a directory, parsing the files in parallel
+
+    Files are parsed in worker processes, and their recipes are yielded in file name order as soon as each file is
+    ready, so at most a few files' worth of recipes are held at once. The output can be fed straight into the
+    calcs, or into `RecipeBatch.from_recipes(imported.recipe for imported in import_directory(...))`.
+
+    :param pattern: Glob of the files to import
+    :param max_workers: Number of worker processes, defaults to the number of CPUs. 1 parses in this process
+    :param recursive: Whether to also search sub directories
+    """
+    directory = Path(directory)
+    paths = sorted(str(path) for path in (directory.rglob(pattern) if recursive else directory.glob(pattern)))
+    if max_workers == 1:
+        for path in paths:
+            yield from iter_file(path)
+        return
+
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # Only keep a couple of files per worker in flight, rather than submitting the whole directory at once
+        pending = deque()
+        for path in paths:
+            pending.append(executor.submit(_parse_file, path))
+            if len(pending) >= max_workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
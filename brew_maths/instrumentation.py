@@ -0,0 +1,196 @@
+"""
+Opt-in call counts, latency and input size statistics for the calc functions
+
+    from brew_maths import instrumentation
+    instrumentation.enable()
+    ...
+    print(instrumentation.export_json())
+    instrumentation.disable()
+
+Nothing is wrapped until `enable` is called, and `disable` puts the original functions back, so there is no overhead
+when it is turned off. Wrapping works by replacing the functions in every loaded `brew_maths` module, so code outside
+of brew_maths should call them through their module (i.e. `hop_bitterness.hop_ibu(...)`) rather than holding a
+reference taken before `enable`.
+"""
+import functools
+import importlib
+import inspect
+import json
+import math
+import pkgutil
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import brew_maths.calc
+
+# Latency samples kept per function for the percentiles (reservoir sampled once full)
+RESERVOIR_SIZE = 2048
+
+
+class CallStats:
+    """Statistics of the calls to one function"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.calls = 0
+            self.total_seconds = 0.0
+            self.max_seconds = 0.0
+            self.samples: List[float] = []
+            self.input_sizes: Counter = Counter()  # power of two bucket -> calls
+            self._random = random.Random(0)
+
+    def record(self, seconds: float, input_size: Optional[int]):
+        with self._lock:
+            self.calls += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            if len(self.samples) < RESERVOIR_SIZE:
+                self.samples.append(seconds)
+            else:
+                index = self._random.randrange(self.calls)
+                if index < RESERVOIR_SIZE:
+                    self.samples[index] = seconds
+            if input_size is not None:
+                self.input_sizes[_size_bucket(input_size)] += 1
+
+    def percentile(self, percent: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'total_seconds': self.total_seconds,
+                'mean_seconds': self.total_seconds / self.calls if self.calls else 0.0,
+                'p50_seconds': self.percentile(50),
+                'p90_seconds': self.percentile(90),
+                'p99_seconds': self.percentile(99),
+                'max_seconds': self.max_seconds,
+                'input_sizes': dict(sorted(self.input_sizes.items(), key=lambda item: int(item[0].split('-')[0]))),
+            }
+
+
+def _size_bucket(size: int) -> str:
+    """i.e. 0, 1, 2-3, 4-7, 8-15, ..."""
+    if size < 2:
+        return str(size)
+    low = 1 << (size.bit_length() - 1)
+    return f'{low}-{2 * low - 1}'
+
+
+def _input_size(args: tuple) -> Optional[int]:
+    """The length of the first sized argument (a list of grists, a batch, an array...)"""
+    for arg in args:
+        if isinstance(arg, str):
+            continue
+        try:
+            return len(arg)
+        except TypeError:
+            continue
+    return None
+
+
+_stats: Dict[str, CallStats] = {}
+# qualified name -> original function, for every wrapped function
+_originals: Dict[str, Callable] = {}
+
+
+def is_enabled() -> bool:
+    return bool(_originals)
+
+
+def public_calc_functions() -> Dict[str, Callable]:
+    """Every public function of `brew_maths.calc`, by qualified name"""
+    functions = {}
+    for module_info in pkgutil.iter_modules(brew_maths.calc.__path__):
+        module = importlib.import_module(f'brew_maths.calc.{module_info.name}')
+        for name, value in vars(module).items():
+            if not name.startswith('_') and inspect.isfunction(value) and value.__module__ == module.__name__:
+                functions[f'{module.__name__}.{name}'] = value
+    return functions
+
+
+def _wrap(qualified_name: str, function: Callable) -> Callable:
+    stats = _stats.setdefault(qualified_name, CallStats())
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            stats.record(time.perf_counter() - start, _input_size(args))
+
+    wrapper.__wrapped_by_instrumentation__ = True
+    return wrapper
+
+
+def _replace_everywhere(replacements: Dict[int, Callable]):
+    """Replaces functions (by id) in the namespace of every loaded brew_maths module"""
+    for module_name, module in list(sys.modules.items()):
+        if module is None or not (module_name == 'brew_maths' or module_name.startswith('brew_maths.')):
+            continue
+        namespace = vars(module)
+        for name, value in list(namespace.items()):
+            replacement = replacements.get(id(value))
+            if replacement is not None:
+                namespace[name] = replacement
+
+
+def enable(functions: Optional[Iterable[str]] = None):
+    """Wraps the calc functions to collect statistics
+
+    :param functions: Qualified names (i.e. 'brew_maths.calc.hop_util.utilization') to wrap, defaults to every
+                      public function of `brew_maths.calc`
+    """
+    available = public_calc_functions()
+    names = available.keys() if functions is None else functions
+    replacements = {}
+    for name in names:
+        if name in _originals:
+            continue
+        if name not in available:
+            raise ValueError(f"{name} is not a public function of brew_maths.calc")
+        _originals[name] = available[name]
+        replacements[id(available[name])] = _wrap(name, available[name])
+    _replace_everywhere(replacements)
+
+
+def disable():
+    """Puts every original function back, the statistics collected so far are kept"""
+    replacements = {}
+    for module_name, module in list(sys.modules.items()):
+        if module is None or not (module_name == 'brew_maths' or module_name.startswith('brew_maths.')):
+            continue
+        for value in vars(module).values():
+            if getattr(value, '__wrapped_by_instrumentation__', False):
+                replacements[id(value)] = value.__wrapped__
+    _replace_everywhere(replacements)
+    _originals.clear()
+
+
+def reset():
+    """Forgets every statistic collected so far"""
+    for stats in _stats.values():
+        stats.clear()
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """The statistics of every function called since it was wrapped, by qualified name"""
+    return {name: stats.snapshot() for name, stats in sorted(_stats.items()) if stats.calls}
+
+
+def export_json(**kwargs) -> str:
+    """`snapshot` as JSON, kwargs are passed to `json.dumps`"""
+    return json.dumps(snapshot(), **kwargs)
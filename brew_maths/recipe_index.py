@@ -0,0 +1,241 @@
+"""
+Nearest neighbour search over the computed profiles (OG, FG, EBC, IBU and ABV) of a library of recipes
+
+    index = RecipeIndex(volume=23)
+    index.extend(library.items())
+    index.nearest(target_recipe, k=5, weights=RecipeProfile(1, 1, 0.1, 0.5, 10))
+
+Profiles are held in a KD-tree with leaf buckets. Inserted recipes go in a small pending list, and removed ones are
+marked dead, until enough have changed that the tree is rebuilt, so both are cheap and queries stay sub-linear.
+Distances are weighted Euclidean, sqrt(sum(weight * difference ** 2)), with weights chosen per query.
+"""
+import heapq
+import math
+from typing import Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from brew_maths.calc.abv import www_alcohol_by_volume
+from brew_maths.calc.summary import recipe_summary, recipe_summary_batch
+from brew_maths.recipe_objects.batch import RecipeBatch
+from brew_maths.recipe_objects.recipe import Recipe
+
+
+class RecipeProfile(NamedTuple):
+    original_gravity: float  # brewer's degrees
+    final_gravity: float  # brewer's degrees
+    ebc: float
+    ibu: float
+    abv: float
+
+
+DIMENSIONS = len(RecipeProfile._fields)
+
+Target = Union[Recipe, Sequence[float]]
+
+
+class RecipeIndex:
+    """A KD-tree of recipe profiles supporting k-nearest and range queries, with incremental insert and remove
+
+    :param volume: The target volume in litres, used to compute the profiles
+    :param boil_volume: The boil volume in litres, defaults to the volume
+    :param efficiency: Percentage efficiency (true extract vs experimental extract multiplier)
+    :param attenuation: The default attenuation, used for grists without a fermentability
+    :param abv_formula: Takes the original and final gravity in full (i.e. 1.045), must accept arrays
+    :param leaf_size: Profiles per leaf bucket of the tree
+    """
+
+    def __init__(self, volume: float = 23, boil_volume: Optional[float] = None, efficiency: float = 0.75,
+                 attenuation: float = 0.62, abv_formula: Callable = www_alcohol_by_volume, leaf_size: int = 32):
+        self.volume = volume
+        self.boil_volume = volume if boil_volume is None else boil_volume
+        self.efficiency = efficiency
+        self.attenuation = attenuation
+        self.abv_formula = abv_formula
+        self.leaf_size = leaf_size
+
+        self._profiles = np.empty((0, DIMENSIONS))
+        self._alive = np.empty(0, dtype=bool)
+        self._keys: List[Hashable] = []
+        self._slots: Dict[Hashable, int] = {}
+        self._size = 0  # slots used, dead or alive
+        self._indexed = 0  # slots [0, _indexed) are in the tree, the rest are pending
+        self._dead = 0
+        # Tree nodes, a leaf has a dimension of -1 and owns _order[start:end]
+        self._order = np.empty(0, dtype=np.intp)
+        self._nodes: List[Tuple[int, float, int, int, int, int]] = []  # dimension, split, left, right, start, end
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slots
+
+    def profile_of(self, recipe: Recipe) -> RecipeProfile:
+        summary = recipe_summary(recipe, self.volume, self.boil_volume, self.efficiency, self.attenuation,
+                                 abv_formula=self.abv_formula)
+        return RecipeProfile(summary.original_gravity, summary.final_gravity, summary.ebc, summary.ibu, summary.abv)
+
+    def profile(self, key: Hashable) -> RecipeProfile:
+        return RecipeProfile(*self._profiles[self._slots[key]].tolist())
+
+    def insert(self, key: Hashable, recipe: Recipe):
+        """Adds a recipe, replacing any recipe already under the key"""
+        self._add([key], np.array([self.profile_of(recipe)], dtype=float))
+
+    def extend(self, items: Iterable[Tuple[Hashable, Recipe]]):
+        """Adds many (key, recipe) pairs, computing their profiles as one batch"""
+        keys, recipes = [], []
+        for key, recipe in items:
+            keys.append(key)
+            recipes.append(recipe)
+        summary = recipe_summary_batch(RecipeBatch.from_recipes(recipes), self.volume, self.boil_volume,
+                                       self.efficiency, self.attenuation, abv_formula=self.abv_formula)
+        self._add(keys, np.column_stack([summary.original_gravity, summary.final_gravity, summary.ebc, summary.ibu,
+                                         summary.abv]).reshape(-1, DIMENSIONS))
+
+    def insert_profile(self, key: Hashable, profile: Sequence[float]):
+        """Adds a precomputed profile, replacing any recipe already under the key"""
+        self._add([key], np.array([profile], dtype=float))
+
+    def remove(self, key: Hashable):
+        """Removes a recipe, raises KeyError if it is not in the index"""
+        self._discard(key)
+        self._maybe_rebuild()
+
+    def _discard(self, key: Hashable):
+        slot = self._slots.pop(key)
+        self._alive[slot] = False
+        self._dead += 1
+
+    def _add(self, keys: List[Hashable], profiles: np.ndarray):
+        needed = self._size + len(keys)
+        if needed > len(self._profiles):
+            capacity = max(needed, 2 * len(self._profiles), 16)
+            self._profiles = np.resize(self._profiles, (capacity, DIMENSIONS))
+            self._alive = np.concatenate([self._alive[:self._size], np.zeros(capacity - self._size, dtype=bool)])
+        self._profiles[self._size:needed] = profiles
+        self._alive[self._size:needed] = True
+        for slot, key in enumerate(keys, self._size):
+            if key in self._slots:
+                self._discard(key)
+            self._slots[key] = slot
+        self._keys.extend(keys)
+        self._size = needed
+        self._maybe_rebuild()
+
+    def _maybe_rebuild(self):
+        """Rebuilds once the pending slots would slow queries, or half of the slots are dead"""
+        pending = self._size - self._indexed
+        if pending > max(self.leaf_size, 4 * int(math.sqrt(self._indexed))) or \
+                self._dead > max(self.leaf_size, self._size // 2):
+            self._rebuild()
+
+    def _rebuild(self):
+        """Drops the dead slots and builds the tree over every profile"""
+        alive = np.flatnonzero(self._alive[:self._size])
+        self._profiles = self._profiles[alive]
+        self._alive = np.ones(len(alive), dtype=bool)
+        self._keys = [self._keys[slot] for slot in alive.tolist()]
+        self._slots = {key: slot for slot, key in enumerate(self._keys)}
+        self._size = self._indexed = len(alive)
+        self._dead = 0
+
+        self._order = np.arange(self._size)
+        self._nodes = []
+        if not self._size:
+            return
+        self._nodes.append((-1, 0.0, -1, -1, 0, self._size))
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            _, _, _, _, start, end = self._nodes[node]
+            if end - start <= self.leaf_size:
+                continue
+            points = self._profiles[self._order[start:end]]
+            dimension = int(np.argmax(points.max(axis=0) - points.min(axis=0)))
+            middle = (end - start) // 2
+            partition = np.argpartition(points[:, dimension], middle)
+            self._order[start:end] = self._order[start:end][partition]
+            split = float(self._profiles[self._order[start + middle], dimension])
+            left, right = len(self._nodes), len(self._nodes) + 1
+            self._nodes.append((-1, 0.0, -1, -1, start, start + middle))
+            self._nodes.append((-1, 0.0, -1, -1, start + middle, end))
+            self._nodes[node] = (dimension, split, left, right, start, end)
+            stack.extend((left, right))
+
+    def _query_arguments(self, target: Target, weights: Optional[Sequence[float]]) -> Tuple[np.ndarray, np.ndarray]:
+        if isinstance(target, Recipe):
+            target = self.profile_of(target)
+        target = np.asarray(target, dtype=float)
+        weights = np.ones(DIMENSIONS) if weights is None else np.asarray(weights, dtype=float)
+        if target.shape != (DIMENSIONS,) or weights.shape != (DIMENSIONS,):
+            raise ValueError(f"Targets and weights need one value for each of {', '.join(RecipeProfile._fields)}")
+        if (weights < 0).any():
+            raise ValueError("Weights cannot be negative")
+        return target, weights
+
+    def _distances(self, slots: np.ndarray, target: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """The alive slots, and their squared distances to the target"""
+        slots = slots[self._alive[slots]]
+        return slots, ((self._profiles[slots] - target) ** 2) @ weights
+
+    def _search(self, target: np.ndarray, weights: np.ndarray, visit: Callable[[np.ndarray, np.ndarray], None],
+                bound: Callable[[], float]):
+        """Visits the pending slots, then the leaves that could hold a profile within `bound()` squared distance"""
+        visit(*self._distances(np.arange(self._indexed, self._size), target, weights))
+        if not self._nodes:
+            return
+        stack = [0]
+        while stack:
+            dimension, split, left, right, start, end = self._nodes[stack.pop()]
+            if dimension < 0:
+                visit(*self._distances(self._order[start:end], target, weights))
+                continue
+            difference = target[dimension] - split
+            near, far = (left, right) if difference < 0 else (right, left)
+            if weights[dimension] * difference ** 2 <= bound():
+                stack.append(far)
+            stack.append(near)
+
+    def nearest(self, target: Target, k: int = 1, weights: Optional[Sequence[float]] = None
+                ) -> List[Tuple[Hashable, float]]:
+        """The k recipes closest to the target, as (key, distance) from nearest to furthest
+
+        :param target: A recipe, or a profile (see `RecipeProfile`)
+        :param weights: One weight per dimension of `RecipeProfile`, defaults to 1 for all
+        """
+        target, weights = self._query_arguments(target, weights)
+        best: List[Tuple[float, int]] = []  # max heap of (-squared distance, -slot)
+
+        def bound() -> float:
+            return -best[0][0] if len(best) >= k else math.inf
+
+        def visit(slots: np.ndarray, distances: np.ndarray):
+            for slot, distance in zip(slots.tolist(), distances.tolist()):
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, -slot))
+                elif (-distance, -slot) > best[0]:
+                    heapq.heapreplace(best, (-distance, -slot))
+
+        if k > 0:
+            self._search(target, weights, visit, bound)
+        return [(self._keys[-slot], math.sqrt(-distance)) for distance, slot in sorted(best, reverse=True)]
+
+    def within(self, target: Target, radius: float, weights: Optional[Sequence[float]] = None
+               ) -> List[Tuple[Hashable, float]]:
+        """Every recipe within the radius of the target, as (key, distance) from nearest to furthest
+
+        :param target: A recipe, or a profile (see `RecipeProfile`)
+        :param weights: One weight per dimension of `RecipeProfile`, defaults to 1 for all
+        """
+        target, weights = self._query_arguments(target, weights)
+        limit = radius ** 2
+        found: List[Tuple[float, int]] = []
+
+        def visit(slots: np.ndarray, distances: np.ndarray):
+            inside = distances <= limit
+            found.extend(zip(distances[inside].tolist(), slots[inside].tolist()))
+
+        self._search(target, weights, visit, lambda: limit)
+        return [(self._keys[slot], math.sqrt(distance)) for distance, slot in sorted(found)]
@@ -0,0 +1,92 @@
+import dataclasses
+from typing import Iterable, List, Union
+
+import numpy as np
+
+from brew_maths.recipe_objects.recipe import Recipe
+
+ArrayLike = Union[float, np.ndarray]
+
+
+@dataclasses.dataclass
+class RecipeBatch:
+    """A struct-of-arrays view of many recipes
+
+    Every grist of every recipe is stored in one flat set of columns, with `grist_offsets` marking where each recipe
+    starts and ends (recipe i owns grists `grist_offsets[i]:grist_offsets[i + 1]`). Hops are stored the same way.
+
+    :param grist_fermentability: NaN is used in place of None (i.e. attenuation should be applied)
+    """
+    grist_ebc: np.ndarray
+    grist_mashable: np.ndarray
+    grist_extract: np.ndarray
+    grist_moisture: np.ndarray
+    grist_fermentability: np.ndarray
+    grist_mass: np.ndarray  # in grams
+    grist_offsets: np.ndarray
+    hop_alpha: np.ndarray
+    hop_mass: np.ndarray  # in grams
+    hop_time: np.ndarray  # in minutes
+    hop_offsets: np.ndarray
+
+    def __post_init__(self):
+        self.grist_recipe = np.repeat(np.arange(len(self)), np.diff(self.grist_offsets))
+        self.hop_recipe = np.repeat(np.arange(len(self)), np.diff(self.hop_offsets))
+
+    def __len__(self) -> int:
+        return len(self.grist_offsets) - 1
+
+    @classmethod
+    def from_recipes(cls, recipes: Iterable[Recipe]) -> "RecipeBatch":
+        grists: List[tuple] = []
+        hops: List[tuple] = []
+        grist_offsets = [0]
+        hop_offsets = [0]
+        for recipe in recipes:
+            grists.extend(
+                (grist.ebc, grist.mashable, grist.extract, grist.moisture,
+                 np.nan if grist.fermentability is None else grist.fermentability, grist.mass)
+                for grist in recipe.grists
+            )
+            hops.extend((hop.alpha, hop.mass, hop.time) for hop in recipe.hops)
+            grist_offsets.append(len(grists))
+            hop_offsets.append(len(hops))
+
+        grist_columns = np.array(grists, dtype=float).reshape(-1, 6).T
+        hop_columns = np.array(hops, dtype=float).reshape(-1, 3).T
+        return cls(
+            grist_ebc=grist_columns[0],
+            grist_mashable=grist_columns[1].astype(bool),
+            grist_extract=grist_columns[2],
+            grist_moisture=grist_columns[3],
+            grist_fermentability=grist_columns[4],
+            grist_mass=grist_columns[5],
+            grist_offsets=np.array(grist_offsets, dtype=np.intp),
+            hop_alpha=hop_columns[0],
+            hop_mass=hop_columns[1],
+            hop_time=hop_columns[2],
+            hop_offsets=np.array(hop_offsets, dtype=np.intp),
+        )
+
+    def per_grist(self, value: ArrayLike) -> ArrayLike:
+        """Spreads a per-recipe parameter (or a scalar) over every grist"""
+        value = np.asarray(value, dtype=float)
+        return value[self.grist_recipe] if value.ndim else value
+
+    def per_hop(self, value: ArrayLike) -> ArrayLike:
+        """Spreads a per-recipe parameter (or a scalar) over every hop"""
+        value = np.asarray(value, dtype=float)
+        return value[self.hop_recipe] if value.ndim else value
+
+    def sum_grists(self, values: np.ndarray) -> np.ndarray:
+        """Sums a per-grist column into a per-recipe column
+
+        The values are accumulated in order, so the result is identical to a python `sum` over each recipe
+        """
+        return np.bincount(self.grist_recipe, weights=np.broadcast_to(values, self.grist_recipe.shape),
+                           minlength=len(self)).astype(float, copy=False)
+
+    def sum_hops(self, values: np.ndarray) -> np.ndarray:
+        """Sums a per-hop column into a per-recipe column"""
+        return np.bincount(self.hop_recipe, weights=np.broadcast_to(values, self.hop_recipe.shape),
+                           minlength=len(self)).astype(float, copy=False)
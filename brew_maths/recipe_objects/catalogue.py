@@ -0,0 +1,63 @@
+from typing import Dict, Optional
+
+from brew_maths.recipe_objects.grist import Grist, GristDefinition, GristLine, GristRecipe, GristType
+from brew_maths.recipe_objects.hop import Hop, HopDefinition, HopLine, HopRecipe
+from brew_maths.recipe_objects.recipe import Recipe
+
+
+class IngredientCatalogue:
+    """Interns grist and hop definitions, so that identical ingredients are only stored once
+
+    Recipes built from the catalogue hold `GristLine`s and `HopLine`s, which only store a reference to a shared
+    definition alongside their mass (and time), rather than a full copy of the ingredient and its metadata.
+    """
+
+    def __init__(self):
+        self._grists: Dict[GristDefinition, GristDefinition] = {}
+        self._hops: Dict[HopDefinition, HopDefinition] = {}
+        self._strings: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._grists) + len(self._hops)
+
+    def _intern_string(self, value: Optional[str]) -> Optional[str]:
+        return value if value is None else self._strings.setdefault(value, value)
+
+    def grist(self, ebc: float, mashable: bool, extract: float, moisture: float, fermentability: Optional[float],
+              name: Optional[str] = None, description: Optional[str] = None,
+              type: Optional[GristType] = None) -> GristDefinition:
+        """Returns the catalogue's definition of a grist, adding it if it is new"""
+        definition = GristDefinition(ebc, mashable, extract, moisture, fermentability,
+                                     self._intern_string(name), self._intern_string(description), type)
+        return self._grists.setdefault(definition, definition)
+
+    def hop(self, alpha: float, name: Optional[str] = None, form: Optional[str] = None,
+            origin: Optional[str] = None, use: Optional[str] = None) -> HopDefinition:
+        """Returns the catalogue's definition of a hop, adding it if it is new"""
+        definition = HopDefinition(alpha, self._intern_string(name), self._intern_string(form),
+                                   self._intern_string(origin), self._intern_string(use))
+        return self._hops.setdefault(definition, definition)
+
+    def grist_from(self, grist: Grist) -> GristDefinition:
+        metadata = grist.metadata
+        return self.grist(grist.ebc, grist.mashable, grist.extract, grist.moisture, grist.fermentability,
+                          *((metadata.name, metadata.description, metadata.type) if metadata else ()))
+
+    def hop_from(self, hop: Hop) -> HopDefinition:
+        metadata = hop.metadata
+        return self.hop(hop.alpha, *((metadata.name, metadata.form, metadata.origin, metadata.use) if metadata else ()))
+
+    def grist_line(self, grist: GristRecipe) -> GristLine:
+        """Converts a GristRecipe into a GristLine backed by the catalogue"""
+        return GristLine(self.grist_from(grist), grist.mass)
+
+    def hop_line(self, hop: HopRecipe) -> HopLine:
+        """Converts a HopRecipe into a HopLine backed by the catalogue"""
+        return HopLine(self.hop_from(hop), hop.mass, hop.time)
+
+    def recipe(self, recipe: Recipe) -> Recipe:
+        """Converts a recipe into one made of GristLines and HopLines backed by the catalogue"""
+        return Recipe(
+            grists=[self.grist_line(grist) for grist in recipe.grists],
+            hops=[self.hop_line(hop) for hop in recipe.hops],
+        )
@@ -0,0 +1,17 @@
+from typing import NamedTuple, Optional
+
+
+class EquipmentProfile(NamedTuple):
+    """A brewing kit
+
+    For the batch calcs each field (bar the name) may also be an array, with one value per recipe
+    """
+    volume: float  # litres, the target volume
+    efficiency: float = 0.75
+    boil_off: float = 0  # litres evaporated during the boil
+    name: Optional[str] = None
+
+    @property
+    def boil_volume(self) -> float:
+        """The volume at the start of the boil, in litres"""
+        return self.volume + self.boil_off
@@ -1,6 +1,6 @@
 import dataclasses
 from enum import Enum
-from typing import Optional
+from typing import Optional, NamedTuple, Union
 
 
 class GristType(Enum):
@@ -43,3 +43,90 @@ class Grist:
 @dataclasses.dataclass
 class GristRecipe(Grist):
     mass: float = 0  # in grams
+
+
+class GristDefinition(NamedTuple):
+    """An immutable Grist, shared between every recipe that uses it (see `IngredientCatalogue`)
+
+    The metadata is stored inline so that the definition can be hashed and interned
+    """
+    ebc: float
+    mashable: bool
+    extract: float
+    moisture: float
+    fermentability: Optional[float]
+    name: Optional[str] = None
+    description: Optional[str] = None
+    type: Optional[GristType] = None
+
+    @property
+    def metadata(self) -> GristMetadata:
+        return GristMetadata(self.name, self.description, self.type)
+
+
+class GristLine:
+    """A lightweight GristRecipe, holding only a reference to its definition and a mass
+
+    Can be used anywhere a GristRecipe can. Setting a field of the definition (i.e. `line.ebc = 10`) gives the line
+    its own copy, leaving the shared definition, and every other line using it, unchanged
+    """
+    __slots__ = ('grist', 'mass')
+
+    def __init__(self, grist: GristDefinition, mass: float = 0):
+        self.grist = grist
+        self.mass = mass  # in grams
+
+    def __repr__(self):
+        return f"{type(self).__name__}(grist={self.grist!r}, mass={self.mass!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, GristLine):
+            return NotImplemented
+        return (self.grist, self.mass) == (other.grist, other.mass)
+
+    @property
+    def ebc(self) -> float:
+        return self.grist.ebc
+
+    @ebc.setter
+    def ebc(self, value: float):
+        self.grist = self.grist._replace(ebc=value)
+
+    @property
+    def mashable(self) -> bool:
+        return self.grist.mashable
+
+    @mashable.setter
+    def mashable(self, value: bool):
+        self.grist = self.grist._replace(mashable=value)
+
+    @property
+    def extract(self) -> float:
+        return self.grist.extract
+
+    @extract.setter
+    def extract(self, value: float):
+        self.grist = self.grist._replace(extract=value)
+
+    @property
+    def moisture(self) -> float:
+        return self.grist.moisture
+
+    @moisture.setter
+    def moisture(self, value: float):
+        self.grist = self.grist._replace(moisture=value)
+
+    @property
+    def fermentability(self) -> Optional[float]:
+        return self.grist.fermentability
+
+    @fermentability.setter
+    def fermentability(self, value: Optional[float]):
+        self.grist = self.grist._replace(fermentability=value)
+
+    @property
+    def metadata(self) -> GristMetadata:
+        return self.grist.metadata
+
+
+AnyGristRecipe = Union[GristRecipe, GristLine]
@@ -1,5 +1,5 @@
 import dataclasses
-from typing import Optional
+from typing import Optional, NamedTuple, Union
 
 
 @dataclasses.dataclass
@@ -20,3 +20,53 @@ class Hop:
 class HopRecipe(Hop):
     mass: float = 0  # in grams
     time: float = 0  # in minutes
+
+
+class HopDefinition(NamedTuple):
+    """An immutable Hop, shared between every recipe that uses it (see `IngredientCatalogue`)"""
+    alpha: float
+    name: Optional[str] = None
+    form: Optional[str] = None
+    origin: Optional[str] = None
+    use: Optional[str] = None
+
+    @property
+    def metadata(self) -> HopMetadata:
+        return HopMetadata(self.name, self.form, self.origin, self.use)
+
+
+class HopLine:
+    """A lightweight HopRecipe, holding only a reference to its definition, a mass and a time
+
+    Can be used anywhere a HopRecipe can. Setting the alpha gives the line its own copy of the definition, leaving the
+    shared definition, and every other line using it, unchanged
+    """
+    __slots__ = ('hop', 'mass', 'time')
+
+    def __init__(self, hop: HopDefinition, mass: float = 0, time: float = 0):
+        self.hop = hop
+        self.mass = mass  # in grams
+        self.time = time  # in minutes
+
+    def __repr__(self):
+        return f"{type(self).__name__}(hop={self.hop!r}, mass={self.mass!r}, time={self.time!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, HopLine):
+            return NotImplemented
+        return (self.hop, self.mass, self.time) == (other.hop, other.mass, other.time)
+
+    @property
+    def alpha(self) -> float:
+        return self.hop.alpha
+
+    @alpha.setter
+    def alpha(self, value: float):
+        self.hop = self.hop._replace(alpha=value)
+
+    @property
+    def metadata(self) -> HopMetadata:
+        return self.hop.metadata
+
+
+AnyHopRecipe = Union[HopRecipe, HopLine]
@@ -1,11 +1,11 @@
 import dataclasses
 from typing import List
 
-from brew_maths.recipe_objects.grist import GristRecipe
-from brew_maths.recipe_objects.hop import HopRecipe
+from brew_maths.recipe_objects.grist import AnyGristRecipe
+from brew_maths.recipe_objects.hop import AnyHopRecipe
 
 
 @dataclasses.dataclass
 class Recipe:
-    grists: List[GristRecipe]
-    hops: List[HopRecipe]
+    grists: List[AnyGristRecipe]
+    hops: List[AnyHopRecipe]
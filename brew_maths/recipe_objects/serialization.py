@@ -0,0 +1,67 @@
+"""
+Conversion of recipes to and from plain dicts (i.e. for JSON)
+
+A grist is `{"ebc", "mashable", "extract", "moisture", "fermentability", "mass"}` and a hop is
+`{"alpha", "mass", "time"}`, either may also have a "name". A recipe is `{"grists": [...], "hops": [...]}`.
+"""
+from typing import Any, Dict
+
+from brew_maths.recipe_objects.grist import GristRecipe, GristMetadata, AnyGristRecipe
+from brew_maths.recipe_objects.hop import HopRecipe, HopMetadata, AnyHopRecipe
+from brew_maths.recipe_objects.recipe import Recipe
+
+
+def grist_from_dict(data: Dict[str, Any]) -> GristRecipe:
+    return GristRecipe(
+        ebc=data['ebc'],
+        mashable=data['mashable'],
+        extract=data['extract'],
+        moisture=data.get('moisture', 0),
+        fermentability=data.get('fermentability'),
+        metadata=GristMetadata(name=data['name']) if data.get('name') is not None else None,
+        mass=data.get('mass', 0),
+    )
+
+
+def hop_from_dict(data: Dict[str, Any]) -> HopRecipe:
+    return HopRecipe(
+        alpha=data['alpha'],
+        metadata=HopMetadata(name=data['name']) if data.get('name') is not None else None,
+        mass=data.get('mass', 0),
+        time=data.get('time', 0),
+    )
+
+
+def recipe_from_dict(data: Dict[str, Any]) -> Recipe:
+    return Recipe(
+        grists=[grist_from_dict(grist) for grist in data.get('grists', [])],
+        hops=[hop_from_dict(hop) for hop in data.get('hops', [])],
+    )
+
+
+def grist_to_dict(grist: AnyGristRecipe) -> Dict[str, Any]:
+    data = {
+        'ebc': grist.ebc,
+        'mashable': grist.mashable,
+        'extract': grist.extract,
+        'moisture': grist.moisture,
+        'fermentability': grist.fermentability,
+        'mass': grist.mass,
+    }
+    if grist.metadata is not None and grist.metadata.name is not None:
+        data['name'] = grist.metadata.name
+    return data
+
+
+def hop_to_dict(hop: AnyHopRecipe) -> Dict[str, Any]:
+    data = {'alpha': hop.alpha, 'mass': hop.mass, 'time': hop.time}
+    if hop.metadata is not None and hop.metadata.name is not None:
+        data['name'] = hop.metadata.name
+    return data
+
+
+def recipe_to_dict(recipe: Recipe) -> Dict[str, Any]:
+    return {
+        'grists': [grist_to_dict(grist) for grist in recipe.grists],
+        'hops': [hop_to_dict(hop) for hop in recipe.hops],
+    }
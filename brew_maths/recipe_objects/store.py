@@ -0,0 +1,248 @@
+"""
+An append-only, memory mapped binary store of recipes
+
+A store is a directory of little endian files, each starting with a 16 byte header (magic, version):
+
+- grists.bin: fixed width grist records (`GRIST_DTYPE`)
+- hops.bin: fixed width hop records (`HOP_DTYPE`)
+- grist_offsets.bin, hop_offsets.bin: int64 offsets table, recipe i owns records offsets[i]:offsets[i + 1]
+- names.bin: the uint32 string id of each recipe's name
+- strings.bin, string_offsets.bin: the string table (UTF-8 bytes, and the int64 end of each string)
+
+Opening a store maps the files, and `batch()` returns a `RecipeBatch` whose columns are views of the mapped records,
+so nothing is deserialized or copied and every process reading the store shares the page cache. The offsets tables
+are written last on every append, so a torn append is ignored the next time the store is opened.
+"""
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+import numpy as np
+
+from brew_maths.recipe_objects.batch import RecipeBatch
+from brew_maths.recipe_objects.grist import GristRecipe, GristMetadata, GristType
+from brew_maths.recipe_objects.hop import HopRecipe, HopMetadata
+from brew_maths.recipe_objects.recipe import Recipe
+
+MAGIC = b'BRMSTORE'
+VERSION = 1
+HEADER_SIZE = 16
+NO_STRING = 0xFFFFFFFF
+
+GRIST_DTYPE = np.dtype([
+    ('ebc', '<f8'),
+    ('extract', '<f8'),
+    ('moisture', '<f8'),
+    ('fermentability', '<f8'),  # NaN for None
+    ('mass', '<f8'),
+    ('name', '<u4'),  # string ids, NO_STRING for None
+    ('description', '<u4'),
+    ('mashable', 'u1'),
+    ('type', 'u1'),  # GristType value, 0 for None
+    ('padding', 'V6'),
+])
+
+HOP_DTYPE = np.dtype([
+    ('alpha', '<f8'),
+    ('mass', '<f8'),
+    ('time', '<f8'),
+    ('name', '<u4'),  # string ids, NO_STRING for None
+    ('form', '<u4'),
+    ('origin', '<u4'),
+    ('use', '<u4'),
+])
+
+OFFSET_DTYPE = np.dtype('<i8')
+STRING_ID_DTYPE = np.dtype('<u4')
+
+FILES = {
+    'grists': GRIST_DTYPE,
+    'hops': HOP_DTYPE,
+    'grist_offsets': OFFSET_DTYPE,
+    'hop_offsets': OFFSET_DTYPE,
+    'names': STRING_ID_DTYPE,
+    'strings': np.dtype('u1'),
+    'string_offsets': OFFSET_DTYPE,
+}
+
+
+class RecipeStore:
+    """A directory of memory mapped recipes, see the module docstring for the format
+
+    :param path: The store directory, created if it does not exist
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        for name, dtype in FILES.items():
+            file = self._file(name)
+            if not file.exists():
+                with open(file, 'wb') as stream:
+                    stream.write(_header())
+                    if name.endswith('_offsets') and name != 'string_offsets':
+                        stream.write(np.zeros(1, dtype).tobytes())
+            else:
+                with open(file, 'rb') as stream:
+                    header = stream.read(HEADER_SIZE)
+                if header[:8] != MAGIC:
+                    raise ValueError(f"{file} is not a recipe store file")
+                if int.from_bytes(header[8:12], 'little') != VERSION:
+                    raise ValueError(f"{file} is version {int.from_bytes(header[8:12], 'little')}, expected {VERSION}")
+        self._views: Dict[str, np.ndarray] = {}
+        self._string_ids: Optional[Dict[str, int]] = None
+
+    def _file(self, name: str) -> Path:
+        return self.path / f'{name}.bin'
+
+    def _view(self, name: str) -> np.ndarray:
+        """The whole of a file as a read only, memory mapped array of its records"""
+        if name not in self._views:
+            dtype = FILES[name]
+            count = (self._file(name).stat().st_size - HEADER_SIZE) // dtype.itemsize
+            if count == 0:
+                self._views[name] = np.empty(0, dtype)
+            else:
+                self._views[name] = np.memmap(self._file(name), dtype=dtype, mode='r', offset=HEADER_SIZE,
+                                              shape=(count,))
+        return self._views[name]
+
+    def __len__(self) -> int:
+        # Offsets are written last, so only recipes in both tables are complete
+        return min(len(self._view('grist_offsets')), len(self._view('hop_offsets'))) - 1
+
+    def batch(self) -> RecipeBatch:
+        """A RecipeBatch of every recipe in the store, its columns are views of the mapped files"""
+        count = len(self)
+        grist_offsets = self._view('grist_offsets')[:count + 1]
+        hop_offsets = self._view('hop_offsets')[:count + 1]
+        grists = self._view('grists')[:int(grist_offsets[-1])]
+        hops = self._view('hops')[:int(hop_offsets[-1])]
+        return RecipeBatch(
+            grist_ebc=grists['ebc'],
+            grist_mashable=grists['mashable'].view(bool),
+            grist_extract=grists['extract'],
+            grist_moisture=grists['moisture'],
+            grist_fermentability=grists['fermentability'],
+            grist_mass=grists['mass'],
+            grist_offsets=grist_offsets,
+            hop_alpha=hops['alpha'],
+            hop_mass=hops['mass'],
+            hop_time=hops['time'],
+            hop_offsets=hop_offsets,
+        )
+
+    def string(self, string_id: int) -> Optional[str]:
+        if string_id == NO_STRING:
+            return None
+        ends = self._view('string_offsets')
+        start = int(ends[string_id - 1]) if string_id else 0
+        return bytes(self._view('strings')[start:int(ends[string_id])]).decode('utf-8')
+
+    def name(self, index: int) -> Optional[str]:
+        return self.string(int(self._view('names')[index]))
+
+    def __getitem__(self, index: int) -> Recipe:
+        """Rebuilds a single recipe"""
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        index %= len(self)
+        grist_offsets, hop_offsets = self._view('grist_offsets'), self._view('hop_offsets')
+        grists = self._view('grists')[grist_offsets[index]:grist_offsets[index + 1]]
+        hops = self._view('hops')[hop_offsets[index]:hop_offsets[index + 1]]
+        return Recipe(
+            grists=[
+                GristRecipe(ebc=float(grist['ebc']),
+                            mashable=bool(grist['mashable']),
+                            extract=float(grist['extract']),
+                            moisture=float(grist['moisture']),
+                            fermentability=None if np.isnan(grist['fermentability']) else float(
+                                grist['fermentability']),
+                            metadata=GristMetadata(name=self.string(int(grist['name'])),
+                                                   description=self.string(int(grist['description'])),
+                                                   type=GristType(int(grist['type'])) if grist['type'] else None),
+                            mass=float(grist['mass']))
+                for grist in grists
+            ],
+            hops=[
+                HopRecipe(alpha=float(hop['alpha']),
+                          metadata=HopMetadata(name=self.string(int(hop['name'])),
+                                               form=self.string(int(hop['form'])),
+                                               origin=self.string(int(hop['origin'])),
+                                               use=self.string(int(hop['use']))),
+                          mass=float(hop['mass']),
+                          time=float(hop['time']))
+                for hop in hops
+            ],
+        )
+
+    def _intern(self, value: Optional[str], new_strings: list) -> int:
+        if value is None:
+            return NO_STRING
+        if self._string_ids is None:
+            self._string_ids = {self.string(string_id): string_id
+                                for string_id in range(len(self._view('string_offsets')))}
+        if value not in self._string_ids:
+            self._string_ids[value] = len(self._string_ids)
+            new_strings.append(value.encode('utf-8'))
+        return self._string_ids[value]
+
+    def append(self, recipes: Iterable[Recipe], names: Optional[Iterable[Optional[str]]] = None):
+        """Appends recipes (with optional names) to the end of the store"""
+        recipes = list(recipes)
+        names = [None] * len(recipes) if names is None else list(names)
+        if len(names) != len(recipes):
+            raise ValueError(f"{len(recipes)} recipes but {len(names)} names")
+        count = len(self)
+        grist_offsets, hop_offsets = self._view('grist_offsets'), self._view('hop_offsets')
+        grist_end, hop_end = int(grist_offsets[count]), int(hop_offsets[count])
+
+        new_strings = []
+        grists = np.zeros(sum(len(recipe.grists) for recipe in recipes), GRIST_DTYPE)
+        hops = np.zeros(sum(len(recipe.hops) for recipe in recipes), HOP_DTYPE)
+        new_grist_offsets, new_hop_offsets, name_ids = [], [], []
+        grist_index = hop_index = 0
+        for recipe, name in zip(recipes, names):
+            for grist in recipe.grists:
+                metadata = grist.metadata or GristMetadata()
+                grists[grist_index] = (
+                    grist.ebc, grist.extract, grist.moisture,
+                    np.nan if grist.fermentability is None else grist.fermentability, grist.mass,
+                    self._intern(metadata.name, new_strings), self._intern(metadata.description, new_strings),
+                    grist.mashable, metadata.type.value if metadata.type else 0, b'',
+                )
+                grist_index += 1
+            for hop in recipe.hops:
+                metadata = hop.metadata or HopMetadata()
+                hops[hop_index] = (hop.alpha, hop.mass, hop.time, self._intern(metadata.name, new_strings),
+                                   self._intern(metadata.form, new_strings), self._intern(metadata.origin, new_strings),
+                                   self._intern(metadata.use, new_strings))
+                hop_index += 1
+            new_grist_offsets.append(grist_end + grist_index)
+            new_hop_offsets.append(hop_end + hop_index)
+            name_ids.append(self._intern(name, new_strings))
+
+        string_count = len(self._view('string_offsets'))
+        string_end = int(self._view('string_offsets')[-1]) if string_count else 0
+        string_offsets = string_end + np.cumsum([len(string) for string in new_strings], dtype=OFFSET_DTYPE)
+
+        # Records first, the offsets tables last, so a partial append is never seen
+        self._write('grists', grists, grist_end)
+        self._write('hops', hops, hop_end)
+        self._write('strings', np.frombuffer(b''.join(new_strings), np.uint8), string_end)
+        self._write('string_offsets', string_offsets, string_count)
+        self._write('names', np.array(name_ids, STRING_ID_DTYPE), count)
+        self._write('grist_offsets', np.array(new_grist_offsets, OFFSET_DTYPE), count + 1)
+        self._write('hop_offsets', np.array(new_hop_offsets, OFFSET_DTYPE), count + 1)
+        self._views.clear()
+
+    def _write(self, name: str, records: np.ndarray, position: int):
+        """Writes records from a record index, dropping anything after them left over from a torn append"""
+        with open(self._file(name), 'r+b') as stream:
+            stream.seek(HEADER_SIZE + position * FILES[name].itemsize)
+            stream.write(records.astype(FILES[name], copy=False).tobytes())
+            stream.truncate()
+
+
+def _header() -> bytes:
+    return MAGIC + VERSION.to_bytes(4, 'little') + bytes(HEADER_SIZE - len(MAGIC) - 4)
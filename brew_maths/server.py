@@ -0,0 +1,449 @@
+"""
+A local HTTP/JSON server for the calc functions, with concurrent requests evaluated together in micro-batches
+
+    python -m brew_maths.server --port 8080 --max-batch-size 512 --max-wait-ms 2
+
+Every endpoint takes a POST of one JSON object, or a list of them, and responds with one result per object:
+
+- /evaluate: a recipe (see `brew_maths.recipe_objects.serialization`), optionally with "volume", "boil_volume",
+  "efficiency" and "attenuation" -> original_gravity, final_gravity, abv, ebc and ibu
+- /abv: "original_gravity" and "final_gravity" (in full, i.e. 1.045, for every formula), optionally "formula" (www,
+  ritchie or gov_uk) -> abv
+- /ibu: "hops" and "boil_gravity" (in full), optionally "volume" -> ibu
+- /colour: "grists", optionally "volume" and "efficiency" -> ebc
+
+GET /health responds with the number of requests waiting for each endpoint. Volumes and gravities must be greater
+than 0, and any result that is not finite is sent as null.
+
+Requests wait in a bounded queue per endpoint until `max_batch_size` have arrived, or the first has waited
+`max_wait` seconds, then the whole batch is evaluated in one vectorized pass in a worker thread. Fields are checked
+as each request is parsed, and should a batch still fail its requests are retried one by one. When a queue is
+full, connections stop being read until there is room (backpressure), rather than memory growing without bound.
+Only the standard library and numpy are used.
+"""
+import argparse
+import asyncio
+import json
+import math
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from brew_maths.calc.ebc import graham_recipe_ebc_batch
+from brew_maths.calc.formulas import ABV_FORMULAS
+from brew_maths.calc.hop_bitterness import recipe_ibu_batch
+from brew_maths.calc.summary import recipe_summary_batch
+from brew_maths.recipe_objects.batch import RecipeBatch
+from brew_maths.recipe_objects.grist import GristRecipe
+from brew_maths.recipe_objects.hop import HopRecipe
+from brew_maths.recipe_objects.recipe import Recipe
+from brew_maths.recipe_objects.serialization import grist_from_dict, hop_from_dict
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class RequestError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class MicroBatcher:
+    """Coalesces single submissions into calls of a batch function
+
+    :param function: Takes a list of items, returns a list of results in the same order
+    :param max_batch_size: Most items in one call
+    :param max_wait: Seconds the first item of a batch waits for more to arrive
+    :param max_pending: Most items waiting, `submit` waits for room beyond this
+    """
+
+    def __init__(self, function: Callable[[List[Any]], List[Any]], max_batch_size: int = 256,
+                 max_wait: float = 0.002, max_pending: int = 4096):
+        self.function = function
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: "asyncio.Queue[Tuple[Any, asyncio.Future]]" = asyncio.Queue(maxsize=max_pending)
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.items = 0
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    async def submit(self, item: Any) -> Any:
+        """Waits for the result of one item"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _next_batch(self) -> List[Tuple[Any, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if self._queue.empty():
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            else:
+                batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            items = [item for item, _ in batch]
+            try:
+                results = await loop.run_in_executor(None, self.function, items)
+            except Exception as error:
+                if len(batch) == 1:
+                    _set_exception(batch[0][1], error)
+                else:
+                    # One bad item should not fail the others, so each is retried on its own
+                    await self._run_one_by_one(batch)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def _run_one_by_one(self, batch: List[Tuple[Any, asyncio.Future]]):
+        loop = asyncio.get_running_loop()
+        for item, future in batch:
+            try:
+                result, = await loop.run_in_executor(None, self.function, [item])
+            except Exception as error:
+                _set_exception(future, error)
+                continue
+            self.batches += 1
+            self.items += 1
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def _set_exception(future: asyncio.Future, error: Exception):
+    if not future.done():
+        future.set_exception(error)
+
+
+def _as_number(value: Any, field: str) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise RequestError(400, f"{field} should be a finite number")
+    return float(value)
+
+
+def _number(data: Dict[str, Any], field: str, default: Optional[float] = None) -> float:
+    value = data.get(field, default)
+    if value is None:
+        raise RequestError(400, f"{field} is required")
+    return _as_number(value, field)
+
+
+def _positive(data: Dict[str, Any], field: str, default: Optional[float] = None) -> float:
+    """For volumes and gravities, which are divided by"""
+    value = _number(data, field, default)
+    if value <= 0:
+        raise RequestError(400, f"{field} should be greater than 0")
+    return value
+
+
+def _finite(value: Any) -> Any:
+    """NaN and infinity become null, as they are not JSON"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_finite(item) for item in value]
+    return value
+
+
+def _items(data: Dict[str, Any], field: str) -> List[Dict[str, Any]]:
+    items = data.get(field, [])
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise RequestError(400, f"{field} should be a list of JSON objects")
+    return items
+
+
+def _grists(data: Dict[str, Any]) -> List[GristRecipe]:
+    """The grists of a request, with every field checked here so that one bad request cannot fail a whole batch"""
+    grists = []
+    for index, item in enumerate(_items(data, 'grists')):
+        grist = _parse(grist_from_dict, item, 'grist')
+        for field in ('ebc', 'extract', 'moisture', 'mass'):
+            setattr(grist, field, _as_number(getattr(grist, field), f'grists[{index}].{field}'))
+        if grist.fermentability is not None:
+            grist.fermentability = _as_number(grist.fermentability, f'grists[{index}].fermentability')
+        if not isinstance(grist.mashable, bool):
+            raise RequestError(400, f"grists[{index}].mashable should be true or false")
+        grists.append(grist)
+    return grists
+
+
+def _hops(data: Dict[str, Any]) -> List[HopRecipe]:
+    hops = []
+    for index, item in enumerate(_items(data, 'hops')):
+        hop = _parse(hop_from_dict, item, 'hop')
+        for field in ('alpha', 'mass', 'time'):
+            setattr(hop, field, _as_number(getattr(hop, field), f'hops[{index}].{field}'))
+        hops.append(hop)
+    return hops
+
+
+def _parse(function: Callable, data: Any, what: str):
+    try:
+        return function(data)
+    except (KeyError, TypeError, AttributeError) as error:
+        raise RequestError(400, f"Invalid {what}: {error}")
+
+
+class CalcServer:
+    """The endpoints, their batchers, and the HTTP handling
+
+    :param volume: Default volume in litres
+    :param efficiency: Default efficiency
+    :param attenuation: Default attenuation
+    :param abv: The ABV formula of /evaluate, one of `brew_maths.calc.formulas.ABV_FORMULAS`
+    :param max_body_size: Largest request body accepted, in bytes
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8080, max_batch_size: int = 256,
+                 max_wait: float = 0.002, max_pending: int = 4096, volume: float = 23, efficiency: float = 0.75,
+                 attenuation: float = 0.62, abv: str = 'www', max_body_size: int = 16 * 1024 * 1024):
+        self.host = host
+        self.port = port
+        self.volume = volume
+        self.efficiency = efficiency
+        self.attenuation = attenuation
+        self.abv = abv
+        self.max_body_size = max_body_size
+        self._batcher_options = dict(max_batch_size=max_batch_size, max_wait=max_wait, max_pending=max_pending)
+        self.endpoints: Dict[str, Tuple[Callable[[Dict[str, Any]], Any], Callable[[List[Any]], List[Any]]]] = {
+            '/evaluate': (self._parse_evaluate, self._evaluate_batch),
+            '/abv': (self._parse_abv, self._abv_batch),
+            '/ibu': (self._parse_ibu, self._ibu_batch),
+            '/colour': (self._parse_colour, self._colour_batch),
+        }
+        self.batchers: Dict[str, MicroBatcher] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    # Parsing (in the event loop, so a bad request fails on its own) and the batch functions (in a worker thread)
+
+    def _parse_evaluate(self, data: Dict[str, Any]) -> Tuple[Recipe, float, float, float, float]:
+        volume = _positive(data, 'volume', self.volume)
+        return (Recipe(_grists(data), _hops(data)), volume, _positive(data, 'boil_volume', volume),
+                _number(data, 'efficiency', self.efficiency), _number(data, 'attenuation', self.attenuation))
+
+    def _evaluate_batch(self, items: List[Tuple[Recipe, float, float, float, float]]) -> List[Dict[str, float]]:
+        recipes, volume, boil_volume, efficiency, attenuation = zip(*items)
+        # Grists may still give a final gravity of 0, whose ABV is sent as null
+        with np.errstate(divide='ignore', invalid='ignore'):
+            summary = recipe_summary_batch(RecipeBatch.from_recipes(recipes), np.array(volume), np.array(boil_volume),
+                                           np.array(efficiency), np.array(attenuation), ABV_FORMULAS[self.abv])
+        return [dict(zip(('original_gravity', 'final_gravity', 'abv', 'ebc', 'ibu'), values))
+                for values in zip(summary.original_gravity.tolist(), summary.final_gravity.tolist(),
+                                  summary.abv.tolist(), summary.ebc.tolist(), summary.ibu.tolist())]
+
+    @staticmethod
+    def _parse_abv(data: Dict[str, Any]) -> Tuple[str, float, float]:
+        formula = data.get('formula', 'www')
+        if not isinstance(formula, str) or formula not in ABV_FORMULAS:
+            raise RequestError(400, f"Unknown formula {formula!r}, expected one of {', '.join(sorted(ABV_FORMULAS))}")
+        return formula, _positive(data, 'original_gravity'), _positive(data, 'final_gravity')
+
+    @staticmethod
+    def _abv_batch(items: List[Tuple[str, float, float]]) -> List[Dict[str, float]]:
+        formulas = np.array([formula for formula, _, _ in items])
+        original_gravity = np.array([og for _, og, _ in items])
+        final_gravity = np.array([fg for _, _, fg in items])
+        abv = np.empty(len(items))
+        for formula in set(formulas.tolist()):
+            selected = formulas == formula
+            abv[selected] = ABV_FORMULAS[formula](original_gravity[selected], final_gravity[selected])
+        return [{'abv': value} for value in abv.tolist()]
+
+    def _parse_ibu(self, data: Dict[str, Any]) -> Tuple[Recipe, float, float]:
+        return (Recipe(grists=[], hops=_hops(data)), _positive(data, 'volume', self.volume),
+                _positive(data, 'boil_gravity'))
+
+    @staticmethod
+    def _ibu_batch(items: List[Tuple[Recipe, float, float]]) -> List[Dict[str, float]]:
+        recipes, volume, boil_gravity = zip(*items)
+        ibu = recipe_ibu_batch(RecipeBatch.from_recipes(recipes), np.array(volume), np.array(boil_gravity))
+        return [{'ibu': value} for value in ibu.tolist()]
+
+    def _parse_colour(self, data: Dict[str, Any]) -> Tuple[Recipe, float, float]:
+        return (Recipe(grists=_grists(data), hops=[]), _positive(data, 'volume', self.volume),
+                _number(data, 'efficiency', self.efficiency))
+
+    @staticmethod
+    def _colour_batch(items: List[Tuple[Recipe, float, float]]) -> List[Dict[str, float]]:
+        recipes, volume, efficiency = zip(*items)
+        ebc = graham_recipe_ebc_batch(RecipeBatch.from_recipes(recipes), np.array(volume), np.array(efficiency))
+        return [{'ebc': value} for value in ebc.tolist()]
+
+    # HTTP
+
+    async def handle(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        """Responds to one request, as (status, JSON body)"""
+        if path == '/health':
+            return 200, {'status': 'ok', 'pending': {name: batcher.pending for name, batcher in self.batchers.items()}}
+        if path not in self.endpoints:
+            return 404, {'error': f"No endpoint {path}"}
+        if method != 'POST':
+            return 405, {'error': f"{path} only accepts POST"}
+        try:
+            data = json.loads(body)
+        except ValueError as error:
+            return 400, {'error': f"Invalid JSON: {error}"}
+
+        parse, function = self.endpoints[path]
+        if path not in self.batchers:
+            self.batchers[path] = MicroBatcher(function, **self._batcher_options)
+        batcher = self.batchers[path]
+        items = data if isinstance(data, list) else [data]
+        try:
+            if not all(isinstance(item, dict) for item in items):
+                raise RequestError(400, "Expected a JSON object, or a list of them")
+            parsed = [parse(item) for item in items]
+        except RequestError as error:
+            return error.status, {'error': str(error)}
+        results = await asyncio.gather(*(batcher.submit(item) for item in parsed))
+        return 200, results if isinstance(data, list) else results[0]
+
+    @staticmethod
+    async def _read_head(reader: asyncio.StreamReader, request_line: bytes) -> Tuple[str, str, str, Dict[str, str]]:
+        """The method, path, version and (lower cased) headers of a request"""
+        parts = request_line.decode('latin-1').split()
+        if len(parts) != 3 or not parts[2].startswith('HTTP/'):
+            raise RequestError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, colon, value = line.decode('latin-1').partition(':')
+            if not colon or not name.strip():
+                raise RequestError(400, "Malformed header")
+            headers[name.strip().lower()] = value.strip()
+        length = headers.get('content-length', '0')
+        if not length.isdigit():
+            raise RequestError(400, "Content-Length should be a non-negative integer")
+        return parts[0], parts[1], parts[2], headers
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, response: Any, keep_alive: bool):
+        payload = json.dumps(_finite(response), allow_nan=False).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+            .encode('latin-1') + payload
+        )
+        await writer.drain()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, path, version, headers = await self._read_head(reader, request_line)
+                except RequestError as error:
+                    # The rest of the stream cannot be trusted, so the connection is closed after the response
+                    await self._respond(writer, error.status, {'error': str(error)}, keep_alive=False)
+                    break
+
+                length = int(headers.get('content-length', '0'))
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                if length > self.max_body_size:
+                    status, response = 413, {'error': f"Bodies are limited to {self.max_body_size} bytes"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    try:
+                        status, response = await self.handle(method, path.split('?')[0], body)
+                    except Exception as error:
+                        status, response = 500, {'error': str(error)}
+
+                await self._respond(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> asyncio.AbstractServer:
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        return self._server
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """The bound (host, port), useful when started on port 0"""
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for batcher in self.batchers.values():
+            await batcher.close()
+
+
+async def serve(server: CalcServer):
+    await server.start()
+    print(f"Serving on http://{server.address[0]}:{server.address[1]}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='brew_maths.server', description='Serve the calc functions over HTTP')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-batch-size', type=int, default=256, help='Most requests evaluated together')
+    parser.add_argument('--max-wait-ms', type=float, default=2,
+                        help='Milliseconds a request waits for others to batch with')
+    parser.add_argument('--max-pending', type=int, default=4096,
+                        help='Requests queued per endpoint before connections are no longer read')
+    parser.add_argument('--volume', type=float, default=23, help='Default volume in litres')
+    parser.add_argument('--efficiency', type=float, default=0.75, help='Default efficiency')
+    parser.add_argument('--attenuation', type=float, default=0.62, help='Default attenuation')
+    parser.add_argument('--abv', choices=sorted(ABV_FORMULAS), default='www', help='ABV formula of /evaluate')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    server = CalcServer(args.host, args.port, args.max_batch_size, args.max_wait_ms / 1000, args.max_pending,
+                        args.volume, args.efficiency, args.attenuation, args.abv)
+    try:
+        asyncio.run(serve(server))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
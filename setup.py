@@ -1,12 +1,15 @@
 from pathlib import Path
 
-from setuptools import setup
+from setuptools import setup, find_packages
 
 setup(
     name="brew_maths",
     version="0.0.1",
     description="A Recipe Calculation Module",
     author="James Blackburn",
-    packages=['brew_maths'],
+    packages=find_packages(include=['brew_maths', 'brew_maths.*']),
     install_requires=Path('./requirements.txt').read_text(encoding='utf-8').splitlines(),
+    entry_points={
+        'console_scripts': ['brew_maths=brew_maths.cli:main'],
+    },
 )
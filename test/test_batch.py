@@ -0,0 +1,174 @@
+"""
+Checks that the batch calculations agree exactly with the scalar calculations
+"""
+import random
+import unittest
+
+import numpy as np
+
+from brew_maths.calc.abv import gov_uk_abv, gov_uk_abv_batch, gov_uk_abv_full, gov_uk_abv_full_batch, \
+    gov_uk_abv_sanity_check_batch, find_gov_uk_factor, find_gov_uk_factor_batch
+from brew_maths.calc.ebc import graham_recipe_ebc, graham_recipe_ebc_batch
+from brew_maths.calc.final_gravity import final_gravity, final_gravity_batch
+from brew_maths.calc.hop_bitterness import hop_ibu, hop_ibu_batch, recipe_ibu_batch, hop_masses_for_ibu, \
+    hop_masses_for_ibu_batch
+from brew_maths.calc.hop_util import utilization, utilization_batch
+from brew_maths.calc.original_gravity import original_gravity, original_gravity_batch, \
+    masses_for_original_gravity, masses_for_original_gravity_batch
+from brew_maths.recipe_objects.batch import RecipeBatch
+from brew_maths.recipe_objects.grist import GristRecipe, GristMetadata
+from brew_maths.recipe_objects.hop import HopRecipe, HopMetadata
+from brew_maths.recipe_objects.recipe import Recipe
+
+
+def random_recipes(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    recipes = []
+    for _ in range(count):
+        grists = [
+            GristRecipe(ebc=rng.uniform(2, 1500),
+                        mashable=rng.random() < 0.8,
+                        extract=rng.uniform(200, 380),
+                        moisture=rng.uniform(0, 30),
+                        fermentability=rng.choice([None, None, 1, 0.75]),
+                        metadata=GristMetadata(name='Grist'),
+                        mass=rng.uniform(0, 5000))
+            for _ in range(rng.randint(0, 6))
+        ]
+        hops = [
+            HopRecipe(alpha=rng.uniform(0.02, 0.17),
+                      metadata=HopMetadata(name='Hop'),
+                      mass=rng.uniform(0, 100),
+                      time=rng.choice([0, 5, 15, 30, 60, 90]))
+            for _ in range(rng.randint(0, 4))
+        ]
+        recipes.append(Recipe(grists, hops))
+    return recipes
+
+
+class TestRecipeBatch(unittest.TestCase):
+    def setUp(self):
+        self.recipes = random_recipes(200)
+        self.batch = RecipeBatch.from_recipes(self.recipes)
+
+    def test_from_recipes_withNoRecipes(self):
+        batch = RecipeBatch.from_recipes([])
+        self.assertEqual(0, len(batch))
+        self.assertEqual(0, len(original_gravity_batch(batch, 23)))
+
+    def test_original_gravity_batch(self):
+        expected = [original_gravity(recipe.grists, 23, 0.7) for recipe in self.recipes]
+        self.assertEqual(expected, original_gravity_batch(self.batch, 23, 0.7).tolist())
+
+    def test_original_gravity_batch_withPerRecipeParameters(self):
+        volumes = np.linspace(5, 50, len(self.recipes))
+        efficiencies = np.linspace(0.6, 0.85, len(self.recipes))
+        expected = [original_gravity(recipe.grists, volume, efficiency)
+                    for recipe, volume, efficiency in zip(self.recipes, volumes.tolist(), efficiencies.tolist())]
+        self.assertEqual(expected, original_gravity_batch(self.batch, volumes, efficiencies).tolist())
+
+    def test_final_gravity_batch(self):
+        expected = [final_gravity(recipe.grists, 23, 0.75, 0.62) for recipe in self.recipes]
+        self.assertEqual(expected, final_gravity_batch(self.batch, 23, 0.75, 0.62).tolist())
+
+    def test_graham_recipe_ebc_batch(self):
+        expected = [graham_recipe_ebc(recipe.grists, 23, 0.75) for recipe in self.recipes]
+        self.assertEqual(expected, graham_recipe_ebc_batch(self.batch, 23, 0.75).tolist())
+
+    def test_utilization_batch(self):
+        expected = [utilization(hop, 1.055) for recipe in self.recipes for hop in recipe.hops]
+        self.assertEqual(expected, utilization_batch(self.batch, 1.055).tolist())
+
+    def test_hop_ibu_batch(self):
+        boil_gravities = np.linspace(1.030, 1.080, len(self.recipes))
+        expected = [hop_ibu(hop, 23, boil_gravity)
+                    for recipe, boil_gravity in zip(self.recipes, boil_gravities.tolist()) for hop in recipe.hops]
+        self.assertEqual(expected, hop_ibu_batch(self.batch, 23, boil_gravities).tolist())
+
+    def test_masses_for_original_gravity_batch(self):
+        recipes = [recipe for recipe in self.recipes if recipe.grists]
+        batch = RecipeBatch.from_recipes(recipes)
+        percentages = np.linspace(1, 2, len(batch.grist_mass))
+        targets = np.linspace(30, 70, len(recipes))
+        for by in ('mass', 'extract'):
+            masses = masses_for_original_gravity_batch(batch, percentages, targets, 23, 0.75, by=by)
+            for index, (recipe, target) in enumerate(zip(recipes, targets.tolist())):
+                start, end = batch.grist_offsets[index], batch.grist_offsets[index + 1]
+                expected = masses_for_original_gravity(recipe.grists, percentages[start:end].tolist(), target, 23,
+                                                       0.75, by=by)
+                np.testing.assert_allclose(expected, masses[start:end])
+
+    def test_hop_masses_for_ibu_batch(self):
+        recipes = [recipe for recipe in self.recipes if any(hop.time for hop in recipe.hops)]
+        for recipe in recipes:
+            for hop in recipe.hops:
+                hop.time = hop.time or 10
+        batch = RecipeBatch.from_recipes(recipes)
+        fractions = np.linspace(1, 2, len(batch.hop_mass))
+        fractions[::3] = np.nan
+        masses = hop_masses_for_ibu_batch(batch, fractions, 1000, 23, 1.06)
+        for index, recipe in enumerate(recipes):
+            start, end = batch.hop_offsets[index], batch.hop_offsets[index + 1]
+            recipe_fractions = [None if np.isnan(fraction) else fraction for fraction in fractions[start:end].tolist()]
+            if all(fraction is None for fraction in recipe_fractions):
+                continue
+            expected = hop_masses_for_ibu(recipe.hops, recipe_fractions, 1000, 23, 1.06)
+            np.testing.assert_allclose(expected, masses[start:end])
+
+    def test_recipe_ibu_batch(self):
+        expected = [sum(hop_ibu(hop, 23, 1.055) for hop in recipe.hops) for recipe in self.recipes]
+        self.assertEqual(expected, recipe_ibu_batch(self.batch, 23, 1.055).tolist())
+
+
+class TestGovUKABVBatch(unittest.TestCase):
+    def setUp(self):
+        # As written in the notice (i.e. 1045.0), covering every band of the table and beyond it
+        self.original_gravities = 1000 + np.linspace(20, 130, 1001)
+        self.final_gravities = 1000 + np.linspace(0, 25, 1001)[::-1]
+
+    def test_find_gov_uk_factor_batch(self):
+        diffs = np.round(np.arange(-5, 110, 0.05), 2)
+        expected = [getattr(find_gov_uk_factor(diff), 'factor', None) for diff in diffs.tolist()]
+        actual = [None if np.isnan(factor) else factor for factor in find_gov_uk_factor_batch(diffs).tolist()]
+        self.assertEqual(expected, actual)
+
+    def test_gov_uk_abv_batch(self):
+        expected = [gov_uk_abv(og, fg) for og, fg in zip(self.original_gravities.tolist(),
+                                                          self.final_gravities.tolist())]
+        self.assertEqual(expected, gov_uk_abv_batch(self.original_gravities, self.final_gravities).tolist())
+
+    def test_gov_uk_abv_full_batch(self):
+        original_gravities = self.original_gravities / 1000
+        final_gravities = self.final_gravities / 1000
+        expected = [gov_uk_abv_full(og, fg) for og, fg in zip(original_gravities.tolist(), final_gravities.tolist())]
+        self.assertEqual(expected, gov_uk_abv_full_batch(original_gravities, final_gravities).tolist())
+        self.assertAlmostEqual(4.515, gov_uk_abv_full(1.045, 1.010))
+
+    def test_gov_uk_abv_batch_withHalfwayDifferences(self):
+        # Only the difference is rounded, and 7.45 is really 7.4500000000000001776..., which python rounds up where
+        # np.round rounds it down (no pair on the notice's scale has exactly this difference)
+        self.assertEqual([gov_uk_abv(7.45, 0.0)], gov_uk_abv_batch(np.array([7.45]), np.array([0.0])).tolist())
+
+    def test_gov_uk_abv_sanity_check_batch(self):
+        expected = []
+        for og, fg in zip(self.original_gravities.tolist(), self.final_gravities.tolist()):
+            try:
+                gov_uk_abv(og, fg, sanity_check=True)
+                expected.append(True)
+            except ValueError:
+                expected.append(False)
+        self.assertEqual(expected, gov_uk_abv_sanity_check_batch(self.original_gravities,
+                                                                 self.final_gravities).tolist())
+        # The gravities cover both outcomes
+        self.assertIn(True, expected)
+        self.assertIn(False, expected)
+        with self.assertRaises(ValueError):
+            gov_uk_abv_batch(self.original_gravities, self.final_gravities, sanity_check=True)
+        passed = np.array(expected)
+        self.assertEqual(gov_uk_abv_batch(self.original_gravities[passed], self.final_gravities[passed]).tolist(),
+                         gov_uk_abv_batch(self.original_gravities[passed], self.final_gravities[passed],
+                                          sanity_check=True).tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import importlib.util
+import unittest
+from pathlib import Path
+
+spec = importlib.util.spec_from_file_location(
+    'run_benchmarks', Path(__file__).resolve().parent.parent / 'benchmarks' / 'run_benchmarks.py')
+run_benchmarks = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(run_benchmarks)
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_every_public_calc_has_a_benchmark(self):
+        missing = [name for name in run_benchmarks.public_calc_names() if name not in run_benchmarks.COVERED]
+        self.assertEqual([], missing)
+
+    def test_compare(self):
+        baseline = {'calc.f': {'small': 1.0, 'large': 10.0}}
+        results = {'calc.f': {'small': 1.9, 'large': 25.0}, 'calc.new': {'small': 5.0}}
+        regressions = run_benchmarks.compare(results, baseline, 2.0)
+        self.assertEqual(1, len(regressions))
+        self.assertIn('calc.f [large]', regressions[0])
+
+    def test_compare_scaled_by_reference(self):
+        baseline = {'calc.f': {'small': 1.0, 'large': 10.0}}
+        results = {'calc.f': {'small': 2.5, 'large': 25.0}}
+        # The machine runs the reference kernel 1.5x slower than when the baseline was recorded
+        regressions = run_benchmarks.compare(results, baseline, 2.0, scale=1.5)
+        self.assertEqual([], regressions)
+        self.assertEqual(2, len(run_benchmarks.compare(results, baseline, 2.0, scale=1.0)))
+        self.assertGreater(run_benchmarks.time_reference(0.001), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import copy
+import dataclasses
+import functools
+import os
+import tempfile
+import unittest
+
+from brew_maths.cache import CalcCache, content_key
+from brew_maths.calc.summary import recipe_summary
+from brew_maths.recipe_objects.grist import GristRecipe, GristMetadata
+from brew_maths.recipe_objects.hop import HopRecipe, HopMetadata
+from brew_maths.recipe_objects.recipe import Recipe
+
+
+def make_recipe(mass=1100):
+    return Recipe(
+        grists=[
+            GristRecipe(ebc=60,
+                        mashable=True,
+                        extract=265,
+                        moisture=3,
+                        fermentability=None,
+                        metadata=GristMetadata(name='Amber Malt'),
+                        mass=mass),
+        ],
+        hops=[HopRecipe(alpha=0.076, metadata=HopMetadata(name='Challenger'), mass=30, time=90)]
+    )
+
+
+CALLS = []
+
+
+def counted_summary(*args):
+    CALLS.append(args)
+    return recipe_summary(*args)
+
+
+@dataclasses.dataclass
+class Scorer:
+    factor: float
+
+    def score(self, value: float) -> float:
+        return value * self.factor
+
+
+class TestContentKey(unittest.TestCase):
+    def test_same_contents_same_key(self):
+        clone = copy.deepcopy(make_recipe())
+        clone.grists[0].metadata = GristMetadata(name='Renamed')
+        self.assertEqual(content_key(make_recipe(), 23), content_key(clone, 23.0))
+
+    def test_different_contents_different_key(self):
+        self.assertNotEqual(content_key(make_recipe(), 23), content_key(make_recipe(1200), 23))
+        self.assertNotEqual(content_key(make_recipe(), 23), content_key(make_recipe(), 24))
+
+    def test_functions_are_keyed_by_their_code(self):
+        def scaled(factor):
+            return lambda volume: volume * factor
+
+        first, second = lambda volume: volume * 2, lambda volume: volume * 3
+        self.assertEqual(first.__qualname__, second.__qualname__)
+        self.assertNotEqual(content_key(first, 23), content_key(second, 23))
+        self.assertNotEqual(content_key(scaled(2), 23), content_key(scaled(3), 23))
+        self.assertEqual(content_key(scaled(2), 23), content_key(scaled(2), 23))
+        self.assertEqual(content_key(recipe_summary, 23), content_key(recipe_summary, 23))
+        self.assertNotEqual(content_key({1: 'x'}), content_key({'1': 'x'}))
+        self.assertNotEqual(content_key(1), content_key('1.0'))
+
+
+class TestCalcCache(unittest.TestCase):
+    def test_wrap(self):
+        cache = CalcCache()
+        summary = cache.wrap(recipe_summary)
+        first = summary(make_recipe(), 23, 27)
+        self.assertIs(first, summary(copy.deepcopy(make_recipe()), volume=23, boil_volume=27))
+        self.assertEqual(recipe_summary(make_recipe(), 23, 27), first)
+        summary(make_recipe(1200), 23, 27)
+
+        stats = cache.stats()
+        self.assertEqual((1, 2, 2), (stats.hits, stats.misses, stats.entries))
+
+    def test_lru_eviction_by_budget(self):
+        cache = CalcCache(max_bytes=150)
+        for key in 'abc':
+            cache.put(key, b'x' * 30)
+        cache.get('a')
+        cache.put('d', b'x' * 30)
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertEqual(1, cache.stats().evictions)
+        self.assertLessEqual(cache.stats().bytes, 150)
+
+    def test_disk_tier(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.sqlite3')
+            cache = CalcCache(path=path)
+            cache.get_or_compute(recipe_summary, make_recipe(), 23, 27)
+            cache.close()
+
+            cache = CalcCache(path=path)
+            calls = []
+            cache.get_or_compute(lambda *args: calls.append(args), make_recipe(), 23, 27)
+            self.assertEqual(1, len(calls))
+            self.assertEqual(recipe_summary(make_recipe(), 23, 27),
+                             cache.get_or_compute(recipe_summary, make_recipe(), 23, 27))
+            self.assertEqual(1, cache.stats().disk_hits)
+            cache.close()
+
+    def test_version(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.sqlite3')
+            CALLS.clear()
+            for version in ('1', '1', '2'):
+                cache = CalcCache(path=path)
+                cache.wrap(counted_summary, version=version)(make_recipe(), 23, 27)
+                cache.close()
+            self.assertEqual(2, len(CALLS))
+            self.assertNotEqual(CalcCache(version='1').key(recipe_summary, make_recipe(), 23, 27),
+                                CalcCache(version='2').key(recipe_summary, make_recipe(), 23, 27))
+
+    def test_closures_methods_and_partials(self):
+        cache = CalcCache()
+        self.assertEqual(20, cache.wrap(Scorer(2).score)(10))
+        self.assertEqual(30, cache.wrap(Scorer(3).score)(10))
+
+        def outer(k):
+            inner = lambda x: x + k  # noqa: E731
+            return lambda x: inner(x)
+
+        self.assertEqual(1, cache.wrap(outer(1))(0))
+        self.assertEqual(2, cache.wrap(outer(2))(0))
+        self.assertEqual(8, cache.wrap(functools.partial(pow, 2))(3))
+        self.assertEqual(9, cache.wrap(functools.partial(pow, 3))(2))
+
+        limits = [1]
+        clamp = cache.wrap(lambda x: min(x, limits[0]))
+        self.assertEqual(1, clamp(5))
+        limits[0] = 4
+        self.assertEqual(4, clamp(5))
+
+        class Opaque:
+            def method(self):
+                return self
+
+        # Neither contents nor identity can key these, so they are refused
+        opaque = Opaque()
+        with self.assertRaises(TypeError):
+            cache.wrap(lambda x: (opaque, x))(1)
+        with self.assertRaises(TypeError):
+            cache.wrap(opaque.method)()
+
+
+if __name__ == '__main__':
+    unittest.main()
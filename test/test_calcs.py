@@ -3,16 +3,25 @@ A set of tests and documentation for the calculations available
 """
 import unittest
 
-from brew_maths.calc.abv import www_alcohol_by_volume_degrees
+import numpy as np
+
+from brew_maths.calc.abv import www_alcohol_by_volume_degrees, ritchie_abv, gov_uk_abv_full, gov_uk_abv_full_batch
 from brew_maths.calc.final_gravity import final_gravity
-from brew_maths.calc.hop_bitterness import hop_ibu
-from brew_maths.calc.hop_util import utilization
+from brew_maths.calc.hop_bitterness import hop_ibu, schedule_ibu, hop_masses_for_ibu
+from brew_maths.calc.hop_util import utilization, UtilizationTable
 from brew_maths.calc.mash_liquor import mash_liquor
-from brew_maths.calc.util import total_mass, percentage_by_mass
+from brew_maths.calc.summary import recipe_summary
+from brew_maths.calc.sweep import sweep
+from brew_maths.calc.util import total_mass, percentage_by_mass, percentages_by_mass
 from brew_maths.calc.ebc import graham_recipe_ebc
-from brew_maths.calc.original_gravity import original_gravity, individual_gravity
+from brew_maths.calc.original_gravity import original_gravity, individual_gravity, masses_for_original_gravity
+from brew_maths.calc.rescale import rescale, rescale_recipes
+from brew_maths.calc.srm import ColourPalette, ebc_to_srm, pack_rgb, philip_lee_srm_to_rgb, \
+    philip_lee_srm_to_rgb_batch, rgb_to_hex, srm_to_ebc
+from brew_maths.recipe_objects.equipment import EquipmentProfile
 from brew_maths.recipe_objects.grist import GristRecipe, GristMetadata
 from brew_maths.recipe_objects.hop import HopRecipe, HopMetadata
+from brew_maths.recipe_objects.recipe import Recipe
 
 
 class TestMisc(unittest.TestCase):
@@ -39,6 +48,17 @@ class TestMisc(unittest.TestCase):
         self.assertEqual(400, total_mass(grists))
         self.assertEqual(0.25, percentage_by_mass(grists[0], grists))
 
+    def test_percentages_by_mass(self):
+        grists = [
+            GristRecipe(
+                0, False, 0, 0, 0, None, 100
+            ),
+            GristRecipe(
+                0, False, 0, 0, 0, None, 300
+            ),
+        ]
+        self.assertEqual([0.25, 0.75], percentages_by_mass(grists))
+
 
 class TestOriginalGravity(unittest.TestCase):
     def test_original_gravity_withMashableMalt(self):
@@ -154,6 +174,56 @@ class TestOriginalGravity(unittest.TestCase):
         grav = individual_gravity(sugar, 10, 0.75)
         self.assertEqual(3.7, round(grav, 1))
 
+    def test_masses_for_original_gravity_byMass(self):
+        grists = [
+            GristRecipe(ebc=60,
+                        mashable=True,
+                        extract=265,
+                        moisture=3,
+                        fermentability=None,
+                        metadata=GristMetadata(name='Amber Malt'),
+                        mass=0),
+            GristRecipe(ebc=50,
+                        mashable=False,
+                        extract=370,
+                        moisture=30,
+                        fermentability=1,
+                        metadata=GristMetadata(name='Sugar, Demerara'),
+                        mass=0),
+        ]
+        masses = masses_for_original_gravity(grists, [0.9, 0.1], 45, 23, 0.75, by='mass')
+        self.assertAlmostEqual(9, masses[0] / masses[1])
+        for grist, mass in zip(grists, masses):
+            grist.mass = mass
+        self.assertAlmostEqual(45, original_gravity(grists, 23, 0.75))
+
+    def test_masses_for_original_gravity_byExtract(self):
+        grists = [
+            GristRecipe(ebc=60,
+                        mashable=True,
+                        extract=265,
+                        moisture=3,
+                        fermentability=None,
+                        metadata=GristMetadata(name='Amber Malt'),
+                        mass=0),
+            GristRecipe(ebc=50,
+                        mashable=False,
+                        extract=370,
+                        moisture=30,
+                        fermentability=1,
+                        metadata=GristMetadata(name='Sugar, Demerara'),
+                        mass=0),
+        ]
+        masses = masses_for_original_gravity(grists, [80, 20], 45, 23, 0.75, by='extract')
+        for grist, mass in zip(grists, masses):
+            grist.mass = mass
+        self.assertAlmostEqual(36, individual_gravity(grists[0], 23, 0.75))
+        self.assertAlmostEqual(9, individual_gravity(grists[1], 23, 0.75))
+
+    def test_masses_for_original_gravity_withInvalidBasis(self):
+        with self.assertRaises(ValueError):
+            masses_for_original_gravity([], [], 45, 23, by='volume')
+
 
 class TestEBC(unittest.TestCase):
     def test_graham_recipe_ebc_withMixedMashability(self):
@@ -303,6 +373,25 @@ class TestIBU(unittest.TestCase):
         # In agreement with Beer Engine
         self.assertEqual(78, round(ibu))
 
+    def test_hop_masses_for_ibu(self):
+        hops = [
+            HopRecipe(alpha=0.076, metadata=HopMetadata(name='Challenger'), mass=0, time=90),
+            HopRecipe(alpha=0.05, metadata=HopMetadata(name='Goldings'), mass=0, time=15),
+            HopRecipe(alpha=0.05, metadata=HopMetadata(name='Goldings'), mass=20, time=5),
+        ]
+        masses = hop_masses_for_ibu(hops, [0.75, 0.25, None], 35, 23, 1.055)
+        self.assertEqual(20, masses[2])
+        for hop, mass in zip(hops, masses):
+            hop.mass = mass
+        ibus = [hop_ibu(hop, 23, 1.055) for hop in hops]
+        self.assertAlmostEqual(35, sum(ibus))
+        self.assertAlmostEqual(3, ibus[0] / ibus[1])
+
+    def test_hop_masses_for_ibu_withTooMuchFixedBitterness(self):
+        hops = [HopRecipe(alpha=0.076, metadata=HopMetadata(name='Challenger'), mass=100, time=90)]
+        with self.assertRaises(ValueError):
+            hop_masses_for_ibu(hops, [None], 35, 23, 1.055)
+
 
 class TestHopUtil(unittest.TestCase):
     def test_util(self):
@@ -316,6 +405,222 @@ class TestHopUtil(unittest.TestCase):
         # agrees ~ with Beer Engine
         self.assertEqual(0.236, round(ut, 3))
 
+    def test_utilization_table(self):
+        hop = HopRecipe(
+            alpha=0.076,  # 7.6%
+            metadata=HopMetadata(name='Challenger'),
+            mass=100,
+            time=90
+        )
+        table = UtilizationTable(1.000, 1.150, 0.001)
+        for gravity in [1.0, 1.0305, 1.055, 1.0987, 1.2]:
+            exact = utilization(hop, gravity)
+            self.assertLessEqual(abs(table.utilization(hop, gravity) - exact), exact * table.error_bound)
+
+    def test_schedule_ibu(self):
+        hops = [
+            HopRecipe(alpha=0.076, metadata=HopMetadata(name='Challenger'), mass=30, time=90),
+            HopRecipe(alpha=0.05, metadata=HopMetadata(name='Goldings'), mass=20, time=15),
+            HopRecipe(alpha=0.05, metadata=HopMetadata(name='Goldings'), mass=20, time=15),
+        ]
+        gravities = [1.030, 1.050, 1.055, 1.080]
+        ibus = schedule_ibu(hops, 23, gravities)
+        for gravity, ibu in zip(gravities, ibus.tolist()):
+            self.assertEqual(sum(hop_ibu(hop, 23, gravity) for hop in hops), ibu)
+
+
+class TestRecipeSummary(unittest.TestCase):
+    def test_recipe_summary(self):
+        recipe = Recipe(
+            grists=[
+                GristRecipe(ebc=60,
+                            mashable=True,
+                            extract=265,
+                            moisture=3,
+                            fermentability=None,
+                            metadata=GristMetadata(name='Amber Malt'),
+                            mass=1100),
+                GristRecipe(ebc=50,
+                            mashable=False,
+                            extract=370,
+                            moisture=30,
+                            fermentability=1,
+                            metadata=GristMetadata(name='Sugar, Demerara'),
+                            mass=6040),
+            ],
+            hops=[
+                HopRecipe(alpha=0.076,
+                          metadata=HopMetadata(name='Challenger'),
+                          mass=100,
+                          time=90)
+            ]
+        )
+        summary = recipe_summary(recipe, 10, 12, 0.75, 0.62)
+        self.assertEqual(original_gravity(recipe.grists, 10, 0.75), summary.original_gravity)
+        self.assertEqual(original_gravity(recipe.grists, 12, 0.75), summary.boil_gravity)
+        self.assertEqual(final_gravity(recipe.grists, 10, 0.75, 0.62), summary.final_gravity)
+        self.assertEqual(40.4, round(summary.abv, 1))
+        self.assertEqual(graham_recipe_ebc(recipe.grists, 10, 0.75), summary.ebc)
+        self.assertEqual(hop_ibu(recipe.hops[0], 10, (1000 + summary.boil_gravity) / 1000), summary.ibu)
+        self.assertEqual(mash_liquor(recipe.grists, 2.5), summary.mash_liquor)
+        self.assertEqual(7140, summary.total_mass)
+        self.assertEqual(percentage_by_mass(recipe.grists[1], recipe.grists), summary.percentages_by_mass[1])
+
+    def test_gov_uk_abv(self):
+        recipe = Recipe(grists=[GristRecipe(ebc=5, mashable=True, extract=300, moisture=3, fermentability=None,
+                                            metadata=GristMetadata(name='Pale Malt'), mass=4000)], hops=[])
+        summary = recipe_summary(recipe, 23, 27, abv_formula=gov_uk_abv_full)
+        self.assertEqual(gov_uk_abv_full((1000 + summary.original_gravity) / 1000,
+                                         (1000 + summary.final_gravity) / 1000), summary.abv)
+        self.assertAlmostEqual(recipe_summary(recipe, 23, 27).abv, summary.abv, delta=0.2)
+
+
+class TestSweep(unittest.TestCase):
+    def test_sweep(self):
+        grists = [
+            GristRecipe(ebc=60,
+                        mashable=True,
+                        extract=265,
+                        moisture=3,
+                        fermentability=None,
+                        metadata=GristMetadata(name='Amber Malt'),
+                        mass=4000),
+            GristRecipe(ebc=50,
+                        mashable=False,
+                        extract=370,
+                        moisture=30,
+                        fermentability=1,
+                        metadata=GristMetadata(name='Sugar, Demerara'),
+                        mass=400),
+        ]
+        volumes = [10, 20, 23]
+        efficiencies = [0.6, 0.7, 0.8, 0.85]
+        result = sweep(grists, volumes, efficiencies, 0.62, abv_formula=ritchie_abv)
+        self.assertEqual(('volume', 'efficiency'), result.dims)
+        self.assertEqual((3, 4), result.abv.shape)
+
+        index = result.index(volume=23, efficiency=0.7)
+        self.assertEqual((2, 1), index)
+        og = original_gravity(grists, 23, 0.7)
+        fg = final_gravity(grists, 23, 0.7, 0.62)
+        self.assertAlmostEqual(og, result.original_gravity[index])
+        self.assertAlmostEqual(fg, result.final_gravity[index])
+        self.assertAlmostEqual(ritchie_abv((1000 + og) / 1000, (1000 + fg) / 1000), result.abv[index])
+        self.assertAlmostEqual(graham_recipe_ebc(grists, 23, 0.7), result.ebc[index])
+
+        gov_uk = sweep(grists, volumes, efficiencies, 0.62, abv_formula=gov_uk_abv_full_batch)
+        self.assertAlmostEqual(gov_uk_abv_full((1000 + og) / 1000, (1000 + fg) / 1000), gov_uk.abv[index])
+        self.assertGreater(gov_uk.abv.min(), 0)
+
+
+class TestRescale(unittest.TestCase):
+    def setUp(self):
+        self.recipe = Recipe(
+            grists=[
+                GristRecipe(ebc=60,
+                            mashable=True,
+                            extract=265,
+                            moisture=3,
+                            fermentability=None,
+                            metadata=GristMetadata(name='Amber Malt'),
+                            mass=4000),
+                GristRecipe(ebc=50,
+                            mashable=False,
+                            extract=370,
+                            moisture=30,
+                            fermentability=1,
+                            metadata=GristMetadata(name='Sugar, Demerara'),
+                            mass=400),
+            ],
+            hops=[HopRecipe(alpha=0.076, metadata=HopMetadata(name='Challenger'), mass=30, time=90)]
+        )
+        self.source = EquipmentProfile(volume=23, efficiency=0.75, boil_off=4)
+        self.kits = [EquipmentProfile(10, 0.6, 2), EquipmentProfile(50, 0.85, 12), EquipmentProfile(23, 0.75, 0)]
+
+    def assertSameStats(self, recipe, scaled, kit):
+        before = recipe_summary(recipe, self.source.volume, self.source.boil_volume, self.source.efficiency)
+        after = recipe_summary(scaled, kit.volume, kit.boil_volume, kit.efficiency)
+        self.assertAlmostEqual(before.original_gravity, after.original_gravity)
+        self.assertAlmostEqual(before.final_gravity, after.final_gravity)
+        self.assertAlmostEqual(before.ebc, after.ebc)
+        self.assertAlmostEqual(before.ibu, after.ibu)
+
+    def test_rescale(self):
+        scaled = rescale(self.recipe, self.source, self.kits[0])
+        self.assertSameStats(self.recipe, scaled, self.kits[0])
+        self.assertEqual('Amber Malt', scaled.grists[0].metadata.name)
+        # Non mashables skip the mash, so only scale with volume
+        self.assertAlmostEqual(400 * 10 / 23, scaled.grists[1].mass)
+        self.assertAlmostEqual(4000 * 10 / 23 * 0.75 / 0.6, scaled.grists[0].mass)
+        self.assertEqual(4000, self.recipe.grists[0].mass)
+
+    def test_rescale_recipes_onto_many_kits(self):
+        scaled = rescale_recipes([self.recipe] * len(self.kits), self.source, self.kits)
+        for recipe, kit in zip(scaled, self.kits):
+            self.assertSameStats(self.recipe, recipe, kit)
+        # Same volume and efficiency, but a smaller (so higher gravity) boil needs more hops
+        self.assertEqual(self.recipe.grists, scaled[2].grists)
+        self.assertGreater(scaled[2].hops[0].mass, 30)
+
+    def test_rescale_to_same_kit(self):
+        self.assertEqual(self.recipe, rescale(self.recipe, self.source, self.source))
+
+
+class TestColour(unittest.TestCase):
+    def setUp(self):
+        self.srms = np.linspace(-5, 60, 1301)
+
+    def test_ebc_srm(self):
+        self.assertAlmostEqual(10, ebc_to_srm(19.7))
+        self.assertAlmostEqual(19.7, srm_to_ebc(10))
+        np.testing.assert_allclose(self.srms, ebc_to_srm(srm_to_ebc(self.srms)))
+        np.testing.assert_allclose([10, 20], ebc_to_srm([19.7, 39.4]))
+        np.testing.assert_allclose([19.7, 39.4], srm_to_ebc([10, 20]))
+
+    def test_srm_to_rgb_batch(self):
+        red, green, blue = philip_lee_srm_to_rgb_batch(self.srms)
+        self.assertEqual([philip_lee_srm_to_rgb(srm) for srm in self.srms.tolist()],
+                         list(zip(red.tolist(), green.tolist(), blue.tolist())))
+
+    def test_hex(self):
+        packed = pack_rgb([255.9, 0, 16.5], [128, 300, 1], [-1, 10.7, 255])
+        self.assertEqual([0xFF8000, 0x00FF0A, 0x1001FF], packed.tolist())
+        self.assertEqual(['#ff8000', '#00ff0a', '#1001ff'], rgb_to_hex(packed).tolist())
+        self.assertEqual((2, 2), rgb_to_hex(np.zeros((2, 2), dtype=np.uint32)).shape)
+
+    def test_palette(self):
+        palette = ColourPalette(step=0.05)
+        srms = self.srms[self.srms >= 0]
+        exact = [philip_lee_srm_to_rgb(srm) for srm in srms.tolist()]
+        for srm, (red, green, blue), packed in zip(srms.tolist(), exact, palette.packed(srms).tolist()):
+            for channel, shift in ((red, 16), (green, 8), (blue, 0)):
+                self.assertLessEqual(abs(int(channel) - (packed >> shift & 0xFF)), 28.7 * 0.05 / 2 + 1, srm)
+        # The grid points themselves are exact
+        grid = np.arange(0, 40, 0.5)
+        self.assertEqual(rgb_to_hex(pack_rgb(*philip_lee_srm_to_rgb_batch(grid))).tolist(),
+                         palette.hex(grid).tolist())
+        self.assertEqual(palette.hex(ebc_to_srm(np.array([30.0]))).tolist(), palette.from_ebc([30.0]).tolist())
+
+    def test_palette_beyond_grid(self):
+        palette = ColourPalette(srm_max=10)
+        self.assertEqual(['#9c3300', '#280000', '#fdf2b3'], palette.hex([20, 40, 0]).tolist())
+        self.assertEqual(rgb_to_hex(pack_rgb(*philip_lee_srm_to_rgb_batch(np.array([20.0, 40.0])))).tolist(),
+                         palette.hex(np.array([20.0, 40.0])).tolist())
+        self.assertEqual(pack_rgb(*philip_lee_srm_to_rgb(12.5)), palette.packed(12.5))
+        with self.assertRaises(ValueError):
+            palette.hex([5, float('nan')])
+
+    def test_palette_green_cutoff(self):
+        srms = np.concatenate([np.linspace(34.5, 35.5, 201), [35.0, 35.01, 35.04, 35.05]])
+        for step in (0.1, 0.3):
+            palette = ColourPalette(step=step)
+            for srm, packed in zip(srms.tolist(), palette.packed(srms).tolist()):
+                red, green, blue = philip_lee_srm_to_rgb(srm)
+                self.assertEqual(int(green) == 0, packed >> 8 & 0xFF == 0, srm)
+                self.assertLessEqual(abs(int(red) - (packed >> 16)), 5.81 * step + 1, srm)
+                self.assertEqual(int(blue), packed & 0xFF, srm)
+        self.assertEqual([0x440000, 0x450700], ColourPalette().packed([35.01, 35.0]).tolist())
+
 
 if __name__ == '__main__':
     unittest.main()
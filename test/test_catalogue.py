@@ -0,0 +1,68 @@
+import unittest
+
+from brew_maths.calc.ebc import graham_recipe_ebc
+from brew_maths.calc.final_gravity import final_gravity
+from brew_maths.calc.hop_bitterness import hop_ibu
+from brew_maths.calc.mash_liquor import mash_liquor
+from brew_maths.calc.original_gravity import original_gravity
+from brew_maths.recipe_objects.batch import RecipeBatch
+from brew_maths.recipe_objects.catalogue import IngredientCatalogue
+from brew_maths.recipe_objects.grist import GristRecipe, GristMetadata, GristLine
+from brew_maths.recipe_objects.hop import HopRecipe, HopMetadata
+from brew_maths.recipe_objects.recipe import Recipe
+
+
+def amber_malt(mass):
+    return GristRecipe(ebc=60,
+                       mashable=True,
+                       extract=265,
+                       moisture=3,
+                       fermentability=None,
+                       metadata=GristMetadata(name='Amber Malt'),
+                       mass=mass)
+
+
+def demerara(mass):
+    return GristRecipe(ebc=50,
+                       mashable=False,
+                       extract=370,
+                       moisture=30,
+                       fermentability=1,
+                       metadata=GristMetadata(name='Sugar, Demerara'),
+                       mass=mass)
+
+
+class TestIngredientCatalogue(unittest.TestCase):
+    def setUp(self):
+        self.catalogue = IngredientCatalogue()
+        self.recipe = Recipe(
+            grists=[amber_malt(1100), demerara(400)],
+            hops=[HopRecipe(alpha=0.076, metadata=HopMetadata(name='Challenger'), mass=30, time=90)]
+        )
+
+    def test_definitions_are_interned(self):
+        first = self.catalogue.recipe(self.recipe)
+        second = self.catalogue.recipe(Recipe([amber_malt(3000)], []))
+        self.assertIs(first.grists[0].grist, second.grists[0].grist)
+        self.assertEqual(3, len(self.catalogue))
+        self.assertEqual(3000, second.grists[0].mass)
+
+    def test_lines_have_no_instance_dict(self):
+        line = self.catalogue.grist_line(amber_malt(100))
+        self.assertFalse(hasattr(line, '__dict__'))
+        self.assertEqual('Amber Malt', line.metadata.name)
+
+    def test_calcs_accept_lines(self):
+        lines = self.catalogue.recipe(self.recipe)
+        self.assertIsInstance(lines.grists[0], GristLine)
+        self.assertEqual(original_gravity(self.recipe.grists, 10), original_gravity(lines.grists, 10))
+        self.assertEqual(final_gravity(self.recipe.grists, 10), final_gravity(lines.grists, 10))
+        self.assertEqual(graham_recipe_ebc(self.recipe.grists, 10), graham_recipe_ebc(lines.grists, 10))
+        self.assertEqual(mash_liquor(self.recipe.grists), mash_liquor(lines.grists))
+        self.assertEqual(hop_ibu(self.recipe.hops[0], 10, 1.05), hop_ibu(lines.hops[0], 10, 1.05))
+        self.assertEqual(RecipeBatch.from_recipes([self.recipe]).grist_extract.tolist(),
+                         RecipeBatch.from_recipes([lines]).grist_extract.tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import io
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from brew_maths.calc.abv import gov_uk_abv_full
+from brew_maths.calc.final_gravity import final_gravity
+from brew_maths.calc.original_gravity import original_gravity
+from brew_maths.cli import evaluate, main
+from brew_maths.recipe_objects.serialization import recipe_from_dict
+
+RECORDS = [
+    {'id': 'bitter', 'volume': 10, 'grists': [
+        {'ebc': 60, 'mashable': True, 'extract': 265, 'moisture': 3, 'fermentability': None, 'mass': 1100},
+        {'ebc': 50, 'mashable': False, 'extract': 370, 'moisture': 30, 'fermentability': 1, 'mass': 40},
+    ], 'hops': [{'alpha': 0.076, 'mass': 30, 'time': 90}]},
+    {'id': 'empty'},
+    {'id': 'mild', 'efficiency': 0.65, 'grists': [
+        {'ebc': 5, 'mashable': True, 'extract': 300, 'moisture': 3, 'fermentability': None, 'mass': 3000},
+    ]},
+]
+
+CSV = """id,volume,kind,name,ebc,mashable,extract,moisture,fermentability,alpha,mass,time
+bitter,10,grist,Amber Malt,60,true,265,3,,,1100,
+bitter,10,grist,Demerara,50,false,370,30,1,,40,
+bitter,10,hop,Challenger,,,,,,0.076,30,90
+"""
+
+
+class TestCLI(unittest.TestCase):
+    def test_evaluate(self):
+        for workers in (1, 2):
+            results = list(evaluate(RECORDS, volume=23, chunk_size=2, workers=workers))
+            self.assertEqual(['bitter', 'empty', 'mild'], [result['id'] for result in results])
+            grists = recipe_from_dict(RECORDS[2]).grists
+            self.assertEqual(original_gravity(grists, 23, 0.65), results[2]['original_gravity'])
+            self.assertEqual(final_gravity(grists, 23, 0.65), results[2]['final_gravity'])
+
+    def test_evaluate_withGovUK(self):
+        result = list(evaluate(RECORDS[2:], volume=23, abv='gov_uk', workers=1))[0]
+        expected = gov_uk_abv_full((1000 + result['original_gravity']) / 1000, (1000 + result['final_gravity']) / 1000)
+        self.assertGreater(result['abv'], 0)
+        self.assertEqual(expected, result['abv'])
+
+    def test_main_withCSV(self):
+        with tempfile.TemporaryDirectory() as directory:
+            Path(directory, 'recipes.csv').write_text(CSV)
+            output = io.StringIO()
+            with redirect_stdout(output):
+                main([str(Path(directory, 'recipes.csv')), '--workers', '1'])
+        result, = [json.loads(line) for line in output.getvalue().splitlines()]
+        expected, = evaluate(RECORDS[:1], workers=1)
+        self.assertEqual(expected, result)
+
+
+if __name__ == '__main__':
+    unittest.main()
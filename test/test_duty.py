@@ -0,0 +1,71 @@
+import datetime
+import unittest
+from decimal import Decimal, ROUND_HALF_UP
+
+from brew_maths.duty import DutyLedger, DutyRules, ProductionRecord, assess, duty_ledger, record_from_dict
+
+
+def record(day, volume, original_gravity, present_gravity, product='Bitter'):
+    return ProductionRecord(day, product, volume, original_gravity, present_gravity)
+
+
+class TestAssess(unittest.TestCase):
+    def test_rounding(self):
+        # 35.0 x 0.129 = 4.515, declared as 4.5
+        assessed = assess(record(datetime.date(2024, 1, 5), 1234.5, 1045.0, 1010.0))
+        self.assertEqual(Decimal('4.5'), assessed.abv)
+        self.assertEqual('3.5_to_8.4', assessed.band)
+        self.assertEqual(Decimal('12.34'), assessed.hectolitres)
+        self.assertEqual(Decimal('55.53'), assessed.litres_of_alcohol)
+
+    def test_rules(self):
+        rules = DutyRules(abv_rounding=ROUND_HALF_UP)
+        # 24.1 x 0.128 = 3.0848
+        assessed = assess(record(datetime.date(2024, 1, 5), 1000, 1030.0, 1005.9), rules)
+        self.assertEqual(Decimal('3.1'), assessed.abv)
+        self.assertEqual('below_3.5', assessed.band)
+
+    def test_outside_of_table(self):
+        with self.assertRaises(ValueError):
+            assess(record(datetime.date(2024, 1, 5), 1000, 1120.0, 1010.0))
+
+    def test_record_from_dict(self):
+        row = {'date': '2024-02-29', 'product': 'Mild', 'volume': '500', 'original_gravity': '1035.2',
+               'present_gravity': '1008.0'}
+        self.assertEqual(record(datetime.date(2024, 2, 29), 500, 1035.2, 1008.0, 'Mild'), record_from_dict(row))
+
+
+class TestDutyLedger(unittest.TestCase):
+    def setUp(self):
+        self.records = [
+            record(datetime.date(2024, 1, 5), 1000, 1045.0, 1010.0),
+            record(datetime.date(2024, 1, 20), 1000, 1045.0, 1010.0),
+            record(datetime.date(2024, 1, 21), 2000, 1030.0, 1005.9, 'Light'),
+            record(datetime.date(2024, 2, 2), 500, 1045.0, 1010.0),
+        ]
+
+    def test_lines(self):
+        lines = duty_ledger(iter(self.records))
+        self.assertEqual([('2024-01', 'below_3.5'), ('2024-01', '3.5_to_8.4'), ('2024-02', '3.5_to_8.4')],
+                         [(line.period, line.band) for line in lines])
+        self.assertEqual(2, lines[1].batches)
+        self.assertEqual(Decimal('20.00'), lines[1].hectolitres)
+        self.assertEqual(Decimal('90.00'), lines[1].litres_of_alcohol)
+        self.assertEqual(Decimal('60.00'), lines[0].litres_of_alcohol)  # 3.0% of 20 hl
+
+    def test_quarters(self):
+        ledger = DutyLedger(period='quarter')
+        ledger.extend(self.records)
+        self.assertEqual({'2024-Q1'}, {line.period for line in ledger.lines()})
+        self.assertEqual(4, sum(line.batches for line in ledger.lines()))
+
+    def test_on_error(self):
+        errors = []
+        lines = duty_ledger(self.records + [record(datetime.date(2024, 3, 1), 10, 1200, 1000)],
+                            on_error=lambda bad, error: errors.append(bad))
+        self.assertEqual(1, len(errors))
+        self.assertEqual(3, len(lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
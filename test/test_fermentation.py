@@ -0,0 +1,105 @@
+import asyncio
+import datetime
+import math
+import random
+import unittest
+
+import numpy as np
+
+from brew_maths.calc.abv import gov_uk_abv_full, gov_uk_abv_full_batch, ritchie_abv, www_alcohol_by_volume
+from brew_maths.fermentation import FermentationMonitor, Reading, fermentation_metrics_batch
+
+
+def fermentation_log(fermenters: int = 3, readings: int = 200, seed: int = 0):
+    """Interleaved readings every 15 minutes, each fermenter dropping exponentially towards its final gravity"""
+    rng = random.Random(seed)
+    log = []
+    for reading in range(readings):
+        for fermenter in range(fermenters):
+            hours = reading / 4
+            gravity = 1.010 + (0.040 + fermenter * 0.005) * math.exp(-hours / 20) + rng.gauss(0, 0.0002)
+            log.append(Reading(f'FV{fermenter}', 1.6e9 + hours * 3600 + rng.uniform(0, 30), gravity))
+    return log
+
+
+class TestFermentationMonitor(unittest.TestCase):
+    def test_linear_drop(self):
+        monitor = FermentationMonitor(window=4)
+        start = datetime.datetime(2024, 1, 1)
+        metrics = [monitor.update('FV1', start + datetime.timedelta(hours=hour), 1.050 - hour * 0.001)
+                   for hour in range(10)]
+        self.assertTrue(math.isnan(metrics[0].rate))
+        for metric in metrics[1:]:
+            self.assertAlmostEqual(1, metric.rate)
+        last = metrics[-1]
+        self.assertEqual(1.050, last.original_gravity)
+        self.assertAlmostEqual(www_alcohol_by_volume(1.050, 1.041), last.abv)
+        self.assertAlmostEqual(0.18, last.apparent_attenuation)
+
+    def test_fermenters_are_independent(self):
+        monitor = FermentationMonitor(original_gravities={'FV2': 1.060})
+        monitor.update('FV1', 0, 1.040)
+        metric = monitor.update('FV2', 0, 1.050)
+        self.assertEqual(1.060, metric.original_gravity)
+        self.assertEqual(1.040, monitor.update('FV1', 60, 1.039).original_gravity)
+
+    def test_window_is_bounded(self):
+        monitor = FermentationMonitor(window=5)
+        list(monitor.process(fermentation_log(readings=50)))
+        self.assertEqual(5, len(monitor._fermenters['FV0'].window))
+
+    def test_aprocess(self):
+        log = fermentation_log(readings=10)
+
+        async def readings():
+            for reading in log:
+                yield reading
+
+        async def collect():
+            return [metrics async for metrics in FermentationMonitor().aprocess(readings())]
+
+        # repr, as the first rates are NaN
+        self.assertEqual(list(map(repr, FermentationMonitor().process(log))),
+                         list(map(repr, asyncio.run(collect()))))
+
+
+class TestFermentationMetricsBatch(unittest.TestCase):
+    def test_matches_streaming(self):
+        log = fermentation_log()
+        streamed = list(FermentationMonitor(abv_formula=ritchie_abv, window=8).process(log))
+        shuffled = random.Random(1).sample(log, len(log))
+        position = {reading: index for index, reading in enumerate(log)}
+        fermenters, timestamps, gravities = map(np.array, zip(*shuffled))
+        batch = fermentation_metrics_batch(fermenters, timestamps, gravities, ritchie_abv, window=8, chunk_size=64)
+
+        expected = [streamed[position[reading]] for reading in shuffled]
+        for field in ['original_gravity', 'abv', 'apparent_attenuation', 'rate']:
+            np.testing.assert_allclose([getattr(metrics, field) for metrics in expected], getattr(batch, field),
+                                       rtol=1e-9, equal_nan=True)
+
+    def test_backfill_then_stream(self):
+        log = fermentation_log()
+        streamed = list(FermentationMonitor().process(log))
+        monitor = FermentationMonitor()
+        monitor.backfill(*zip(*log[:300]))
+        for expected, reading in zip(streamed[300:], log[300:]):
+            actual = monitor.update(*reading)
+            self.assertEqual(expected.original_gravity, actual.original_gravity)
+            self.assertAlmostEqual(expected.rate, actual.rate)
+
+    def test_gov_uk_abv(self):
+        log = fermentation_log(fermenters=1, readings=50)
+        monitor = FermentationMonitor(abv_formula=gov_uk_abv_full_batch)
+        batch = monitor.backfill(*zip(*log))
+        # The readings are in order, so the first is the original gravity
+        np.testing.assert_allclose([gov_uk_abv_full(log[0].gravity, reading.gravity) for reading in log], batch.abv)
+        self.assertGreater(batch.abv[-1], 2)
+        self.assertAlmostEqual(gov_uk_abv_full(log[0].gravity, 1.012), monitor.update('FV0', 1.7e9, 1.012).abv)
+
+    def test_empty(self):
+        batch = fermentation_metrics_batch(np.array([]), np.array([]), np.array([]))
+        self.assertEqual(0, len(batch.rate))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+
+import numpy as np
+
+from brew_maths.calc.abv import www_alcohol_by_volume, ritchie_abv, gov_uk_abv
+from brew_maths.calc.ebc import graham_recipe_ebc
+from brew_maths.calc.formulas import ABV_FORMULAS, FORMULAS, FormulaRegistry
+from brew_maths.calc.srm import philip_lee_srm_to_rgb
+from brew_maths.recipe_objects.batch import RecipeBatch
+from test_batch import random_recipes
+
+
+class TestFormulaRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = FormulaRegistry()
+        self.calls = []
+
+        def double(value):
+            self.calls.append('scalar')
+            return value * 2
+
+        def double_batch(values):
+            self.calls.append('batch')
+            return values * 2
+
+        self.registry.register('double', 'plain', double, double_batch)
+        self.registry.register('double', 'scalar_only', double)
+
+    def test_dispatch(self):
+        self.assertEqual(4, self.registry.evaluate('double', 2))
+        self.assertEqual([2, 4], self.registry.evaluate('double', np.array([1, 2])).tolist())
+        self.assertEqual(['scalar', 'batch'], self.calls)
+
+    def test_scalar_only_models_take_arrays(self):
+        self.assertEqual([2, 4, 6], self.registry.evaluate('double', np.array([1, 2, 3]),
+                                                           model='scalar_only').tolist())
+
+    def test_defaults(self):
+        self.assertEqual('plain', self.registry.default('double'))
+        function = self.registry.function('double')
+        self.assertEqual([2, 4], function(np.array([1, 2])).tolist())
+        self.assertEqual(['batch'], self.calls)
+        # Swapping the default swaps the model of every function following it
+        self.registry.set_default('double', 'scalar_only')
+        self.assertEqual([2, 4], function(np.array([1, 2])).tolist())
+        self.assertEqual(['batch'], self.calls[:1])
+        self.assertNotIn('batch', self.calls[1:])
+
+    def test_unknown(self):
+        with self.assertRaises(KeyError):
+            self.registry.evaluate('triple', 1)
+        with self.assertRaises(KeyError):
+            self.registry.evaluate('double', 1, model='missing')
+        with self.assertRaises(ValueError):
+            self.registry.register('double', 'plain', abs)
+
+    def test_unregister(self):
+        self.registry.unregister('double', 'plain')
+        self.assertEqual('scalar_only', self.registry.default('double'))
+        self.registry.unregister('double', 'scalar_only')
+        self.assertEqual([], self.registry.quantities())
+
+
+class TestFormulas(unittest.TestCase):
+    def test_abv_models(self):
+        self.assertEqual(ritchie_abv(1.050, 1.010), FORMULAS.evaluate('abv', 1.050, 1.010, model='ritchie'))
+        self.assertEqual(gov_uk_abv(1050, 1010), FORMULAS.evaluate('abv', 1.050, 1.010, model='gov_uk'))
+        self.assertEqual(['gov_uk', 'ritchie', 'www'], sorted(ABV_FORMULAS))
+        self.assertEqual(gov_uk_abv(1050, 1010), ABV_FORMULAS['gov_uk'](np.array([1.050]), np.array([1.010]))[0])
+
+    def test_compare(self):
+        # Realistic full gravities, where every model should agree to within 10%
+        og = np.linspace(1.030, 1.090, 7)
+        fg = np.array([1.006, 1.008, 1.010, 1.012, 1.014, 1.016, 1.018])
+        compared = FORMULAS.compare('abv', og, fg)
+        self.assertEqual(['www', 'ritchie', 'gov_uk'], list(compared))
+        self.assertEqual(www_alcohol_by_volume(og, fg).tolist(), compared['www'].tolist())
+        self.assertEqual(ritchie_abv(og, fg).tolist(), compared['ritchie'].tolist())
+        self.assertEqual([gov_uk_abv(o * 1000, f * 1000) for o, f in zip(og.tolist(), fg.tolist())],
+                         compared['gov_uk'].tolist())
+        for model, abv in compared.items():
+            np.testing.assert_allclose(www_alcohol_by_volume(og, fg), abv, rtol=0.1, err_msg=model)
+        self.assertAlmostEqual(3.072, compared['gov_uk'][0])  # 24.0 x 0.128
+
+    def test_batch_inputs(self):
+        recipes = random_recipes(20)
+        batch = RecipeBatch.from_recipes(recipes)
+        self.assertEqual([graham_recipe_ebc(recipe.grists, 23, 0.7) for recipe in recipes],
+                         FORMULAS.evaluate('ebc', batch, 23, 0.7).tolist())
+
+    def test_colour(self):
+        red, green, blue = FORMULAS.evaluate('srm_rgb', np.array([5.0, 20.0]))
+        self.assertEqual(philip_lee_srm_to_rgb(20.0), (red[1], green[1], blue[1]))
+        self.assertEqual(philip_lee_srm_to_rgb(5.0), FORMULAS.evaluate('srm_rgb', 5.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
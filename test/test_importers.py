@@ -0,0 +1,114 @@
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from brew_maths.calc.original_gravity import original_gravity
+from brew_maths.importers.beerxml import iter_beerxml
+from brew_maths.importers.bulk import import_directory
+from brew_maths.recipe_objects.grist import GristType
+
+BEERXML = b"""<?xml version="1.0" encoding="ISO-8859-1"?>
+<RECIPES>
+  <RECIPE>
+    <NAME>Best Bitter</NAME>
+    <VERSION>1</VERSION>
+    <BATCH_SIZE>23.0</BATCH_SIZE>
+    <BOIL_SIZE>27.0</BOIL_SIZE>
+    <EFFICIENCY>75.0</EFFICIENCY>
+    <HOPS>
+      <HOP>
+        <NAME>Challenger</NAME>
+        <ALPHA>7.6</ALPHA>
+        <AMOUNT>0.030</AMOUNT>
+        <USE>Boil</USE>
+        <TIME>90</TIME>
+      </HOP>
+      <HOP>
+        <NAME>Goldings</NAME>
+        <ALPHA>5.0</ALPHA>
+        <AMOUNT>0.020</AMOUNT>
+        <USE>Dry Hop</USE>
+        <TIME>4320</TIME>
+      </HOP>
+    </HOPS>
+    <FERMENTABLES>
+      <FERMENTABLE>
+        <NAME>Pale Malt</NAME>
+        <TYPE>Grain</TYPE>
+        <AMOUNT>4.0</AMOUNT>
+        <YIELD>78.0</YIELD>
+        <COLOR>3</COLOR>
+        <MOISTURE>4</MOISTURE>
+      </FERMENTABLE>
+      <FERMENTABLE>
+        <NAME>Cane Sugar</NAME>
+        <TYPE>Sugar</TYPE>
+        <AMOUNT>0.25</AMOUNT>
+        <YIELD>100.0</YIELD>
+        <COLOR>0</COLOR>
+      </FERMENTABLE>
+    </FERMENTABLES>
+  </RECIPE>
+  <RECIPE>
+    <NAME>SMaSH</NAME>
+    <BATCH_SIZE>10.0</BATCH_SIZE>
+    <FERMENTABLES>
+      <FERMENTABLE>
+        <NAME>Maris Otter</NAME>
+        <TYPE>Grain</TYPE>
+        <AMOUNT>2.0</AMOUNT>
+        <YIELD>80.0</YIELD>
+        <COLOR>3</COLOR>
+      </FERMENTABLE>
+    </FERMENTABLES>
+  </RECIPE>
+</RECIPES>
+"""
+
+
+class TestBeerXML(unittest.TestCase):
+    def test_iter_beerxml(self):
+        bitter, smash = iter_beerxml(io.BytesIO(BEERXML))
+        self.assertEqual('Best Bitter', bitter.name)
+        self.assertEqual((23.0, 27.0, 0.75), (bitter.volume, bitter.boil_volume, bitter.efficiency))
+
+        pale, sugar = bitter.recipe.grists
+        self.assertEqual(4000, pale.mass)
+        self.assertTrue(pale.mashable)
+        self.assertAlmostEqual(299.52, pale.extract)
+        self.assertAlmostEqual(5.91, pale.ebc)
+        self.assertIsNone(pale.fermentability)
+        self.assertFalse(sugar.mashable)
+        self.assertEqual(1, sugar.fermentability)
+        self.assertEqual(GristType.COPPER_SUGAR, sugar.metadata.type)
+
+        challenger, goldings = bitter.recipe.hops
+        self.assertAlmostEqual(0.076, challenger.alpha)
+        self.assertEqual((30, 90), (challenger.mass, challenger.time))
+        self.assertEqual(0, goldings.time)
+
+        self.assertEqual('SMaSH', smash.name)
+        self.assertIsNone(smash.efficiency)
+        self.assertEqual([], smash.recipe.hops)
+
+    def test_imported_recipes_feed_calcs(self):
+        bitter = next(iter_beerxml(io.BytesIO(BEERXML)))
+        og = original_gravity(bitter.recipe.grists, bitter.volume, bitter.efficiency)
+        self.assertEqual(43, round(og))
+
+
+class TestBulkImport(unittest.TestCase):
+    def test_import_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for index in range(3):
+                Path(directory, f'{index}.xml').write_bytes(BEERXML)
+            Path(directory, 'notes.txt').write_text('not a recipe')
+
+            for max_workers in (1, 2):
+                names = [imported.name for imported in import_directory(directory, max_workers=max_workers)]
+                self.assertEqual(['Best Bitter', 'SMaSH'] * 3, names)
+
+
+if __name__ == '__main__':
+    unittest.main()
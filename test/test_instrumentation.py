@@ -0,0 +1,52 @@
+import json
+import unittest
+
+from brew_maths import instrumentation
+from brew_maths.calc import hop_bitterness, hop_util
+from brew_maths.recipe_objects.hop import HopRecipe, HopMetadata
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.hop = HopRecipe(alpha=0.076, metadata=HopMetadata(name='Challenger'), mass=100, time=90)
+        self.original_hop_ibu = hop_bitterness.hop_ibu
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def test_disabled_installs_nothing(self):
+        self.assertFalse(instrumentation.is_enabled())
+        self.assertIs(hop_bitterness.utilization, hop_util.utilization)
+        self.assertFalse(hasattr(hop_util.utilization, '__wrapped__'))
+
+    def test_enable_collects_stats(self):
+        instrumentation.enable()
+        self.assertIsNot(self.original_hop_ibu, hop_bitterness.hop_ibu)
+        for _ in range(3):
+            hop_bitterness.hop_ibu(self.hop, 23, 1.055)
+        hop_bitterness.schedule_ibu([self.hop] * 5, 23, [1.05])
+
+        snapshot = instrumentation.snapshot()
+        self.assertEqual(3, snapshot['brew_maths.calc.hop_bitterness.hop_ibu']['calls'])
+        # hop_ibu calls utilization through its own module's namespace, which is wrapped too
+        self.assertEqual(3, snapshot['brew_maths.calc.hop_util.utilization']['calls'])
+        self.assertEqual({'4-7': 1}, snapshot['brew_maths.calc.hop_bitterness.schedule_ibu']['input_sizes'])
+        self.assertLessEqual(snapshot['brew_maths.calc.hop_bitterness.hop_ibu']['p50_seconds'],
+                             snapshot['brew_maths.calc.hop_bitterness.hop_ibu']['max_seconds'])
+        self.assertEqual(snapshot, json.loads(instrumentation.export_json()))
+
+    def test_disable_restores_originals(self):
+        instrumentation.enable(['brew_maths.calc.hop_bitterness.hop_ibu'])
+        self.assertTrue(instrumentation.is_enabled())
+        instrumentation.disable()
+        self.assertIs(self.original_hop_ibu, hop_bitterness.hop_ibu)
+        self.assertFalse(instrumentation.is_enabled())
+
+    def test_enable_withUnknownFunction(self):
+        with self.assertRaises(ValueError):
+            instrumentation.enable(['brew_maths.calc.hop_util.not_a_function'])
+
+
+if __name__ == '__main__':
+    unittest.main()
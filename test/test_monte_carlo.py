@@ -0,0 +1,80 @@
+import unittest
+
+import numpy as np
+
+from brew_maths.calc.monte_carlo import monte_carlo, Uncertainty
+from brew_maths.calc.summary import recipe_summary
+from brew_maths.recipe_objects.grist import GristRecipe, GristMetadata
+from brew_maths.recipe_objects.hop import HopRecipe, HopMetadata
+from brew_maths.recipe_objects.recipe import Recipe
+
+RECIPE = Recipe(
+    grists=[
+        GristRecipe(ebc=5, mashable=True, extract=300, moisture=3, fermentability=None,
+                    metadata=GristMetadata(name='Pale Malt'), mass=4000),
+        GristRecipe(ebc=60, mashable=True, extract=265, moisture=3, fermentability=None,
+                    metadata=GristMetadata(name='Amber Malt'), mass=500),
+    ],
+    hops=[HopRecipe(alpha=0.076, metadata=HopMetadata(name='Challenger'), mass=30, time=90)]
+)
+
+
+class TestMonteCarlo(unittest.TestCase):
+    def test_no_uncertainty(self):
+        result = monte_carlo(RECIPE, 23, 27, Uncertainty(), samples=1000, chunk_size=300, seed=0)
+        summary = recipe_summary(RECIPE, 23, 27)
+        for stat in ('original_gravity', 'final_gravity', 'abv', 'ebc', 'ibu'):
+            distribution = getattr(result, stat)
+            self.assertAlmostEqual(getattr(summary, stat), distribution.mean)
+            self.assertAlmostEqual(0, distribution.std)
+            self.assertAlmostEqual(getattr(summary, stat), distribution.percentiles[50], places=6)
+        self.assertEqual(1000, result.original_gravity.histogram.sum())
+
+    def test_efficiency_percentiles(self):
+        # Every grist is mashable, so the OG is proportional to the efficiency
+        result = monte_carlo(RECIPE, 23, 27, Uncertainty(efficiency=0.03), samples=200000, seed=1)
+        points_per_efficiency = recipe_summary(RECIPE, 23, 27, efficiency=1).original_gravity
+        distribution = result.original_gravity
+        self.assertAlmostEqual(0.75 * points_per_efficiency, distribution.mean, delta=0.05)
+        self.assertAlmostEqual(0.03 * points_per_efficiency, distribution.std, delta=0.05)
+        self.assertAlmostEqual((0.75 + 1.96 * 0.03) * points_per_efficiency, distribution.percentiles[97.5],
+                               delta=0.1)
+        self.assertGreater(result.ibu.std, 0)  # through the boil gravity
+        self.assertNotEqual(0, result.abv.std)
+
+    def test_moisture_and_alpha(self):
+        result = monte_carlo(RECIPE, 23, 27, Uncertainty(moisture=[2, 0], alpha=0.1), samples=20000, seed=2)
+        summary = recipe_summary(RECIPE, 23, 27)
+        self.assertAlmostEqual(summary.original_gravity, result.original_gravity.mean, delta=0.05)
+        self.assertGreater(result.original_gravity.std, 0)
+        self.assertAlmostEqual(summary.ibu, result.ibu.mean, delta=0.5)
+        self.assertGreater(result.ibu.std, 0.1 * summary.ibu * 0.9)
+
+    def test_reproducible(self):
+        uncertainty = Uncertainty(efficiency=0.03, attenuation=0.05, extract=0.02, moisture=1, alpha=0.1)
+        first = monte_carlo(RECIPE, 23, 27, uncertainty, samples=5000, chunk_size=1000, seed=3)
+        second = monte_carlo(RECIPE, 23, 27, uncertainty, samples=5000, chunk_size=1000,
+                             seed=np.random.default_rng(3))
+        self.assertEqual(first.abv.mean, second.abv.mean)
+        self.assertEqual(first.abv.percentiles, second.abv.percentiles)
+        np.testing.assert_array_equal(first.ebc.histogram, second.ebc.histogram)
+
+    def test_chunk_size_does_not_change_percentiles(self):
+        uncertainty = Uncertainty(efficiency=0.03, attenuation=0.05, extract=0.02, moisture=1, alpha=0.1)
+        results = [monte_carlo(RECIPE, 23, 27, uncertainty, samples=5000, chunk_size=chunk_size, seed=4)
+                   for chunk_size in (1, 7, 5000)]
+        for stat in ('original_gravity', 'final_gravity', 'abv', 'ebc', 'ibu'):
+            distributions = [getattr(result, stat) for result in results]
+            for distribution in distributions:
+                self.assertEqual(0, distribution.out_of_range, stat)
+                for percent in (2.5, 50, 97.5):
+                    self.assertAlmostEqual(distributions[-1].percentiles[percent], distribution.percentiles[percent],
+                                           delta=0.25 * distributions[-1].std, msg=stat)
+
+    def test_negative_deviation(self):
+        with self.assertRaises(ValueError):
+            monte_carlo(RECIPE, 23, 27, Uncertainty(alpha=-0.1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+
+import numpy as np
+
+from brew_maths.calc.optimizer import GristStock, HopStock, RecipeSpec, RecipeTargets, linear_program, \
+    optimize_recipe, optimize_recipes
+from brew_maths.calc.summary import recipe_summary
+from brew_maths.recipe_objects.grist import GristDefinition
+from brew_maths.recipe_objects.hop import HopDefinition
+
+PALE = GristDefinition(ebc=5, mashable=True, extract=300, moisture=3, fermentability=None, name='Pale Malt')
+MARIS = GristDefinition(ebc=6, mashable=True, extract=305, moisture=3, fermentability=None, name='Maris Otter')
+CRYSTAL = GristDefinition(ebc=150, mashable=True, extract=270, moisture=3, fermentability=None, name='Crystal')
+SUGAR = GristDefinition(ebc=0, mashable=False, extract=375, moisture=0, fermentability=1, name='Sugar')
+CHALLENGER = HopDefinition(alpha=0.076, name='Challenger')
+GOLDINGS = HopDefinition(alpha=0.05, name='Goldings')
+
+
+class TestLinearProgram(unittest.TestCase):
+    def test_optimal(self):
+        # maximize 3x + 5y, x <= 4, 2y <= 12, 3x + 2y <= 18 -> (2, 6)
+        result = linear_program([-3, -5], [[1, 0], [0, 2], [3, 2]], [4, 12, 18])
+        self.assertEqual('optimal', result.status)
+        np.testing.assert_allclose([2, 6], result.x)
+        self.assertAlmostEqual(-36, result.objective)
+
+    def test_greater_than(self):
+        # minimize x + y, x + 2y >= 4, 3x + y >= 6 -> (1.6, 1.2)
+        result = linear_program([1, 1], [[-1, -2], [-3, -1]], [-4, -6])
+        np.testing.assert_allclose([1.6, 1.2], result.x)
+
+    def test_infeasible_and_unbounded(self):
+        self.assertEqual('infeasible', linear_program([1], [[1], [-1]], [1, -2]).status)
+        self.assertEqual('unbounded', linear_program([-1, 0], [[-1, 1]], [1]).status)
+
+    def test_degenerate(self):
+        result = linear_program([-10, 57, 9, 24], [[0.5, -5.5, -2.5, 9], [0.5, -1.5, -0.5, 1], [1, 0, 0, 0]],
+                                [0, 0, 1])
+        self.assertEqual('optimal', result.status)
+        self.assertAlmostEqual(-1, result.objective)
+
+
+class TestOptimizeRecipe(unittest.TestCase):
+    def setUp(self):
+        self.grists = [GristStock(PALE, cost=1.5), GristStock(CRYSTAL, cost=3.0)]
+        self.hops = [HopStock(CHALLENGER, time=90, cost=40), HopStock(GOLDINGS, time=15, cost=30)]
+        self.targets = RecipeTargets(original_gravity=(44, 46), ebc=(20, 30), ibu=(30, 35))
+
+    def assertMeetsTargets(self, optimized, targets):
+        summary = recipe_summary(optimized.recipe, 23, 27)
+        for stat in ('original_gravity', 'final_gravity', 'ebc', 'ibu'):
+            target = getattr(targets, stat)
+            if target is not None:
+                self.assertGreaterEqual(getattr(summary, stat), target[0] - 1e-6, stat)
+                self.assertLessEqual(getattr(summary, stat), target[1] + 1e-6, stat)
+
+    def test_cheapest(self):
+        optimized = optimize_recipe(self.grists, self.hops, self.targets, 23, 27)
+        self.assertMeetsTargets(optimized, self.targets)
+        # The cheapest bill is the lowest gravity and colour allowed
+        og_per_kg = np.array([300, 270]) * 0.75 / 23
+        ebc_per_kg = np.array([5, 150]) * 0.75 * 10 / 23
+        expected = np.linalg.solve([og_per_kg, ebc_per_kg], [44, 20]) * 1000
+        np.testing.assert_allclose(expected, optimized.grist_masses)
+        # Challenger gives the most bitterness for its cost
+        self.assertEqual(0, optimized.hop_masses[1])
+        summary = recipe_summary(optimized.recipe, 23, 27)
+        self.assertAlmostEqual(30, summary.ibu)
+        self.assertAlmostEqual(1.5 * expected[0] / 1000 + 3.0 * expected[1] / 1000 +
+                               40 * optimized.hop_masses[0] / 1000, optimized.cost)
+
+    def test_stock_and_percentages(self):
+        grists = [GristStock(PALE, cost=1.5, stock=2000), GristStock(MARIS, cost=2.0),
+                  GristStock(CRYSTAL, cost=3.0), GristStock(SUGAR, cost=1.0, max_percentage=0.1)]
+        hops = [HopStock(CHALLENGER, time=90, cost=40, stock=10), HopStock(GOLDINGS, time=15, cost=30,
+                                                                           min_percentage=0.5)]
+        targets = self.targets._replace(final_gravity=(8, 14))
+        optimized = optimize_recipe(grists, hops, targets, 23, 27)
+        self.assertMeetsTargets(optimized, targets)
+        masses = optimized.grist_masses
+        self.assertAlmostEqual(2000, masses[0])
+        self.assertGreater(masses[1], 0)
+        self.assertLessEqual(masses[3], 0.1 * masses.sum() + 1e-6)
+        self.assertLessEqual(optimized.hop_masses[0], 10 + 1e-9)
+        self.assertGreaterEqual(optimized.hop_masses[1], optimized.hop_masses.sum() * 0.5 - 1e-9)
+
+    def test_infeasible(self):
+        with self.assertRaises(ValueError):
+            optimize_recipe([GristStock(PALE, cost=1.5, stock=1000)], self.hops, self.targets, 23, 27)
+
+    def test_optimize_recipes(self):
+        specs = [RecipeSpec(self.grists, self.hops, self.targets, volume, volume + 4) for volume in (10, 23, 50)]
+        optimized = optimize_recipes(specs)
+        self.assertEqual([optimize_recipe(*spec).cost for spec in specs], [result.cost for result in optimized])
+        self.assertLess(optimized[0].cost, optimized[1].cost)
+        self.assertLess(optimized[1].cost, optimized[2].cost)
+        # Out of crystal, the colour cannot be reached
+        self.assertEqual([None, None, None], optimize_recipes(specs, stock={'Crystal': 0}))
+        self.assertIsNotNone(optimize_recipes(specs, stock={'Crystal': 1000})[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
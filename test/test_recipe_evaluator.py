@@ -0,0 +1,109 @@
+import unittest
+
+from brew_maths.calc.boil_gravity import boil_gravity
+from brew_maths.calc.ebc import graham_recipe_ebc
+from brew_maths.calc.final_gravity import final_gravity
+from brew_maths.calc.hop_bitterness import hop_ibu
+from brew_maths.calc.mash_liquor import mash_liquor
+from brew_maths.calc.original_gravity import original_gravity
+from brew_maths.calc.recipe_evaluator import RecipeEvaluator
+from brew_maths.calc.util import percentage_by_mass
+from brew_maths.recipe_objects.grist import GristRecipe, GristMetadata, GristDefinition, GristLine
+from brew_maths.recipe_objects.hop import HopRecipe, HopMetadata, HopDefinition, HopLine
+from brew_maths.recipe_objects.recipe import Recipe
+
+
+class TestRecipeEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.recipe = Recipe(
+            grists=[
+                GristRecipe(ebc=60,
+                            mashable=True,
+                            extract=265,
+                            moisture=3,
+                            fermentability=None,
+                            metadata=GristMetadata(name='Amber Malt'),
+                            mass=1100),
+                GristRecipe(ebc=50,
+                            mashable=False,
+                            extract=370,
+                            moisture=30,
+                            fermentability=1,
+                            metadata=GristMetadata(name='Sugar, Demerara'),
+                            mass=400),
+            ],
+            hops=[
+                HopRecipe(alpha=0.076,
+                          metadata=HopMetadata(name='Challenger'),
+                          mass=30,
+                          time=90),
+            ]
+        )
+        self.evaluator = RecipeEvaluator(self.recipe, 10, 13, 0.75, 0.62, 2.5)
+
+    def assertAgreesWithCalcs(self):
+        grists, hops = self.recipe.grists, self.recipe.hops
+        self.assertAlmostEqual(original_gravity(grists, 10, 0.75), self.evaluator.original_gravity)
+        self.assertAlmostEqual(final_gravity(grists, 10, 0.75, 0.62), self.evaluator.final_gravity)
+        self.assertAlmostEqual(graham_recipe_ebc(grists, 10, 0.75), self.evaluator.ebc)
+        self.assertAlmostEqual(mash_liquor(grists, 2.5), self.evaluator.mash_liquor)
+        bg = 1 + boil_gravity(grists, 13, 0.75) / 1000
+        for index, hop in enumerate(hops):
+            self.assertAlmostEqual(hop_ibu(hop, 10, bg), self.evaluator.hop_ibu(index))
+        self.assertAlmostEqual(sum(hop_ibu(hop, 10, bg) for hop in hops), self.evaluator.ibu)
+
+    def test_initial_stats(self):
+        self.assertAgreesWithCalcs()
+        self.assertAlmostEqual(percentage_by_mass(self.recipe.grists[0], self.recipe.grists),
+                               self.evaluator.percentage_by_mass(0))
+
+    def test_edits(self):
+        self.evaluator.update_grist(0, mass=4000)
+        self.assertAgreesWithCalcs()
+        self.evaluator.add_grist(GristRecipe(ebc=1300, mashable=True, extract=200, moisture=3, fermentability=0.2,
+                                             metadata=GristMetadata(name='Black Malt'), mass=150))
+        self.assertAgreesWithCalcs()
+        self.evaluator.remove_grist(1)
+        self.assertAgreesWithCalcs()
+        self.evaluator.add_hop(HopRecipe(alpha=0.05, metadata=HopMetadata(name='Goldings'), mass=20, time=15))
+        self.evaluator.update_hop(0, time=60)
+        self.assertAgreesWithCalcs()
+        self.evaluator.remove_hop(0)
+        self.assertAgreesWithCalcs()
+
+    def test_catalogue_lines(self):
+        pale = GristDefinition(ebc=5, mashable=True, extract=300, moisture=3, fermentability=None, name='Pale Malt')
+        challenger = HopDefinition(alpha=0.076, name='Challenger')
+        other = GristLine(pale, 1000)
+        self.evaluator.add_grist(GristLine(pale, 3000))
+        self.evaluator.add_hop(HopLine(challenger, 20, 60))
+        self.evaluator.update_grist(2, ebc=8, fermentability=0.7)
+        self.evaluator.update_hop(1, alpha=0.09)
+        self.assertAgreesWithCalcs()
+        self.assertEqual((8, 0.7, 'Pale Malt'), (self.recipe.grists[2].ebc, self.recipe.grists[2].fermentability,
+                                                 self.recipe.grists[2].metadata.name))
+        self.assertEqual(0.09, self.recipe.hops[1].alpha)
+        # The shared definitions are unchanged
+        self.assertEqual((5, None, 0.076), (pale.ebc, other.fermentability, challenger.alpha))
+        # The metadata stays with the definition
+        with self.assertRaises(AttributeError):
+            self.evaluator.update_grist(2, mass=2000, metadata=GristMetadata(name='Lager Malt'))
+        self.assertAgreesWithCalcs()
+
+    def test_unknown_field(self):
+        with self.assertRaises(AttributeError):
+            self.evaluator.update_grist(0, mass=2000, colour=10)
+        with self.assertRaises(AttributeError):
+            self.evaluator.update_hop(0, bitterness=10)
+        self.assertEqual(1100, self.recipe.grists[0].mass)
+        self.assertAgreesWithCalcs()
+
+    def test_parameters_changed(self):
+        self.evaluator.efficiency = 0.65
+        self.assertAlmostEqual(original_gravity(self.recipe.grists, 10, 0.65), self.evaluator.original_gravity)
+        self.evaluator.attenuation = 0.7
+        self.assertAlmostEqual(final_gravity(self.recipe.grists, 10, 0.65, 0.7), self.evaluator.final_gravity)
+
+
+if __name__ == '__main__':
+    unittest.main()
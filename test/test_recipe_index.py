@@ -0,0 +1,85 @@
+import math
+import random
+import unittest
+
+import numpy as np
+
+from brew_maths.calc.summary import recipe_summary
+from brew_maths.recipe_index import RecipeIndex, RecipeProfile
+from test_batch import random_recipes
+
+
+def brute_force(profiles, target, weights):
+    return sorted((math.sqrt(sum(w * (a - b) ** 2 for w, a, b in zip(weights, profile, target))), key)
+                  for key, profile in profiles.items())
+
+
+class TestRecipeIndex(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(1)
+        self.profiles = {f'recipe {i}': RecipeProfile(*(rng.uniform(0, 100) for _ in range(5))) for i in range(2000)}
+        self.index = RecipeIndex(leaf_size=8)
+        for key, profile in self.profiles.items():
+            self.index.insert_profile(key, profile)
+        self.weights = (1, 2, 0.5, 0, 3)
+        self.targets = [tuple(rng.uniform(0, 100) for _ in range(5)) for _ in range(20)]
+
+    def assertMatchesBruteForce(self):
+        for target in self.targets:
+            expected = brute_force(self.profiles, target, self.weights)
+            nearest = self.index.nearest(target, k=7, weights=self.weights)
+            self.assertEqual([key for _, key in expected[:7]], [key for key, _ in nearest])
+            for (distance, _), (_, found) in zip(expected, nearest):
+                self.assertAlmostEqual(distance, found)
+
+            within = self.index.within(target, 25, weights=self.weights)
+            self.assertEqual([key for distance, key in expected if distance <= 25], [key for key, _ in within])
+
+    def test_matches_brute_force(self):
+        self.assertMatchesBruteForce()
+
+    def test_remove_and_replace(self):
+        rng = random.Random(2)
+        for key in rng.sample(sorted(self.profiles), 1500):
+            self.index.remove(key)
+            del self.profiles[key]
+        for key in rng.sample(sorted(self.profiles), 100):
+            self.profiles[key] = RecipeProfile(*(rng.uniform(0, 100) for _ in range(5)))
+            self.index.insert_profile(key, self.profiles[key])
+        self.assertEqual(len(self.profiles), len(self.index))
+        self.assertMatchesBruteForce()
+
+    def test_remove_missing(self):
+        with self.assertRaises(KeyError):
+            self.index.remove('missing')
+
+    def test_k_larger_than_index(self):
+        index = RecipeIndex()
+        index.insert_profile('only', (1, 2, 3, 4, 5))
+        self.assertEqual([('only', 0.0)], index.nearest((1, 2, 3, 4, 5), k=3))
+        self.assertEqual([], index.nearest((1, 2, 3, 4, 5), k=0))
+
+    def test_bad_weights(self):
+        with self.assertRaises(ValueError):
+            self.index.nearest(self.targets[0], weights=(1, 1, 1))
+        with self.assertRaises(ValueError):
+            self.index.nearest(self.targets[0], weights=(1, 1, 1, 1, -1))
+
+
+class TestRecipeIndexRecipes(unittest.TestCase):
+    def test_profiles_from_recipes(self):
+        recipes = random_recipes(50)
+        index = RecipeIndex(volume=20, boil_volume=25)
+        index.extend(enumerate(recipes[:40]))
+        for key, recipe in enumerate(recipes[40:], 40):
+            index.insert(key, recipe)
+
+        for key, recipe in enumerate(recipes):
+            summary = recipe_summary(recipe, 20, 25)
+            expected = [summary.original_gravity, summary.final_gravity, summary.ebc, summary.ibu, summary.abv]
+            np.testing.assert_allclose(expected, index.profile(key), rtol=1e-12, atol=1e-12)
+        self.assertEqual((7, 0.0), index.nearest(recipes[7])[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
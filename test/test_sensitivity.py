@@ -0,0 +1,84 @@
+import dataclasses
+import unittest
+
+import numpy as np
+
+from brew_maths.calc.sensitivity import recipe_sensitivity, recipe_sensitivity_batch
+from brew_maths.calc.summary import recipe_summary, recipe_summary_batch
+from brew_maths.recipe_objects.batch import RecipeBatch
+from test_batch import random_recipes
+
+STATS = ('original_gravity', 'final_gravity', 'abv', 'ebc', 'ibu')
+
+
+class TestRecipeSensitivity(unittest.TestCase):
+    def setUp(self):
+        self.recipes = random_recipes(100)
+        self.batch = RecipeBatch.from_recipes(self.recipes)
+        self.volume = np.linspace(15, 60, len(self.recipes))
+        self.boil_volume = self.volume + 6
+        self.sensitivity = recipe_sensitivity_batch(self.batch, self.volume, self.boil_volume, 0.72, 0.65)
+        self.rng = np.random.default_rng(0)
+
+    def summary(self, batch=None, efficiency=0.72, attenuation=0.65):
+        return recipe_summary_batch(batch or self.batch, self.volume, self.boil_volume, efficiency, attenuation)
+
+    def assertDirectionalDerivative(self, stat, expected, changed, step):
+        # Central differences, against the gradient along the same direction
+        actual = (getattr(changed(step), stat) - getattr(changed(-step), stat)) / (2 * step)
+        np.testing.assert_allclose(expected, actual, rtol=1e-5, atol=1e-7, err_msg=stat)
+
+    def test_values(self):
+        summary = self.summary()
+        for stat in STATS:
+            np.testing.assert_allclose(getattr(summary, stat), getattr(self.sensitivity, stat).value, rtol=1e-12)
+
+    def test_grist_mass(self):
+        direction = self.rng.uniform(-1, 1, self.batch.grist_mass.shape)
+
+        def changed(step):
+            return self.summary(dataclasses.replace(self.batch, grist_mass=self.batch.grist_mass + step * direction))
+
+        for stat in STATS:
+            expected = self.batch.sum_grists(getattr(self.sensitivity, stat).grist_mass * direction)
+            self.assertDirectionalDerivative(stat, expected, changed, 1e-3)
+
+    def test_hops(self):
+        mass_direction = self.rng.uniform(-1, 1, self.batch.hop_mass.shape)
+        time_direction = self.rng.uniform(-1, 1, self.batch.hop_time.shape)
+
+        def changed(step):
+            return self.summary(dataclasses.replace(self.batch, hop_mass=self.batch.hop_mass + step * mass_direction,
+                                                    hop_time=self.batch.hop_time + step * time_direction))
+
+        for stat in STATS:
+            sensitivity = getattr(self.sensitivity, stat)
+            expected = self.batch.sum_hops(sensitivity.hop_mass * mass_direction +
+                                           sensitivity.hop_time * time_direction)
+            self.assertDirectionalDerivative(stat, expected, changed, 1e-4)
+
+    def test_efficiency_and_attenuation(self):
+        for stat in STATS:
+            sensitivity = getattr(self.sensitivity, stat)
+            self.assertDirectionalDerivative(stat, sensitivity.efficiency,
+                                             lambda step: self.summary(efficiency=0.72 + step), 1e-6)
+            self.assertDirectionalDerivative(stat, sensitivity.attenuation,
+                                             lambda step: self.summary(attenuation=0.65 + step), 1e-6)
+
+    def test_single_recipe(self):
+        recipe = next(recipe for recipe in self.recipes if recipe.grists and recipe.hops)
+        sensitivity = recipe_sensitivity(recipe, 23, 27)
+        summary = recipe_summary(recipe, 23, 27)
+        for stat in STATS:
+            self.assertAlmostEqual(getattr(summary, stat), getattr(sensitivity, stat).value)
+        self.assertEqual(len(recipe.grists), len(sensitivity.ibu.grist_mass))
+        self.assertEqual(len(recipe.hops), len(sensitivity.ibu.hop_time))
+        self.assertEqual(0, sensitivity.original_gravity.attenuation)
+        # EBC is linear in mass, so the gradient is the colour of each gram
+        added = dataclasses.replace(recipe.grists[0], mass=recipe.grists[0].mass + 100)
+        with_more = recipe_summary(dataclasses.replace(recipe, grists=[added, *recipe.grists[1:]]), 23, 27)
+        self.assertAlmostEqual(with_more.ebc - summary.ebc, sensitivity.ebc.grist_mass[0] * 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+import asyncio
+import json
+import unittest
+
+from brew_maths.calc.abv import gov_uk_abv, ritchie_abv, www_alcohol_by_volume
+from brew_maths.calc.ebc import graham_recipe_ebc
+from brew_maths.calc.hop_bitterness import hop_ibu
+from brew_maths.calc.summary import recipe_summary
+from brew_maths.recipe_objects.serialization import recipe_from_dict
+from brew_maths.server import CalcServer, MicroBatcher
+
+RECIPE = {'volume': 10, 'grists': [
+    {'ebc': 60, 'mashable': True, 'extract': 265, 'moisture': 3, 'fermentability': None, 'mass': 1100},
+    {'ebc': 50, 'mashable': False, 'extract': 370, 'moisture': 30, 'fermentability': 1, 'mass': 40},
+], 'hops': [{'alpha': 0.076, 'mass': 30, 'time': 90}]}
+
+
+async def request(address, method, path, body=None):
+    reader, writer = await asyncio.open_connection(*address)
+    payload = b'' if body is None else json.dumps(body).encode()
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(payload)}\r\nConnection: close\r\n\r\n"
+                 .encode() + payload)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(content)
+
+
+class TestCalcServer(unittest.TestCase):
+    def run_with_server(self, test, **options):
+        async def run():
+            server = CalcServer(port=0, **options)
+            await server.start()
+            try:
+                return await test(server)
+            finally:
+                await server.close()
+
+        return asyncio.run(run())
+
+    def test_endpoints(self):
+        async def test(server):
+            return await asyncio.gather(
+                request(server.address, 'POST', '/evaluate', RECIPE),
+                request(server.address, 'POST', '/abv', {'original_gravity': 1.05, 'final_gravity': 1.01,
+                                                         'formula': 'ritchie'}),
+                request(server.address, 'POST', '/ibu', {'hops': RECIPE['hops'], 'volume': 10,
+                                                         'boil_gravity': 1.04}),
+                request(server.address, 'POST', '/colour', {'grists': RECIPE['grists'], 'volume': 10}),
+            )
+
+        (status, evaluated), (_, abv), (_, ibu), (_, colour) = self.run_with_server(test)
+        recipe = recipe_from_dict(RECIPE)
+        summary = recipe_summary(recipe, 10, 10)
+        self.assertEqual(200, status)
+        self.assertEqual(summary.original_gravity, evaluated['original_gravity'])
+        self.assertEqual(summary.ibu, evaluated['ibu'])
+        self.assertEqual(ritchie_abv(1.05, 1.01), abv['abv'])
+        self.assertEqual(hop_ibu(recipe.hops[0], 10, 1.04), ibu['ibu'])
+        self.assertEqual(graham_recipe_ebc(recipe.grists, 10, 0.75), colour['ebc'])
+
+    def test_concurrent_requests_are_batched(self):
+        gravities = [(1.04 + i / 1000, 1.01) for i in range(50)]
+
+        async def test(server):
+            responses = await asyncio.gather(*(
+                request(server.address, 'POST', '/abv', {'original_gravity': og, 'final_gravity': fg})
+                for og, fg in gravities
+            ))
+            return responses, server.batchers['/abv'].batches
+
+        responses, batches = self.run_with_server(test, max_wait=0.05)
+        self.assertEqual([www_alcohol_by_volume(og, fg) for og, fg in gravities],
+                         [body['abv'] for _, body in responses])
+        self.assertLess(batches, len(gravities))
+
+    def test_list_body(self):
+        async def test(server):
+            body = [{'original_gravity': 1.05, 'final_gravity': 1.01}] * 3
+            return await request(server.address, 'POST', '/abv', body)
+
+        status, body = self.run_with_server(test)
+        self.assertEqual(200, status)
+        self.assertEqual([{'abv': www_alcohol_by_volume(1.05, 1.01)}] * 3, body)
+
+    def test_gov_uk_abv(self):
+        async def test(server):
+            return await request(server.address, 'POST', '/abv', [
+                {'original_gravity': 1.045, 'final_gravity': 1.010, 'formula': 'gov_uk'},
+                {'original_gravity': 1.045, 'final_gravity': 1.010, 'formula': 'www'},
+            ])
+
+        status, (gov_uk, www) = self.run_with_server(test)
+        self.assertEqual(200, status)
+        self.assertEqual(gov_uk_abv(1045, 1010), gov_uk['abv'])
+        self.assertAlmostEqual(www['abv'], gov_uk['abv'], delta=0.2)
+
+    def test_errors(self):
+        async def test(server):
+            return await asyncio.gather(
+                request(server.address, 'POST', '/missing', {}),
+                request(server.address, 'GET', '/abv'),
+                request(server.address, 'POST', '/abv', {'original_gravity': 1.05}),
+                request(server.address, 'POST', '/abv', {'original_gravity': 1.05, 'final_gravity': 1.01,
+                                                         'formula': [1]}),
+                request(server.address, 'POST', '/evaluate', {'grists': [{'ebc': 5}]}),
+                request(server.address, 'GET', '/health'),
+            )
+
+        statuses = [status for status, _ in self.run_with_server(test)]
+        self.assertEqual([404, 405, 400, 400, 400, 200], statuses)
+
+    def test_non_finite(self):
+        async def test(server):
+            return await asyncio.gather(
+                request(server.address, 'POST', '/abv', {'original_gravity': 1.05, 'final_gravity': 0}),
+                request(server.address, 'POST', '/ibu', {'hops': RECIPE['hops'], 'volume': 0, 'boil_gravity': 1.04}),
+                request(server.address, 'POST', '/colour', {'grists': RECIPE['grists'], 'volume': -1}),
+                request(server.address, 'POST', '/evaluate', dict(RECIPE, boil_volume=0)),
+                request(server.address, 'POST', '/evaluate', {'volume': 1, 'grists': [
+                    {'ebc': 0, 'mashable': False, 'extract': -1000, 'fermentability': 0, 'mass': 1000}]}),
+            )
+
+        responses = self.run_with_server(test)
+        self.assertEqual([400, 400, 400, 400, 200], [status for status, _ in responses])
+        self.assertIn('final_gravity', responses[0][1]['error'])
+        # A final gravity of 0 (in full) still has no ABV, which is sent as null rather than NaN
+        self.assertIsNone(responses[-1][1]['abv'])
+
+    def test_malformed_requests(self):
+        async def raw(address, data):
+            reader, writer = await asyncio.open_connection(*address)
+            writer.write(data)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            return response
+
+        async def test(server):
+            return await asyncio.gather(
+                raw(server.address, b'GARBAGE\r\n\r\n'),
+                raw(server.address, b'GET /health HTTP/1.1\r\nNo colon here\r\n\r\n'),
+                raw(server.address, b'POST /abv HTTP/1.1\r\nContent-Length: abc\r\n\r\n'),
+            )
+
+        for response in self.run_with_server(test):
+            self.assertTrue(response.startswith(b'HTTP/1.1 400 Bad Request\r\n'), response)
+            self.assertIn(b'Connection: close', response)
+
+    def test_bad_fields_do_not_fail_the_batch(self):
+        bad_grist = dict(RECIPE['grists'][0], mass='abc')
+
+        async def test(server):
+            return await asyncio.gather(
+                request(server.address, 'POST', '/evaluate', RECIPE),
+                request(server.address, 'POST', '/evaluate', dict(RECIPE, grists=[bad_grist])),
+                request(server.address, 'POST', '/colour', {'grists': [dict(bad_grist, mass=10, mashable='yes')]}),
+                request(server.address, 'POST', '/ibu', {'hops': [{'alpha': '0.07', 'mass': 10}]}),
+                request(server.address, 'POST', '/ibu', {'hops': 'abc'}),
+                request(server.address, 'POST', '/colour', {'grists': RECIPE['grists'], 'volume': 10}),
+            )
+
+        responses = self.run_with_server(test, max_wait=0.05)
+        self.assertEqual([200, 400, 400, 400, 400, 200], [status for status, _ in responses])
+        self.assertIn('grists[0].mass', responses[1][1]['error'])
+
+
+class TestMicroBatcher(unittest.TestCase):
+    def test_max_batch_size_and_backpressure(self):
+        sizes = []
+
+        def double(items):
+            sizes.append(len(items))
+            return [item * 2 for item in items]
+
+        async def run():
+            batcher = MicroBatcher(double, max_batch_size=8, max_wait=0.01, max_pending=4)
+            try:
+                return await asyncio.gather(*(batcher.submit(i) for i in range(30)))
+            finally:
+                await batcher.close()
+
+        self.assertEqual([i * 2 for i in range(30)], asyncio.run(run()))
+        self.assertEqual(30, sum(sizes))
+        self.assertLessEqual(max(sizes), 8)
+
+    def test_errors_reach_every_caller(self):
+        def fail(items):
+            raise ValueError("bad batch")
+
+        async def run():
+            batcher = MicroBatcher(fail)
+            try:
+                return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+            finally:
+                await batcher.close()
+
+        self.assertTrue(all(isinstance(result, ValueError) for result in asyncio.run(run())))
+
+    def test_failed_batch_is_retried_item_by_item(self):
+        def invert(items):
+            return [1 / item for item in items]
+
+        async def run():
+            batcher = MicroBatcher(invert, max_wait=0.05)
+            try:
+                return await asyncio.gather(*(batcher.submit(i) for i in (1, 0, 2)), return_exceptions=True)
+            finally:
+                await batcher.close()
+
+        first, failed, last = asyncio.run(run())
+        self.assertEqual((1, 0.5), (first, last))
+        self.assertIsInstance(failed, ZeroDivisionError)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from brew_maths.calc.summary import recipe_summary_batch
+from brew_maths.recipe_objects.batch import RecipeBatch
+from brew_maths.recipe_objects.grist import GristType
+from brew_maths.recipe_objects.recipe import Recipe
+from brew_maths.recipe_objects.store import RecipeStore
+from test_batch import random_recipes
+
+
+class TestRecipeStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.recipes = random_recipes(100)
+
+    def test_empty_store(self):
+        store = RecipeStore(self.directory.name)
+        self.assertEqual(0, len(store))
+        self.assertEqual(0, len(store.batch()))
+
+    def test_batch_matches_from_recipes(self):
+        store = RecipeStore(self.directory.name)
+        store.append(self.recipes[:40])
+        store.append(self.recipes[40:])
+
+        stored = recipe_summary_batch(RecipeStore(self.directory.name).batch(), 23, 27)
+        expected = recipe_summary_batch(RecipeBatch.from_recipes(self.recipes), 23, 27)
+        for stored_column, expected_column in zip(stored, expected):
+            self.assertEqual(expected_column.tolist(), stored_column.tolist())
+
+    def test_batch_is_a_view_of_the_file(self):
+        store = RecipeStore(self.directory.name)
+        store.append(self.recipes)
+        batch = store.batch()
+        self.assertIsInstance(batch.grist_mass.base, np.memmap)
+        self.assertIsInstance(batch.hop_alpha.base, np.memmap)
+
+    def test_getitem_roundtrip(self):
+        index = next(i for i, recipe in enumerate(self.recipes) if recipe.grists and recipe.hops)
+        recipe = self.recipes[index]
+        recipe.grists[0].metadata.type = GristType.CAN_BE_STEEPED
+        recipe.hops[0].metadata.origin = 'UK'
+        store = RecipeStore(self.directory.name)
+        store.append(self.recipes, names=[f'Recipe {i}' for i in range(len(self.recipes))])
+
+        reopened = RecipeStore(self.directory.name)
+        self.assertEqual(recipe, reopened[index])
+        self.assertEqual(self.recipes[-1], reopened[-1])
+        self.assertEqual(f'Recipe {index}', reopened.name(index))
+        with self.assertRaises(IndexError):
+            reopened[len(self.recipes)]
+
+    def test_append_without_names_keeps_strings(self):
+        RecipeStore(self.directory.name).append([Recipe([], [])], names=['First'])
+        RecipeStore(self.directory.name).append([Recipe([], [])])
+        self.assertEqual('First', RecipeStore(self.directory.name).name(0))
+        self.assertIsNone(RecipeStore(self.directory.name).name(1))
+
+    def test_torn_append_is_ignored(self):
+        store = RecipeStore(self.directory.name)
+        store.append(self.recipes[:10])
+        # Records written, but the offsets tables never were
+        with open(store.path / 'grists.bin', 'ab') as file:
+            file.write(b'\0' * 200)
+
+        reopened = RecipeStore(self.directory.name)
+        self.assertEqual(10, len(reopened))
+        reopened.append(self.recipes[10:20])
+        self.assertEqual(self.recipes[:20], [reopened[i] for i in range(20)])
+
+    def test_not_a_store(self):
+        with open(f'{self.directory.name}/grists.bin', 'wb') as file:
+            file.write(b'something else entirely')
+        with self.assertRaises(ValueError):
+            RecipeStore(self.directory.name)
+
+
+if __name__ == '__main__':
+    unittest.main()